@@ -0,0 +1,86 @@
+"""Núcleo do simulador Manchester, sem dependências de interface gráfica
+
+Contém o codificador Manchester, a conversão texto ↔ binário, a criptografia
+AES-256 e o transporte (TCP ou em memória). A interface Tk/Matplotlib fica em
+``manchester_sim.py`` e só é importada quando a GUI é iniciada.
+
+Os submódulos são carregados sob demanda: ``from manchester import
+ManchesterEncoder`` não importa asyncio nem pycryptodome, o que mantém
+o tempo de importação do núcleo pequeno (medir com
+``python -X importtime -c "import manchester"``).
+"""
+import importlib
+
+_EXPORTS = {
+    'ManchesterEncoder': 'encoder',
+    'binary_to_bytes': 'encoder',
+    'binary_to_text': 'encoder',
+    'bytes_to_binary': 'encoder',
+    'bytes_to_bits': 'encoder',
+    'bytes_to_manchester': 'encoder',
+    'text_to_binary': 'encoder',
+    'ManchesterFrame': 'frame',
+    'LINE_CODES': 'linecode',
+    'LineCode': 'linecode',
+    'get_line_code': 'linecode',
+    'register_line_code': 'linecode',
+    'IncrementalEncoder': 'preview',
+    'ParallelManchesterEncoder': 'parallel',
+    'ViolationScanner': 'diagnostics',
+    'scan_violations': 'diagnostics',
+    'BitErrorChannel': 'channel',
+    'ChannelModel': 'channel',
+    'ClockRecoveryDecoder': 'channel',
+    'protect': 'fec',
+    'recover': 'fec',
+    'EventQueue': 'events',
+    'JobCancelled': 'pipeline',
+    'SendJob': 'pipeline',
+    'SendPipeline': 'pipeline',
+    'Metrics': 'metrics',
+    'MetricsLogger': 'metrics',
+    'MetricsServer': 'metrics',
+    'LengthPrefixFramer': 'protocol',
+    'WireProtocol': 'protocol',
+    'DeliveryError': 'reliable',
+    'decrypt_aes_256': 'crypto',
+    'encrypt_aes_256': 'crypto',
+    'generate_key': 'crypto',
+    'parse_key': 'crypto',
+    'StreamDecryptor': 'crypto',
+    'StreamEncryptor': 'crypto',
+    'FileReceiver': 'filetransfer',
+    'send_file': 'filetransfer',
+    'StreamReceiver': 'stream',
+    'encode_stream': 'stream',
+    'iter_chunks': 'stream',
+    'AsyncReceiverServer': 'transport',
+    'HeadlessSink': 'transport',
+    'ReliableSender': 'transport',
+    'SenderPool': 'transport',
+    'TcpTransport': 'transport',
+    'Transport': 'transport',
+    'connect': 'transport',
+    'send_frame': 'transport',
+    'FanOutSender': 'fanout',
+    'LoopbackTransport': 'loopback',
+    'MulticastTransport': 'multicast',
+    'ShmTransport': 'shm',
+    'run_load': 'loadgen',
+    'sweep': 'loadgen',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
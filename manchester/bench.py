@@ -0,0 +1,362 @@
+"""Benchmark do pipeline de envio/recepção
+
+Mede cada etapa (criptografia → binário → Manchester → serialização →
+socket → processamento no receptor) e o caminho completo sobre um socket
+TCP de loopback, para cargas de 16 B a 64 MB. Para cada etapa registra
+latência p50/p99, vazão em MB/s e símbolos/s e o pico de memória
+(``tracemalloc``). Cada código de linha registrado em ``manchester.linecode``
+tem etapas próprias de codificação e decodificação empacotadas, e o
+resultado traz os símbolos de linha por byte de carga de cada código. As
+etapas ``fec_*`` medem o CRC32 e o Hamming(7,4) de ``manchester.fec``, e
+quadros protegidos passam por um ``BitErrorChannel`` com algumas taxas de
+erro para contar palavras corrigidas e quadros incorrigíveis. Os resultados são gravados em JSON e podem ser
+comparados com uma linha de base para detectar regressões::
+
+    python -m manchester bench --output bench.json
+    python -m manchester bench --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import queue
+import socket
+import string
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+from .channel import BitErrorChannel, ChannelModel, ClockRecoveryDecoder
+from .crypto import decrypt_aes_256, encrypt_aes_256, generate_key
+from .encoder import ManchesterEncoder, bytes_to_manchester, text_to_binary
+from .fec import protect, recover
+from .linecode import LINE_CODES
+from .parallel import ParallelManchesterEncoder
+from .protocol import LengthPrefixFramer, WireProtocol
+from .stream import encode_stream, iter_chunks
+from .transport import send_frame
+
+DEFAULT_SIZES = [16, 1 << 10, 64 << 10, 1 << 20, 16 << 20, 64 << 20]
+# Etapas que materializam strings/listas Python por bit ficam limitadas a este
+# tamanho de carga para não esgotar a memória em cargas grandes
+DEFAULT_LEGACY_LIMIT = 4 << 20
+# A forma de onda sobreamostrada tem 16 amostras float32 por bit (512 B por
+# byte de carga); a simulação do canal fica limitada a este tamanho de carga
+CHANNEL_LIMIT = 64 << 10
+# Taxas de erro de símbolo e quadros por taxa na simulação de canal ruidoso
+FEC_BERS = (1e-5, 1e-4, 1e-3, 1e-2)
+FEC_TRIALS = 20
+FORMAT_VERSION = 1
+
+
+def make_payload(size):
+    """Gera uma mensagem de texto ASCII pseudoaleatória com ``size`` bytes"""
+    alphabet = np.frombuffer((string.ascii_letters + string.digits + ' ').encode(), dtype=np.uint8)
+    rng = np.random.default_rng(size)
+    return alphabet[rng.integers(0, alphabet.size, size)].tobytes().decode('ascii')
+
+
+def percentile(samples, q):
+    return float(np.percentile(np.asarray(samples), q))
+
+
+def noisy_channel(encrypted, bers=FEC_BERS, trials=FEC_TRIALS, seed=0):
+    """Envia quadros Manchester com CRC32 e com Hamming(7,4) por um ``BitErrorChannel``
+
+    Para cada taxa de erro conta palavras corrigidas e quadros
+    incorrigíveis (CRC32 não confere) de cada proteção.
+    """
+    header = WireProtocol.HEADER.size
+    report = []
+    for ber in bers:
+        entry = {'ber': ber, 'frames': trials}
+        for protection in ('crc32', 'hamming'):
+            channel = BitErrorChannel(ber, seed)
+            frame = WireProtocol.encode_frame(encrypted, protection=protection)
+            corrected = uncorrectable = 0
+            for _ in range(trials):
+                noisy = frame[:header] + channel.transmit_packed(frame[header:])
+                integrity = WireProtocol.decode_frame(noisy)['integrity']
+                corrected += integrity['corrected']
+                uncorrectable += not integrity['crc_ok']
+            entry[protection] = {'symbol_errors': channel.flipped, 'corrected_words': corrected,
+                                 'uncorrectable_frames': uncorrectable}
+        report.append(entry)
+    return report
+
+
+class LoopbackLink:
+    """Par de sockets TCP em 127.0.0.1 com uma thread receptora
+
+    A thread remonta os quadros e aplica ``self.handler`` a cada um,
+    publicando em ``self.done`` o instante em que terminou.
+    """
+
+    def __init__(self):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(1)
+        self.sender = socket.create_connection(listener.getsockname())
+        self.receiver, _ = listener.accept()
+        listener.close()
+        for sock in (self.sender, self.receiver):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.handler = None
+        self.done = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        framer = LengthPrefixFramer()
+        try:
+            while framer.recv_into(self.receiver):
+                for frame in framer.frames():
+                    if self.handler:
+                        self.handler(frame)
+                    self.done.put(time.perf_counter())
+        except OSError:
+            pass
+
+    def roundtrip(self, frame, handler=None):
+        """Envia um quadro e espera o receptor processá-lo; retorna segundos"""
+        self.handler = handler
+        start = time.perf_counter()
+        send_frame(self.sender, frame)
+        return self.done.get() - start
+
+    def close(self):
+        self.sender.close()
+        self._thread.join()
+        self.receiver.close()
+
+
+def measure(func, repeat):
+    """Executa ``func`` ``repeat`` vezes; retorna as latências em segundos"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def peak_memory(func):
+    """Pico de memória alocada (bytes) durante uma execução de ``func``"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def summarize(samples, payload_bytes, symbols, memory):
+    p50 = percentile(samples, 50)
+    return {
+        'samples': len(samples),
+        'p50_ms': p50 * 1e3,
+        'p99_ms': percentile(samples, 99) * 1e3,
+        'mb_per_s': payload_bytes / p50 / 1e6 if p50 else None,
+        'symbols_per_s': symbols / p50 if p50 else None,
+        'peak_memory_bytes': memory,
+    }
+
+
+def bench_size(size, repeat, legacy_limit, link, key, parallel, track_memory=True):
+    """Mede todas as etapas para uma carga de ``size`` bytes"""
+    message = make_payload(size)
+    plaintext = message.encode('ascii')
+    encrypted = encrypt_aes_256(key, message)
+    symbols = len(encrypted) * 16
+    legacy = size <= legacy_limit
+    # Cargas pequenas repetem mais vezes para estabilizar p50/p99
+    repeat = max(repeat, min(1000, (1 << 20) // max(size, 1)))
+
+    binary = text_to_binary(encrypted) if legacy else None
+    manchester = ManchesterEncoder.encode_binary_to_manchester(binary) if legacy else None
+    frame = WireProtocol.encode_frame(encrypted)
+    protected = {name: protect(encrypted.encode('ascii'), name) for name in ('crc32', 'hamming')}
+    channel = size <= CHANNEL_LIMIT
+    decoder = ClockRecoveryDecoder(16)
+    waveform = (ChannelModel(16, noise=0.3, jitter=0.03, drift=1e-3, seed=size)
+                .transmit(bytes_to_manchester(encrypted.encode('ascii'))) if channel else None)
+
+    def process(received):
+        decrypt_aes_256(key, WireProtocol.decode_frame(received)["encrypted"])
+
+    def end_to_end():
+        link.roundtrip(WireProtocol.encode_frame(encrypt_aes_256(key, message)), process)
+
+    stages = {
+        'encrypt': (lambda: encrypt_aes_256(key, message), True),
+        'binarize': (lambda: text_to_binary(encrypted), legacy),
+        'encode': (lambda: ManchesterEncoder.encode_binary_to_manchester(binary), legacy),
+        'encode_packed': (lambda: ManchesterEncoder.encode_packed(encrypted.encode('ascii')), True),
+        'encode_parallel': (lambda: parallel.encode_packed(encrypted.encode('ascii')), True),
+        'channel_recover': (lambda: decoder.decode(waveform), channel),
+        'fec_crc32_protect': (lambda: protect(encrypted.encode('ascii'), 'crc32'), True),
+        'fec_crc32_recover': (lambda: recover(protected['crc32'], 'crc32'), True),
+        'fec_hamming_protect': (lambda: protect(encrypted.encode('ascii'), 'hamming'), True),
+        'fec_hamming_recover': (lambda: recover(protected['hamming'], 'hamming'), True),
+        # Fluxo AES-GCM sem Base64: 16 símbolos por byte de texto claro
+        'encrypt_encode_stream': (lambda: deque(encode_stream(key, iter_chunks(plaintext)), maxlen=0), True,
+                                  size * 16),
+        'serialize': (lambda: WireProtocol.encode_frame(encrypted), True),
+        'serialize_json': (lambda: WireProtocol.encode_legacy_json(message, encrypted, binary, manchester), legacy),
+        'send_recv': (lambda: link.roundtrip(frame), True),
+        'process_received': (lambda: process(frame), legacy),
+        'end_to_end': (end_to_end, legacy),
+    }
+    # Custo de CPU de cada código de linha sobre o mesmo texto criptografado
+    line_codes = {}
+    for code in LINE_CODES.values():
+        count = code.symbol_count(len(encrypted))
+        packed = code.encode_packed(encrypted.encode('ascii'))
+        stages[f'linecode_{code.name}_encode'] = (lambda code=code: code.encode_packed(encrypted.encode('ascii')),
+                                                  True, count)
+        stages[f'linecode_{code.name}_decode'] = (lambda code=code, packed=packed, count=count:
+                                                  code.decode_packed(packed, count), True, count)
+        line_codes[code.name] = {
+            'symbols': count,
+            'symbols_per_payload_byte': count / size,
+            'symbols_per_bit': code.symbols_per_bit,
+        }
+
+    results = {'payload_bytes': size, 'symbols': symbols, 'line_codes': line_codes, 'stages': {},
+               'fec': noisy_channel(encrypted) if channel else []}
+    for name, (func, enabled, *stage_symbols) in stages.items():
+        if not enabled:
+            results['stages'][name] = {'skipped': True}
+            continue
+        func()  # aquecimento
+        samples = measure(func, repeat)
+        memory = peak_memory(func) if track_memory else None
+        results['stages'][name] = summarize(samples, size, stage_symbols[0] if stage_symbols else symbols, memory)
+    return results
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=5, legacy_limit=DEFAULT_LEGACY_LIMIT, track_memory=True, log=None):
+    """Executa o benchmark para todas as cargas; retorna um dicionário serializável"""
+    key = generate_key()
+    link = LoopbackLink()
+    parallel = ParallelManchesterEncoder()
+    try:
+        runs = []
+        for size in sizes:
+            run = bench_size(size, repeat, legacy_limit, link, key, parallel, track_memory)
+            runs.append(run)
+            if log:
+                log(format_run(run))
+    finally:
+        parallel.shutdown()
+        link.close()
+    return {
+        'format_version': FORMAT_VERSION,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'runs': runs,
+    }
+
+
+def format_run(run):
+    lines = [f"{run['payload_bytes']} B ({run['symbols']} símbolos)"]
+    for name, stage in run['stages'].items():
+        if stage.get('skipped'):
+            lines.append(f"  {name:<32} (ignorado)")
+            continue
+        lines.append(f"  {name:<32} p50 {stage['p50_ms']:10.3f} ms  p99 {stage['p99_ms']:10.3f} ms  "
+                     f"{stage['mb_per_s']:10.2f} MB/s  {stage['symbols_per_s']:14.0f} símb/s")
+    for name, code in run.get('line_codes', {}).items():
+        lines.append(f"  {name:<32} {code['symbols_per_payload_byte']:6.2f} símbolos por byte de carga "
+                     f"({code['symbols_per_bit']:.2f} por bit do texto criptografado)")
+    for entry in run.get('fec', []):
+        crc, hamming = entry['crc32'], entry['hamming']
+        lines.append(f"  canal BER {entry['ber']:<8g}               CRC32: {crc['uncorrectable_frames']}/{entry['frames']} "
+                     f"quadros incorrigíveis; Hamming(7,4): {hamming['corrected_words']} palavras corrigidas, "
+                     f"{hamming['uncorrectable_frames']}/{entry['frames']} incorrigíveis")
+    return '\n'.join(lines)
+
+
+def compare(results, baseline, threshold=0.20):
+    """Compara p50 de cada etapa com a linha de base; retorna as regressões"""
+    base_runs = {run['payload_bytes']: run for run in baseline.get('runs', [])}
+    regressions = []
+    for run in results['runs']:
+        base = base_runs.get(run['payload_bytes'])
+        if not base:
+            continue
+        for name, stage in run['stages'].items():
+            base_stage = base['stages'].get(name, {})
+            if stage.get('skipped') or base_stage.get('skipped') or 'p50_ms' not in base_stage:
+                continue
+            ratio = stage['p50_ms'] / base_stage['p50_ms'] if base_stage['p50_ms'] else 1.0
+            if ratio > 1 + threshold:
+                regressions.append({
+                    'payload_bytes': run['payload_bytes'],
+                    'stage': name,
+                    'baseline_p50_ms': base_stage['p50_ms'],
+                    'p50_ms': stage['p50_ms'],
+                    'ratio': ratio,
+                })
+    return regressions
+
+
+def parse_size(text):
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    text = text.strip().upper().rstrip('B')
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def add_arguments(parser):
+    parser.add_argument('--sizes', type=lambda s: [parse_size(x) for x in s.split(',')], default=DEFAULT_SIZES,
+                        help="Tamanhos de carga separados por vírgula (ex.: 16,1K,1M,64M)")
+    parser.add_argument('--repeat', type=int, default=5, help="Repetições mínimas por etapa")
+    parser.add_argument('--legacy-limit', type=parse_size, default=DEFAULT_LEGACY_LIMIT,
+                        help="Maior carga para etapas baseadas em strings/listas por bit")
+    parser.add_argument('--no-memory', action='store_true', help="Não medir pico de memória")
+    parser.add_argument('-o', '--output', help="Arquivo JSON de resultados")
+    parser.add_argument('--compare', metavar='BASELINE', help="Arquivo JSON de linha de base")
+    parser.add_argument('--threshold', type=float, default=0.20,
+                        help="Aumento relativo de p50 considerado regressão (padrão: 0.20)")
+
+
+def run(args):
+    results = run_benchmarks(args.sizes, args.repeat, args.legacy_limit, not args.no_memory,
+                             log=lambda text: print(text, file=sys.stderr))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSÃO {r['stage']} @ {r['payload_bytes']} B: "
+                  f"{r['baseline_p50_ms']:.3f} → {r['p50_ms']:.3f} ms (×{r['ratio']:.2f})", file=sys.stderr)
+        if regressions:
+            return 1
+        print("Nenhuma regressão em relação à linha de base", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='manchester bench', description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    return parser
+
+
+def main(argv=None):
+    sys.exit(run(build_parser().parse_args(argv)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,536 @@
+"""Linha de comando: ``python -m manchester {send,receive,encode,decode,keygen,bench,load,gui}``
+
+Os subcomandos usam apenas o núcleo e importam somente o que precisam; Tk e
+Matplotlib são importados apenas pelo subcomando ``gui``.
+"""
+import argparse
+import shutil
+import sys
+
+import numpy as np
+
+from .encoder import ManchesterEncoder
+from .fec import PROTECTIONS
+from .linecode import MANCHESTER, get_line_code, line_code_names
+
+DEFAULT_PORT = 12349
+
+
+def _read_input(args):
+    if getattr(args, 'text', None) is not None:
+        return args.text.encode('utf-8')
+    if args.input:
+        with open(args.input, 'rb') as f:
+            return f.read()
+    return sys.stdin.buffer.read()
+
+
+def _write_output(args, data):
+    if args.output:
+        with open(args.output, 'wb') as f:
+            f.write(data)
+    else:
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+
+
+def _start_metrics(args):
+    """Ativa a instrumentação pedida por --stats-interval/--metrics-port; retorna o registro ou None"""
+    if not (args.stats_interval or args.metrics_port):
+        return None
+    from .metrics import MetricsLogger, MetricsServer, metrics
+
+    metrics.enable()
+    if args.stats_interval:
+        MetricsLogger(interval=args.stats_interval, log=lambda line: print(line, file=sys.stderr, flush=True)).start()
+    if args.metrics_port:
+        server = MetricsServer(port=args.metrics_port).start()
+        print(f"Métricas em http://{server.address[0]}:{server.address[1]}/metrics", file=sys.stderr)
+    return metrics
+
+
+def cmd_encode(args):
+    """Codifica bytes em símbolos de linha ('0'/'1' ou empacotados; padrão: Manchester)"""
+    code = get_line_code(args.line_code)
+    data = _read_input(args)
+    if args.packed and args.workers != 1 and code is MANCHESTER:
+        from .parallel import ParallelManchesterEncoder
+        with ParallelManchesterEncoder(args.workers, args.chunk_size) as encoder:
+            _write_output(args, encoder.encode_packed(data))
+    elif args.packed:
+        _write_output(args, code.encode_packed(data))
+    else:
+        _write_output(args, ManchesterEncoder.bits_to_binary(code.encode_bytes(data)).encode('ascii'))
+    return 0
+
+
+def cmd_decode(args):
+    """Decodifica símbolos de linha ('0'/'1' ou empacotados) de volta em bytes"""
+    code = get_line_code(args.line_code)
+    data = _read_input(args)
+    if args.packed and args.workers != 1 and code is MANCHESTER:
+        from .parallel import ParallelManchesterEncoder
+        with ParallelManchesterEncoder(args.workers, args.chunk_size) as encoder:
+            _write_output(args, encoder.decode_packed(data))
+    elif args.packed:
+        _write_output(args, code.decode_packed(data))
+    else:
+        codes = ManchesterEncoder.binary_to_codes(data.decode('ascii', errors='replace'))
+        symbols = codes[codes != ManchesterEncoder.BIT_IGNORED]
+        _write_output(args, np.packbits(code.decode_symbols(symbols)).tobytes())
+    return 0
+
+
+def cmd_send(args):
+    """Criptografa uma mensagem e envia o quadro ao receptor"""
+    from .crypto import encrypt_aes_256, parse_key
+    from .protocol import WireProtocol
+    from .transport import connect, send_frame
+
+    key = parse_key(args.key)
+    if args.file:
+        return _send_file(args, key)
+    if args.stream:
+        return _send_stream(args, key)
+    message = _read_input(args).decode('utf-8')
+    encrypted = encrypt_aes_256(key, message)
+    mode = WireProtocol.MODE_CIPHERTEXT if args.ciphertext_only else WireProtocol.MODE_SYMBOLS
+    if _is_shm(args.host):
+        return _send_shm(args, encrypted, mode)
+    frame = WireProtocol.encode_frame(encrypted, mode, args.line_code, args.protection)
+    if ',' in args.host or _is_multicast(args.host):
+        return _send_many(args, frame)
+    if args.reliable:
+        return _send_reliable(args, frame)
+    with connect(args.host, args.port, timeout=args.timeout) as sock:
+        send_frame(sock, frame)
+    print(f"Mensagem enviada para {args.host}:{args.port}", file=sys.stderr)
+    return 0
+
+
+def _is_multicast(host):
+    from .multicast import is_multicast
+    return is_multicast(host)
+
+
+def _is_shm(host):
+    from .shm import is_shm
+    return is_shm(host)
+
+
+def _send_shm(args, encrypted, mode):
+    """Codifica o quadro direto no anel de memória compartilhada do receptor local"""
+    from .shm import ShmTransport
+
+    if args.reliable:
+        print("--reliable não se aplica à memória compartilhada", file=sys.stderr)
+        return 2
+    sender = ShmTransport().sender(args.host, args.port)
+    sender.start_in_thread()
+    try:
+        if not sender.wait_connected(args.timeout):
+            print(f"Nenhum receptor em shm:{args.port}", file=sys.stderr)
+            return 1
+        sender.submit_encrypted(encrypted, mode, args.line_code, args.protection).result()
+    finally:
+        sender.stop_in_thread()
+    print(f"Mensagem enviada para shm:{args.port}", file=sys.stderr)
+    return 0
+
+
+def _send_many(args, frame):
+    """Envia o mesmo quadro, codificado uma vez, a um grupo multicast ou a vários receptores TCP"""
+    import time
+
+    from .fanout import FanOutSender, parse_targets
+    from .multicast import MulticastTransport
+
+    if args.reliable:
+        print("--reliable não se aplica a vários receptores nem a multicast", file=sys.stderr)
+        return 2
+    if _is_multicast(args.host):
+        sender = MulticastTransport(ttl=args.ttl).sender(args.host, args.port)
+        sender.start_in_thread()
+        try:
+            datagrams = sender.submit(frame).result()
+        finally:
+            sender.stop_in_thread()
+        print(f"Mensagem enviada ao grupo {args.host}:{args.port} ({datagrams} datagrama(s))", file=sys.stderr)
+        return 0
+
+    targets = parse_targets(args.host, args.port)
+    sender = FanOutSender(targets, connect_timeout=args.timeout)
+    sender.start_in_thread()
+    try:
+        sender.wait_connected(args.timeout)
+        sender.submit(frame)
+        deadline = time.monotonic() + args.timeout
+        # O future conclui na primeira escrita; aqui esperamos todos os receptores conectados
+        while any(pool.connected and not pool.frames_sent for pool in sender.pools) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        sender.stop_in_thread()
+    reached = [f"{host}:{port}" for (host, port), pool in zip(targets, sender.pools) if pool.frames_sent]
+    print(f"Mensagem enviada para {len(reached)} de {len(targets)} receptores: {', '.join(reached) or '-'}",
+          file=sys.stderr)
+    return 0 if len(reached) == len(targets) else 1
+
+
+def _send_reliable(args, frame):
+    """Envia o quadro e espera a confirmação (ACK) do receptor, retransmitindo se ele o rejeitar"""
+    import concurrent.futures
+
+    from .reliable import DeliveryError
+    from .transport import ReliableSender
+
+    sender = ReliableSender(args.host, args.port, connect_timeout=args.timeout)
+    sender.start_in_thread()
+    try:
+        sender.submit(frame).result(args.timeout)
+    except DeliveryError as e:
+        print(f"Mensagem rejeitada por {args.host}:{args.port}: {e}", file=sys.stderr)
+        return 1
+    except concurrent.futures.TimeoutError:
+        print(f"Sem confirmação de {args.host}:{args.port} em {args.timeout:.0f}s", file=sys.stderr)
+        return 1
+    finally:
+        sender.stop_in_thread()
+    print(f"Mensagem confirmada por {args.host}:{args.port}", file=sys.stderr)
+    return 0
+
+
+def _send_stream(args, key):
+    """Envia a entrada como fluxo AES-GCM em blocos, sem carregá-la inteira"""
+    from .stream import encode_stream, iter_chunks
+    from .transport import connect, send_frame
+
+    error = _unsupported_target(args, '--stream')
+    if error:
+        print(error, file=sys.stderr)
+        return 2
+    if args.text is not None:
+        source = args.text.encode('utf-8')
+    elif args.input:
+        source = open(args.input, 'rb')
+    else:
+        source = sys.stdin.buffer
+    try:
+        with connect(args.host, args.port, timeout=args.timeout) as sock:
+            for frame in encode_stream(key, iter_chunks(source, args.chunk_size)):
+                send_frame(sock, frame)
+    finally:
+        if args.input:
+            source.close()
+    print(f"Mensagem enviada para {args.host}:{args.port}", file=sys.stderr)
+    return 0
+
+
+def _unsupported_target(args, option):
+    """Mensagem de erro se ``option`` não funciona com o ``--host`` e as opções pedidas; ``None`` se funciona"""
+    if ',' in args.host or _is_multicast(args.host) or _is_shm(args.host):
+        return f"{option} só envia a um único receptor TCP (sem vários receptores, multicast ou shm)"
+    # Os quadros de fluxo levam bytes cifrados, sem código de linha nem FEC
+    for name, used in (('--reliable', args.reliable),
+                       ('--ciphertext-only', args.ciphertext_only),
+                       ('--line-code', args.line_code != MANCHESTER.name),
+                       ('--protection', args.protection != 'none')):
+        if used:
+            return f"{name} não se aplica a {option}"
+    return None
+
+
+def _send_file(args, key):
+    """Envia um arquivo mapeado em memória, em janelas de tamanho fixo"""
+    from .filetransfer import send_file
+    from .transport import connect
+
+    error = _unsupported_target(args, '--file')
+    if error:
+        print(error, file=sys.stderr)
+        return 2
+    with connect(args.host, args.port, timeout=args.timeout) as sock:
+        size = send_file(sock, key, args.file, args.window)
+    print(f"Arquivo {args.file} ({size} bytes) enviado para {args.host}:{args.port}", file=sys.stderr)
+    return 0
+
+
+def cmd_receive(args):
+    """Recebe quadros sem interface gráfica e imprime as mensagens"""
+    import asyncio
+    import tempfile
+
+    from .crypto import decrypt_aes_256, parse_key
+    from .filetransfer import FileReceiver
+    from .protocol import WireProtocol
+    from .reliable import decrypt_verifier
+    from .stream import StreamReceiver
+    from .transport import AsyncReceiverServer, HeadlessSink
+
+    key = parse_key(args.key) if args.key else None
+    streams = {}
+    files = {}
+
+    def receive_file(received_data, peer):
+        # O arquivo é decifrado direto em um mmap do arquivo de saída
+        if received_data["mode"] == WireProtocol.MODE_FILE_START:
+            files[peer] = FileReceiver(key, args.output_dir)
+        receiver = files[peer]
+        try:
+            complete = receiver.feed(received_data)
+        except ValueError as e:
+            del files[peer]
+            print(f"{peer[0]}:{peer[1]} Arquivo rejeitado: {e}", file=sys.stderr, flush=True)
+            return
+        if complete:
+            del files[peer]
+            print(f"{peer[0]}:{peer[1]} Arquivo autenticado: {receiver.path} ({receiver.size} bytes)",
+                  file=sys.stderr, flush=True)
+
+    def show_stream(received_data, peer):
+        # O texto claro fica em um arquivo temporário até a tag ser verificada
+        if peer not in streams:
+            spool = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+            streams[peer] = (StreamReceiver(key, spool.write), spool)
+        receiver, spool = streams[peer]
+        if received_data["mode"] == WireProtocol.MODE_STREAM_START:
+            spool.seek(0)
+            spool.truncate()
+        try:
+            complete = receiver.feed(received_data)
+        except ValueError as e:
+            del streams[peer]
+            spool.close()
+            print(f"{peer[0]}:{peer[1]} Fluxo rejeitado: {e}", file=sys.stderr, flush=True)
+            return
+        if complete:
+            del streams[peer]
+            spool.seek(0)
+            shutil.copyfileobj(spool, sys.stdout.buffer)
+            sys.stdout.buffer.flush()
+            spool.close()
+            print(f"{peer[0]}:{peer[1]} Fluxo autenticado ({receiver.bytes_received} bytes)", file=sys.stderr, flush=True)
+
+    def show(received_data, peer):
+        if StreamReceiver.is_stream_frame(received_data):
+            if key is None:
+                print(f"{peer[0]}:{peer[1]} Fluxo AES-GCM ignorado: informe --key", file=sys.stderr, flush=True)
+            elif received_data["mode"] == WireProtocol.MODE_FILE_START or peer in files:
+                receive_file(received_data, peer)
+            else:
+                show_stream(received_data, peer)
+            return
+        encrypted = received_data.get("encrypted", "")
+        integrity = received_data.get("integrity")
+        if integrity and not integrity['crc_ok']:
+            print(f"{peer[0]}:{peer[1]} Quadro corrompido: CRC32 não confere "
+                  f"({integrity['corrected']} palavras corrigidas)", file=sys.stderr, flush=True)
+            return
+        if integrity and integrity['corrected']:
+            print(f"{peer[0]}:{peer[1]} {integrity['corrected']} palavras corrigidas pelo FEC", file=sys.stderr, flush=True)
+        if key is None:
+            print(f"{peer[0]}:{peer[1]} {encrypted}", flush=True)
+            return
+        if "decrypted" in received_data:
+            # Quadro confirmado (ACK): já decifrado na verificação
+            print(f"{peer[0]}:{peer[1]} {received_data['decrypted']}", flush=True)
+            return
+        try:
+            print(f"{peer[0]}:{peer[1]} {decrypt_aes_256(key, encrypted)}", flush=True)
+        except ValueError as e:
+            print(f"{peer[0]}:{peer[1]} Erro ao descriptografar: {e}", file=sys.stderr, flush=True)
+
+    if _is_multicast(args.host):
+        return _receive_multicast(args, HeadlessSink(show))
+    if _is_shm(args.host):
+        return _receive_shm(args, HeadlessSink(show))
+    server = AsyncReceiverServer(HeadlessSink(show), host=args.host, port=args.port,
+                                 max_connections=args.max_connections, idle_timeout=args.idle_timeout,
+                                 queue_size=args.queue_size, verify=decrypt_verifier(key) if key else None)
+    print(f"Aguardando conexões em {args.host}:{args.port}...", file=sys.stderr)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _receive_multicast(args, sink):
+    """Assina o grupo multicast e imprime as lacunas de sequência detectadas"""
+    import time
+
+    from .multicast import MulticastTransport
+
+    def report_gap(peer, first, count):
+        print(f"{peer[0]}:{peer[1]} {count} quadro(s) perdido(s) a partir da sequência {first}",
+              file=sys.stderr, flush=True)
+
+    receiver = MulticastTransport().receiver(sink, args.host, args.port, on_gap=report_gap)
+    receiver.start_in_thread()
+    print(f"Aguardando quadros do grupo {args.host}:{args.port}...", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver.stop_in_thread()
+    return 0
+
+
+def _receive_shm(args, sink):
+    """Atende remetentes da mesma máquina pelos anéis de memória compartilhada"""
+    import time
+
+    from .shm import ShmTransport
+
+    def report(peer, active):
+        print(f"{peer[0]}:{peer[1]} {active} remetente(s) conectado(s)", file=sys.stderr, flush=True)
+
+    receiver = ShmTransport().receiver(sink, args.host, args.port, on_connection=report)
+    receiver.start_in_thread()
+    print(f"Aguardando remetentes em shm:{args.port}...", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver.stop_in_thread()
+    return 0
+
+
+def cmd_keygen(args):
+    """Gera uma nova chave AES-256 em Base64"""
+    import base64
+
+    from .crypto import generate_key
+
+    print(base64.b64encode(generate_key()).decode())
+    return 0
+
+
+def cmd_bench(args):
+    """Mede o desempenho do pipeline de envio/recepção"""
+    from . import bench
+    return bench.run(bench.build_parser().parse_args(args.extra))
+
+
+def cmd_load(args):
+    """Gera carga de N remetentes simulados contra um receptor (padrão: em memória, sem rede)"""
+    from . import loadgen
+    return loadgen.run(loadgen.build_parser().parse_args(args.extra))
+
+
+def cmd_gui(args):
+    """Inicia a interface gráfica (importa Tk/Matplotlib apenas aqui)"""
+    import manchester_sim
+    manchester_sim.main(loopback=args.loopback)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='manchester', description="Simulador de codificação Manchester")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_io(sub, text=True):
+        if text:
+            sub.add_argument('-t', '--text', help="Mensagem (padrão: stdin)")
+        sub.add_argument('-i', '--input', help="Arquivo de entrada (padrão: stdin)")
+
+    def add_metrics(sub):
+        sub.add_argument('--stats-interval', type=float, metavar='SEGUNDOS',
+                         help="Ativa a instrumentação e imprime as estatísticas por etapa periodicamente")
+        sub.add_argument('--metrics-port', type=int, metavar='PORTA',
+                         help="Ativa a instrumentação e expõe /metrics (Prometheus) em 127.0.0.1")
+
+    def add_line_code(sub):
+        sub.add_argument('--line-code', choices=line_code_names(), default=MANCHESTER.name,
+                         help="Código de linha (padrão: manchester)")
+
+    def add_parallel(sub):
+        sub.add_argument('--workers', type=int, default=1,
+                         help="Processos para o modo empacotado (0 = todos os núcleos; padrão: 1)")
+        sub.add_argument('--chunk-size', type=int, default=4 << 20, help="Bytes por tarefa paralela")
+
+    encode = subparsers.add_parser('encode', help=cmd_encode.__doc__)
+    add_io(encode)
+    encode.add_argument('-o', '--output', help="Arquivo de saída (padrão: stdout)")
+    encode.add_argument('--packed', action='store_true', help="Símbolos empacotados 8 por byte")
+    add_line_code(encode)
+    add_parallel(encode)
+    encode.set_defaults(func=cmd_encode)
+
+    decode = subparsers.add_parser('decode', help=cmd_decode.__doc__)
+    add_io(decode, text=False)
+    decode.add_argument('-o', '--output', help="Arquivo de saída (padrão: stdout)")
+    decode.add_argument('--packed', action='store_true', help="Entrada com símbolos empacotados 8 por byte")
+    add_line_code(decode)
+    add_parallel(decode)
+    decode.set_defaults(func=cmd_decode)
+
+    send = subparsers.add_parser('send', help=cmd_send.__doc__)
+    add_io(send)
+    send.add_argument('--host', default='127.0.0.1',
+                      help="Receptor; vários separados por vírgula (host[:porta]), um grupo multicast "
+                           "(ex.: 239.255.12.49) ou shm (memória compartilhada, mesma máquina)")
+    send.add_argument('--ttl', type=int, default=1, help="TTL dos datagramas multicast (1 = só a rede local)")
+    send.add_argument('--port', type=int, default=DEFAULT_PORT)
+    send.add_argument('--key', required=True, help="Chave AES-256 em Base64")
+    send.add_argument('--timeout', type=float, default=10.0)
+    send.add_argument('--ciphertext-only', action='store_true',
+                      help="Enviar só o texto criptografado (codificação de linha no receptor)")
+    send.add_argument('--stream', action='store_true',
+                      help="Fluxo AES-GCM em blocos, sem Base64 e com memória constante")
+    send.add_argument('--chunk-size', type=int, default=64 << 10, help="Bytes por bloco no modo --stream")
+    send.add_argument('--file', help="Enviar um arquivo mapeado em memória (fluxo AES-GCM, memória constante)")
+    send.add_argument('--window', type=int, default=1 << 20, help="Bytes por janela no modo --file")
+    send.add_argument('--protection', choices=list(PROTECTIONS), default='none',
+                      help="CRC32 e correção de erros Hamming(7,4) do quadro (padrão: none)")
+    send.add_argument('--reliable', action='store_true',
+                      help="Esperar a confirmação (ACK) do receptor, com retransmissão se ele rejeitar o quadro")
+    add_line_code(send)
+    add_metrics(send)
+    send.set_defaults(func=cmd_send)
+
+    receive = subparsers.add_parser('receive', help=cmd_receive.__doc__)
+    receive.add_argument('--host', default='0.0.0.0', help="Endereço de escuta, grupo multicast a assinar ou shm (memória compartilhada)")
+    receive.add_argument('--port', type=int, default=DEFAULT_PORT)
+    receive.add_argument('--key', help="Chave AES-256 em Base64 (sem chave, imprime o texto criptografado)")
+    receive.add_argument('--max-connections', type=int, default=512)
+    receive.add_argument('--idle-timeout', type=float, default=60.0)
+    receive.add_argument('--output-dir', default='.', help="Diretório dos arquivos recebidos")
+    receive.add_argument('--queue-size', type=int, default=64,
+                         help="Quadros decodificados em espera (limita a memória em transferências grandes)")
+    add_metrics(receive)
+    receive.set_defaults(func=cmd_receive)
+
+    keygen = subparsers.add_parser('keygen', help=cmd_keygen.__doc__)
+    keygen.set_defaults(func=cmd_keygen)
+
+    # As opções do benchmark são tratadas por manchester.bench (importado só quando usado)
+    bench = subparsers.add_parser('bench', help=cmd_bench.__doc__, add_help=False)
+    bench.set_defaults(func=cmd_bench)
+
+    # Idem para o gerador de carga (manchester.loadgen)
+    load = subparsers.add_parser('load', help=cmd_load.__doc__, add_help=False)
+    load.set_defaults(func=cmd_load)
+
+    gui = subparsers.add_parser('gui', help=cmd_gui.__doc__)
+    gui.add_argument('--loopback', action='store_true',
+                     help="Abre remetente e receptor no mesmo processo, ligados por transporte em memória")
+    add_metrics(gui)
+    gui.set_defaults(func=cmd_gui)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, args.extra = parser.parse_known_args(argv)
+    if args.extra and args.command not in ('bench', 'load'):
+        parser.error(f"argumentos não reconhecidos: {' '.join(args.extra)}")
+    registry = _start_metrics(args) if hasattr(args, 'stats_interval') else None
+    status = args.func(args)
+    if registry:
+        print(registry.format_line(), file=sys.stderr)
+    sys.exit(status)
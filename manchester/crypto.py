@@ -0,0 +1,88 @@
+"""Criptografia AES-256 das mensagens
+
+``encrypt_aes_256``/``decrypt_aes_256`` cifram a mensagem inteira em
+AES-CBC e a representam em Base64 (formato usado pela GUI). As classes
+``StreamEncryptor``/``StreamDecryptor`` cifram em AES-GCM bloco a bloco,
+sem Base64, com memória constante.
+"""
+import base64
+
+from Crypto.Cipher import AES
+from Crypto.Random import get_random_bytes
+from Crypto.Util.Padding import pad, unpad
+
+from .metrics import metrics
+
+KEY_SIZE = 32  # 256 bits
+STREAM_NONCE_SIZE = 12
+STREAM_TAG_SIZE = 16
+
+
+def generate_key():
+    """Gera uma nova chave AES-256 aleatória"""
+    return get_random_bytes(KEY_SIZE)
+
+
+def parse_key(key_b64):
+    """Decodifica uma chave AES-256 em Base64, validando o tamanho"""
+    key = base64.b64decode(key_b64, validate=True)
+    if len(key) != KEY_SIZE:
+        raise ValueError(f"Tamanho de chave inválido: {len(key)} bytes. A chave deve ter 32 bytes (256 bits)")
+    return key
+
+
+def encrypt_aes_256(key, data):
+    """Criptografa texto com AES-256-CBC; retorna IV + dados em Base64"""
+    plaintext = data.encode('utf-8')
+    with metrics.stage('encrypt', len(plaintext)):
+        iv = get_random_bytes(16)
+        cipher = AES.new(key, AES.MODE_CBC, iv)
+        encrypted_data = cipher.encrypt(pad(plaintext, AES.block_size))
+        return base64.b64encode(iv + encrypted_data).decode('utf-8')
+
+
+def decrypt_aes_256(key, encrypted_data):
+    """Descriptografa o Base64 produzido por ``encrypt_aes_256``"""
+    with metrics.stage('decrypt', len(encrypted_data)):
+        raw_data = base64.b64decode(encrypted_data)
+        iv = raw_data[:16]
+        encrypted_data = raw_data[16:]
+        cipher = AES.new(key, AES.MODE_CBC, iv)
+        decrypted_data = unpad(cipher.decrypt(encrypted_data), AES.block_size)
+        return decrypted_data.decode('utf-8')
+
+
+class StreamEncryptor:
+    """Criptografia AES-256-GCM incremental: ``update`` por bloco, ``finalize`` retorna a tag"""
+
+    def __init__(self, key, nonce=None):
+        self.nonce = nonce or get_random_bytes(STREAM_NONCE_SIZE)
+        self._cipher = AES.new(key, AES.MODE_GCM, nonce=self.nonce, mac_len=STREAM_TAG_SIZE)
+
+    def update(self, chunk, output=None):
+        """Cifra um bloco; com ``output`` (buffer gravável do mesmo tamanho) escreve nele e retorna ``None``"""
+        with metrics.stage('encrypt', len(chunk)):
+            return self._cipher.encrypt(chunk, output=output)
+
+    def finalize(self):
+        return self._cipher.digest()
+
+
+class StreamDecryptor:
+    """Descriptografia AES-256-GCM incremental
+
+    Os blocos retornados por ``update`` só são autênticos depois que
+    ``finalize(tag)`` retorna sem erro; em caso de falha é lançado
+    ``ValueError`` e o texto já entregue deve ser descartado.
+    """
+
+    def __init__(self, key, nonce):
+        self._cipher = AES.new(key, AES.MODE_GCM, nonce=bytes(nonce), mac_len=STREAM_TAG_SIZE)
+
+    def update(self, chunk, output=None):
+        """Decifra um bloco; com ``output`` escreve nele (por exemplo, um ``mmap``) e retorna ``None``"""
+        with metrics.stage('decrypt', len(chunk)):
+            return self._cipher.decrypt(chunk, output=output)
+
+    def finalize(self, tag):
+        self._cipher.verify(bytes(tag))
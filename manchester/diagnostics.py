@@ -0,0 +1,126 @@
+"""Diagnóstico de quadros Manchester: violações de código, apagamentos e BER
+
+Ao contrário de ``ManchesterEncoder.decode_symbols``, que descarta pares
+inválidos (``00``/``11``) e desloca todos os bits seguintes, aqui cada par
+vira exatamente um bit: pares inválidos são marcados como apagamentos
+(*erasures*) na sua posição. A varredura é vetorizada e pode ser feita de
+uma vez (``scan_violations``) ou em blocos de um fluxo (``ViolationScanner``).
+"""
+import numpy as np
+
+from .encoder import ManchesterEncoder
+
+DEFAULT_WINDOW = 1024
+
+
+def _reference_bits(reference):
+    if reference is None:
+        return None
+    codes = ManchesterEncoder.binary_to_codes(reference)
+    return codes[codes != ManchesterEncoder.BIT_IGNORED]
+
+
+class ViolationScanner:
+    """Varredura incremental de violações sobre blocos de símbolos
+
+    ``feed`` aceita blocos de qualquer tamanho (um símbolo ímpar no fim é
+    guardado para o próximo bloco) e retorna, para o bloco, o índice do
+    primeiro bit, os bits decodificados, a máscara de apagamentos e os
+    índices globais dos bits com violação. As contagens por janela de
+    ``window`` bits e a comparação com ``reference`` (bits 0/1 ou string
+    binária) são acumuladas até ``finish``.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, reference=None):
+        self.window = window
+        self.reference = _reference_bits(reference)
+        self.bit_count = 0
+        self.violation_count = 0
+        self.bit_errors = 0
+        self.erasures_compared = 0
+        self.compared = 0
+        self._window_counts = []
+        self._current_window = 0
+        self._pending = np.empty(0, dtype=np.uint8)
+
+    def feed(self, symbols):
+        symbols = np.asarray(symbols, dtype=np.uint8)
+        if self._pending.size:
+            symbols = np.concatenate((self._pending, symbols))
+        usable = symbols.size // 2 * 2
+        self._pending = symbols[usable:].copy()
+
+        pairs = symbols[:usable].reshape(-1, 2)
+        first, second = pairs[:, 0], pairs[:, 1]
+        erasures = first == second
+        bits = second.astype(np.uint8)  # 01 → 1, 10 → 0
+        bits[erasures] = 0
+        offset = self.bit_count
+        violations = np.flatnonzero(erasures) + offset
+
+        self._count_windows(violations, offset, bits.size)
+        self._compare(bits, erasures, offset)
+        self.bit_count += bits.size
+        self.violation_count += violations.size
+        return {"offset": offset, "bits": bits, "erasures": erasures, "violations": violations}
+
+    def feed_packed(self, packed, symbol_count=None):
+        """Como ``feed``, para símbolos empacotados (8 por byte, MSB primeiro)"""
+        return self.feed(np.unpackbits(np.frombuffer(packed, dtype=np.uint8), count=symbol_count))
+
+    def _count_windows(self, violations, offset, count):
+        """Acumula as violações por janela, continuando a janela aberta do bloco anterior"""
+        end = offset + count
+        window_start = len(self._window_counts) * self.window
+        counts = np.bincount((violations - window_start) // self.window,
+                             minlength=-(-(end - window_start) // self.window) if count else 0)
+        if not counts.size:
+            return
+        counts[0] += self._current_window
+        complete = (end - window_start) // self.window
+        self._window_counts.extend(counts[:complete].tolist())
+        self._current_window = int(counts[complete]) if complete < counts.size else 0
+
+    def _compare(self, bits, erasures, offset):
+        if self.reference is None or offset >= self.reference.size:
+            return
+        reference = self.reference[offset:offset + bits.size]
+        erased = erasures[:reference.size]
+        self.bit_errors += int(np.count_nonzero(bits[:reference.size][~erased] != reference[~erased]))
+        self.erasures_compared += int(np.count_nonzero(erased))
+        self.compared += reference.size
+
+    def window_counts(self):
+        """Violações por janela de ``window`` bits (a última pode estar incompleta)"""
+        counts = list(self._window_counts)
+        if self.bit_count > len(counts) * self.window:
+            counts.append(self._current_window)
+        return np.asarray(counts, dtype=np.int64)
+
+    def finish(self):
+        """Resumo do fluxo inteiro
+
+        ``ber`` conta apagamentos como erros: (erros + apagamentos) sobre os
+        bits comparados com a referência; é ``None`` sem referência.
+        """
+        summary = {
+            "bit_count": self.bit_count,
+            "violation_count": self.violation_count,
+            "window_counts": self.window_counts(),
+            "trailing_symbol": bool(self._pending.size),
+            "bit_errors": self.bit_errors,
+            "erasures_compared": self.erasures_compared,
+            "compared": self.compared,
+            "ber": (self.bit_errors + self.erasures_compared) / self.compared if self.compared else None,
+        }
+        if self.reference is not None:
+            summary["missing_bits"] = max(0, self.reference.size - self.bit_count)
+        return summary
+
+
+def scan_violations(symbols, window=DEFAULT_WINDOW, reference=None):
+    """Varre um quadro inteiro de uma vez; junta o resultado de ``feed`` e de ``finish``"""
+    scanner = ViolationScanner(window, reference)
+    result = scanner.feed(symbols)
+    result.update(scanner.finish())
+    return result
@@ -0,0 +1,189 @@
+"""Codificação Manchester (IEEE 802.3) e conversão texto ↔ binário
+
+A conversão é orientada a bytes e guiada por tabelas de 256 entradas
+pré-calculadas: cada byte é traduzido em uma única indexação NumPy, sem
+alocação por byte.
+"""
+import numpy as np
+
+from .frame import ManchesterFrame
+from .metrics import metrics
+
+# byte → 8 bits (MSB primeiro), uint8 de 0/1
+BYTE_BITS_TABLE = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1)
+# byte → 8 caracteres ASCII '0'/'1'
+BYTE_ASCII_TABLE = BYTE_BITS_TABLE + np.uint8(ord('0'))
+# byte → 16 símbolos Manchester (0 → 10, 1 → 01)
+BYTE_MANCHESTER_TABLE = np.empty((256, 16), dtype=np.uint8)
+BYTE_MANCHESTER_TABLE[:, 0::2] = 1 - BYTE_BITS_TABLE
+BYTE_MANCHESTER_TABLE[:, 1::2] = BYTE_BITS_TABLE
+# byte → palavra Manchester de 16 símbolos empacotada (uint16 big-endian)
+BYTE_MANCHESTER_WORDS = np.packbits(BYTE_MANCHESTER_TABLE, axis=1).view('>u2').ravel()
+# palavra de 16 símbolos → byte, ou -1 se houver par inválido
+MANCHESTER_WORD_BYTES = np.full(1 << 16, -1, dtype=np.int16)
+MANCHESTER_WORD_BYTES[BYTE_MANCHESTER_WORDS] = np.arange(256, dtype=np.int16)
+
+
+def _as_byte_array(data):
+    return np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data
+
+
+def bytes_to_bits(data):
+    """Converte bytes em array de bits 0/1 (8 por byte)"""
+    return BYTE_BITS_TABLE[_as_byte_array(data)].ravel()
+
+
+def bytes_to_binary(data):
+    """Converte bytes em string '0'/'1' (8 caracteres por byte)"""
+    return BYTE_ASCII_TABLE[_as_byte_array(data)].tobytes().decode('ascii')
+
+
+def bytes_to_manchester(data):
+    """Converte bytes em símbolos Manchester uint8 (16 por byte)"""
+    return BYTE_MANCHESTER_TABLE[_as_byte_array(data)].ravel()
+
+
+def binary_to_bytes(binary):
+    """Converte string '0'/'1' em bytes, ignorando um byte final incompleto"""
+    bits = np.frombuffer(binary.encode('ascii'), dtype=np.uint8) - np.uint8(ord('0'))
+    if (bits > 1).any():
+        raise ValueError("A string binária deve conter apenas '0' e '1'")
+    return np.packbits(bits[:bits.size // 8 * 8]).tobytes()
+
+
+class ManchesterEncoder:
+    """Classe para codificação Manchester baseada no manchester_test_v2.py
+
+    Os métodos de string/lista são uma camada de compatibilidade sobre o motor
+    NumPy (``encode_bits``, ``decode_symbols``, ``validate_symbols``), que opera
+    em lote sobre arrays ``uint8`` e produz exatamente os mesmos resultados.
+    Eles aceitam também ``ManchesterFrame`` e devolvem símbolos nesse formato.
+    """
+
+    # Códigos usados pelo motor NumPy para cada caractere da string binária
+    BIT_ZERO = 0
+    BIT_ONE = 1
+    BIT_IGNORED = 2
+
+    @staticmethod
+    def binary_to_codes(binary):
+        """Converte uma string binária em array uint8 (0, 1 ou BIT_IGNORED por caractere)"""
+        if isinstance(binary, (np.ndarray, ManchesterFrame)):
+            return np.asarray(binary, dtype=np.uint8)
+        if not isinstance(binary, str):
+            binary = ''.join(binary)
+        if binary.isascii():
+            chars = np.frombuffer(binary.encode('ascii'), dtype=np.uint8)
+        else:
+            # Um elemento por caractere, preservando os índices da string original
+            chars = np.frombuffer(binary.encode('utf-32-le'), dtype=np.uint32)
+        codes = np.full(chars.shape, ManchesterEncoder.BIT_IGNORED, dtype=np.uint8)
+        codes[chars == ord('0')] = ManchesterEncoder.BIT_ZERO
+        codes[chars == ord('1')] = ManchesterEncoder.BIT_ONE
+        return codes
+
+    @staticmethod
+    def bits_to_binary(bits):
+        """Converte um array de bits 0/1 em string '0'/'1'"""
+        return (np.asarray(bits, dtype=np.uint8) + ord('0')).tobytes().decode('ascii')
+
+    @staticmethod
+    def encode_bits(bits):
+        """Codifica um array de bits 0/1 em símbolos Manchester (uint8, 2 por bit)"""
+        bits = np.asarray(bits, dtype=np.uint8)
+        symbols = np.empty(bits.size * 2, dtype=np.uint8)
+        symbols[0::2] = 1 - bits  # 0 → 10
+        symbols[1::2] = bits      # 1 → 01
+        return symbols
+
+    @staticmethod
+    def decode_symbols(symbols):
+        """Decodifica símbolos Manchester em array de bits, descartando pares inválidos"""
+        symbols = np.asarray(symbols)
+        pairs = symbols[:symbols.size // 2 * 2].reshape(-1, 2)
+        first, second = pairs[:, 0], pairs[:, 1]
+        is_one = (first == 0) & (second == 1)
+        is_zero = (first == 1) & (second == 0)
+        return is_one[is_one | is_zero].astype(np.uint8)
+
+    @staticmethod
+    def validate_symbols(codes, symbols):
+        """Valida em lote os símbolos Manchester contra os códigos de bit"""
+        codes = np.asarray(codes, dtype=np.uint8)
+        symbols = np.asarray(symbols)
+        if symbols.size != codes.size * 2:
+            return {'valid': False, 'error': 'Comprimento incorreto'}
+
+        pairs = symbols.reshape(-1, 2)
+        first, second = pairs[:, 0], pairs[:, 1]
+        bad_zero = (codes == ManchesterEncoder.BIT_ZERO) & ~((first == 1) & (second == 0))
+        bad_one = (codes == ManchesterEncoder.BIT_ONE) & ~((first == 0) & (second == 1))
+        bad = bad_zero | bad_one
+        if not bad.any():
+            return {'valid': True}
+
+        # 'error' descreve o primeiro bit inválido; 'errors' traz os índices de todos
+        errors = np.flatnonzero(bad)
+        i = int(errors[0])
+        if bad_zero[i]:
+            return {'valid': False, 'error': f"Erro no bit {i}: '0' deve ser codificado como '10'", 'errors': errors}
+        return {'valid': False, 'error': f"Erro no bit {i}: '1' deve ser codificado como '01'", 'errors': errors}
+
+    @staticmethod
+    def encode_packed(data):
+        """Codifica bytes em símbolos Manchester empacotados (8 símbolos por byte)"""
+        data = _as_byte_array(data)
+        with metrics.stage('encode', data.size):
+            return BYTE_MANCHESTER_WORDS[data].tobytes()
+
+    @staticmethod
+    def encode_packed_into(data, out):
+        """Como ``encode_packed``, mas escreve os símbolos em ``out`` (buffer gravável); retorna o número de bytes"""
+        data = _as_byte_array(data)
+        with metrics.stage('encode', data.size):
+            # Tabela consultada direto no destino, sem array intermediário
+            words = np.frombuffer(out, dtype=BYTE_MANCHESTER_WORDS.dtype, count=data.size)
+            np.take(BYTE_MANCHESTER_WORDS, data, out=words, mode='clip')
+        return data.size * 2
+
+    @staticmethod
+    def decode_packed(packed, symbol_count=None):
+        """Decodifica símbolos Manchester empacotados de volta em bytes"""
+        packed = _as_byte_array(packed)
+        if (symbol_count is None or symbol_count == packed.size * 8) and packed.size % 2 == 0:
+            # Caminho rápido: uma palavra de 16 símbolos por byte, via tabela
+            decoded = MANCHESTER_WORD_BYTES[packed.view('>u2')]
+            if (decoded >= 0).all():
+                return decoded.astype(np.uint8).tobytes()
+        symbols = np.unpackbits(packed, count=symbol_count)
+        return np.packbits(ManchesterEncoder.decode_symbols(symbols)).tobytes()
+
+    @staticmethod
+    def encode_binary_to_manchester(binary):
+        """Codifica binário em Manchester - Padrão IEEE 802.3; retorna um ``ManchesterFrame``"""
+        with metrics.stage('encode', len(binary) // 8):
+            codes = ManchesterEncoder.binary_to_codes(binary)
+            bits = codes[codes != ManchesterEncoder.BIT_IGNORED]
+            return ManchesterFrame.from_symbols(ManchesterEncoder.encode_bits(bits))
+
+    @staticmethod
+    def decode_manchester_to_binary(manchester):
+        """Decodifica Manchester em binário"""
+        return ManchesterEncoder.bits_to_binary(ManchesterEncoder.decode_symbols(manchester))
+
+    @staticmethod
+    def validate_encoding(binary, manchester):
+        """Valida a codificação"""
+        return ManchesterEncoder.validate_symbols(ManchesterEncoder.binary_to_codes(binary), manchester)
+
+
+def text_to_binary(text):
+    """Converte texto (UTF-8) em string binária, 8 bits por byte"""
+    data = text.encode('utf-8')
+    with metrics.stage('binarize', len(data)):
+        return bytes_to_binary(data)
+
+
+def binary_to_text(binary):
+    """Converte string binária em texto (UTF-8), ignorando um byte final incompleto"""
+    return binary_to_bytes(binary).decode('utf-8', errors='replace')
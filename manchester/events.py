@@ -0,0 +1,101 @@
+"""Fila limitada de eventos entre as threads de rede e a interface gráfica
+
+Os produtores (servidor receptor, threads de socket) chamam ``put`` e a GUI
+drena a fila em lotes com ``drain`` a partir de um temporizador
+(``root.after``), em vez de agendar um callback por quadro. Eventos
+marcados com ``coalesce=True`` substituem o evento pendente do mesmo tipo
+(por exemplo, atualizações de status), de modo que uma rajada vira uma
+única atualização. O evento substituído vai para o fim da fila: o estado
+mais recente nunca é entregue antes de eventos que chegaram antes dele.
+"""
+import collections
+import itertools
+import threading
+
+
+class EventQueue:
+    """Fila limitada com política explícita para quando está cheia
+
+    - ``DROP_OLDEST``: descarta o evento pendente mais antigo (a GUI mostra
+      sempre os dados mais recentes);
+    - ``DROP_NEWEST``: rejeita o evento novo;
+    - ``BLOCK``: o produtor espera até ``block_timeout`` segundos por espaço
+      (contrapressão) e só então descarta o evento. Com o
+      ``AsyncReceiverServer`` a espera pausa a entrega de quadros, a fila do
+      servidor enche e a leitura dos sockets para.
+
+    Os contadores ``enqueued``, ``coalesced``, ``dropped``, ``blocked`` e
+    ``drained`` são acumulados desde a criação da fila.
+    """
+
+    DROP_OLDEST = 'drop_oldest'
+    DROP_NEWEST = 'drop_newest'
+    BLOCK = 'block'
+    POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+    def __init__(self, maxsize=256, policy=DROP_OLDEST, block_timeout=1.0):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Política desconhecida: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.block_timeout = block_timeout
+
+        self.enqueued = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.drained = 0
+
+        self._items = collections.OrderedDict()
+        self._ids = itertools.count()
+        self._not_full = threading.Condition()
+
+    def __len__(self):
+        with self._not_full:
+            return len(self._items)
+
+    def put(self, kind, payload=None, coalesce=False):
+        """Enfileira ``(kind, payload)``; retorna ``False`` se o evento foi descartado"""
+        key = kind if coalesce else next(self._ids)
+        with self._not_full:
+            if key in self._items:
+                self._items[key] = (kind, payload)
+                self._items.move_to_end(key)
+                self.coalesced += 1
+                return True
+            if len(self._items) >= self.maxsize:
+                if self.policy == self.DROP_OLDEST:
+                    self._items.popitem(last=False)
+                    self.dropped += 1
+                elif self.policy == self.DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                else:
+                    self.blocked += 1
+                    if not self._not_full.wait_for(lambda: len(self._items) < self.maxsize, self.block_timeout):
+                        self.dropped += 1
+                        return False
+            self._items[key] = (kind, payload)
+            self.enqueued += 1
+            return True
+
+    def drain(self, max_items=None):
+        """Remove e retorna até ``max_items`` eventos pendentes, em ordem de chegada"""
+        with self._not_full:
+            count = len(self._items) if max_items is None else min(max_items, len(self._items))
+            batch = [self._items.popitem(last=False)[1] for _ in range(count)]
+            self.drained += count
+            if count:
+                self._not_full.notify_all()
+        return batch
+
+    def stats(self):
+        with self._not_full:
+            return {
+                "pending": len(self._items),
+                "enqueued": self.enqueued,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+                "blocked": self.blocked,
+                "drained": self.drained,
+            }
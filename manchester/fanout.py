@@ -0,0 +1,141 @@
+"""Envio do mesmo quadro a vários receptores TCP (fan-out)
+
+``FanOutSender`` recebe quadros já criptografados e codificados (uma vez
+só, pelo ``SendPipeline`` ou por quem chama), acrescenta o prefixo de
+comprimento uma vez e coloca o mesmo objeto ``bytes`` na fila de cada
+receptor. Cada receptor tem um ``SenderPool`` de uma conexão, todos no
+mesmo laço asyncio: as escritas são concorrentes e o custo por receptor
+adicional é só a escrita no socket. Um receptor lento (ou fora do ar) enche
+apenas a própria fila limitada; a partir daí os quadros são descartados
+para ele, sem atrasar os demais.
+"""
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+from .protocol import LengthPrefixFramer
+from .transport import FrameSender, SenderPool
+
+
+def parse_targets(text, default_port):
+    """Converte ``"host[:porta], host[:porta], ..."`` em uma lista de ``(host, porta)``"""
+    targets = []
+    for item in text.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, sep, port = item.rpartition(':')
+        targets.append((host, int(port)) if sep else (item, default_port))
+    return targets
+
+
+class _Delivery:
+    """Future compartilhado pelas filas dos receptores de um quadro
+
+    Implementa a parte da interface de ``concurrent.futures.Future`` usada
+    pelo ``SenderPool``. O future do quadro é concluído na primeira escrita
+    em um socket (quem espera por ele acompanha o receptor mais rápido, não
+    o mais lento), ou com ``ConnectionError`` se o quadro foi descartado
+    para todos.
+    """
+
+    __slots__ = ('future', 'pending')
+
+    def __init__(self, future, count):
+        self.future = future
+        self.pending = count
+
+    def cancelled(self):
+        return self.future.cancelled()
+
+    def set_result(self, nbytes):
+        self.pending -= 1
+        if not self.future.done():
+            self.future.set_result(nbytes)
+
+    def cancel(self):
+        self.pending -= 1
+        if not self.pending and not self.future.done():
+            self.future.set_exception(ConnectionError("Quadro descartado para todos os receptores"))
+
+
+class FanOutSender(FrameSender):
+    """Remetente que entrega cada quadro a todos os ``targets`` (lista de ``(host, porta)``)
+
+    ``queue_size`` limita os quadros em espera por receptor; ``dropped[i]``
+    conta os descartados para ``targets[i]`` e ``pools[i].frames_sent`` os
+    escritos. ``frames_sent`` conta os quadros aceitos na fila de ao menos
+    um receptor e ``frames_dropped`` os descartados para todos. As demais
+    opções são repassadas aos ``SenderPool``.
+    """
+
+    def __init__(self, targets, queue_size=256, **options):
+        options.pop('size', None)
+        self.targets = list(targets)
+        self.pools = [SenderPool(host, port, size=1, queue_size=queue_size, **options) for host, port in self.targets]
+        self.dropped = [0] * len(self.pools)
+        self.frames_sent = 0
+        self.frames_dropped = 0
+
+        self.loop = None
+        self._thread = None
+
+    @property
+    def connected(self):
+        """Número de receptores com a conexão aberta"""
+        return sum(1 for pool in self.pools if pool.connected)
+
+    def start_in_thread(self):
+        """Inicia o laço de eventos compartilhado pelas conexões em uma thread própria"""
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.start(), self.loop).result()
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        for pool in self.pools:
+            await pool.start()
+
+    def wait_connected(self, timeout=None):
+        """Espera (até ``timeout`` no total) a conexão de todos os receptores; retorna ``True`` se ao menos um conectou"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for pool in self.pools:
+            pool.wait_connected(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return self.connected > 0
+
+    def submit(self, frame):
+        """Enfileira o quadro para todos os receptores sem bloquear (seguro entre threads)"""
+        future = concurrent.futures.Future()
+        # Uma única cópia com prefixo, compartilhada pelas filas de todas as conexões
+        data = LengthPrefixFramer.pack(frame)
+
+        def enqueue():
+            delivery = _Delivery(future, len(self.pools))
+            accepted = False
+            for index, pool in enumerate(self.pools):
+                try:
+                    pool.queue.put_nowait((data, delivery))
+                    accepted = True
+                except asyncio.QueueFull:
+                    self.dropped[index] += 1
+                    delivery.cancel()
+            if accepted:
+                self.frames_sent += 1
+            else:
+                self.frames_dropped += 1
+
+        self.loop.call_soon_threadsafe(enqueue)
+        return future
+
+    def stop_in_thread(self):
+        """Encerra as conexões e o laço iniciado com ``start_in_thread``"""
+        if self.loop and self._thread:
+            asyncio.run_coroutine_threadsafe(self.stop(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+
+    async def stop(self):
+        for pool in self.pools:
+            await pool.stop()
@@ -0,0 +1,218 @@
+"""Transmissão de arquivos com memória mapeada
+
+O remetente mapeia o arquivo com ``mmap`` e percorre janelas de tamanho
+fixo por fatias de ``memoryview``: cada janela é cifrada (AES-256-GCM, como
+em ``manchester.stream``) e codificada em Manchester em buffers
+pré-alocados e enviada ao socket. O receptor pré-aloca o arquivo de saída
+com o tamanho anunciado, mapeia-o e decifra cada bloco direto no
+mapeamento. Em nenhuma das pontas a memória residente depende do tamanho
+do arquivo::
+
+    MODE_FILE_START (nonce, tamanho, nome) → MODE_STREAM_DATA* → MODE_STREAM_END (tag)
+"""
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from .crypto import STREAM_NONCE_SIZE, StreamDecryptor, StreamEncryptor
+from .encoder import BYTE_MANCHESTER_WORDS
+from .linecode import MANCHESTER
+from .metrics import metrics
+from .protocol import LengthPrefixFramer, WireProtocol
+
+DEFAULT_WINDOW = 1 << 20
+FILE_SIZE = struct.Struct('!Q')
+MAX_NAME_ATTEMPTS = 1000
+
+
+def file_start_frame(nonce, size, name):
+    body = bytes(nonce) + FILE_SIZE.pack(size) + os.path.basename(name).encode('utf-8')
+    return WireProtocol.pack_frame(WireProtocol.MODE_FILE_START, body)
+
+
+def parse_file_start(payload):
+    """Retorna ``(nonce, tamanho, nome)`` do corpo de um quadro ``MODE_FILE_START``"""
+    payload = bytes(payload)
+    if len(payload) < STREAM_NONCE_SIZE + FILE_SIZE.size:
+        raise ValueError("Quadro de início de arquivo truncado")
+    nonce = payload[:STREAM_NONCE_SIZE]
+    (size,) = FILE_SIZE.unpack_from(payload, STREAM_NONCE_SIZE)
+    name = payload[STREAM_NONCE_SIZE + FILE_SIZE.size:].decode('utf-8', errors='replace')
+    return nonce, size, name
+
+
+def _release(mapping, start, stop):
+    """Devolve ao sistema as páginas já processadas de ``mapping[start:stop]``
+
+    As páginas continuam no cache de arquivos do kernel; sem isso elas
+    contariam como memória residente do processo até o fim da transferência.
+    """
+    start -= start % mmap.PAGESIZE
+    if hasattr(mmap, 'MADV_DONTNEED') and stop > start:
+        mapping.madvise(mmap.MADV_DONTNEED, start, stop - start)
+
+
+def _map_input(f):
+    size = os.fstat(f.fileno()).st_size
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+
+def send_file(sock, key, path, window=DEFAULT_WINDOW, progress=None):
+    """Envia ``path`` pelo socket como fluxo cifrado; retorna o número de bytes enviados
+
+    ``progress(sent, total)`` é chamado após cada janela.
+    """
+    prefix, header = LengthPrefixFramer.PREFIX, WireProtocol.HEADER
+    start = prefix.size + header.size
+    # Buffers reutilizados a cada janela: texto cifrado e quadro completo (prefixo + cabeçalho + símbolos)
+    ciphertext = bytearray(window)
+    frame = bytearray(start + window * 2)
+    words = np.frombuffer(frame, dtype='>u2', offset=start)
+
+    with open(path, 'rb') as f:
+        data = _map_input(f)
+        try:
+            total = len(data)
+            encryptor = StreamEncryptor(key)
+            sock.sendall(LengthPrefixFramer.pack(file_start_frame(encryptor.nonce, total, path)))
+            with memoryview(data) as view:
+                for offset in range(0, total, window):
+                    with view[offset:offset + window] as chunk:
+                        size = len(chunk)
+                        encryptor.update(chunk, output=memoryview(ciphertext)[:size])
+                    with metrics.stage('encode', size):
+                        np.take(BYTE_MANCHESTER_WORDS, np.frombuffer(ciphertext, dtype=np.uint8, count=size),
+                                out=words[:size])
+                    prefix.pack_into(frame, 0, header.size + size * 2)
+                    header.pack_into(frame, prefix.size, WireProtocol.MAGIC, WireProtocol.VERSION,
+                                     WireProtocol.MODE_STREAM_DATA, MANCHESTER.code_id, size * 16)
+                    with metrics.stage('send', start + size * 2):
+                        sock.sendall(memoryview(frame)[:start + size * 2])
+                    _release(data, offset, offset + size)
+                    if progress:
+                        progress(offset + size, total)
+            sock.sendall(LengthPrefixFramer.pack(
+                WireProtocol.pack_frame(WireProtocol.MODE_STREAM_END, encryptor.finalize())))
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+    return total
+
+
+class FileReceiver:
+    """Recebe um arquivo em um diretório, decifrando direto em um ``mmap`` de saída
+
+    ``feed`` segue o contrato de ``StreamReceiver``: retorna ``True`` quando o
+    arquivo está completo e com a tag verificada (o caminho fica em
+    ``path``). Se a verificação falhar, ou o fluxo trouxer mais ou menos
+    bytes que o anunciado, o arquivo parcial é removido e é lançado
+    ``ValueError``.
+
+    O arquivo é sempre criado do zero (``O_EXCL``): se já existir um com o
+    nome anunciado, o receptor usa ``nome (1).ext``, ``nome (2).ext``...,
+    e nunca sobrescreve nem remove arquivos que não criou.
+    """
+
+    def __init__(self, key, directory='.'):
+        self.key = key
+        self.directory = directory
+        self.path = None
+        self.size = 0
+        self.bytes_received = 0
+        self.decryptor = None
+        self._file = None
+        self._map = None
+        self._released = 0
+        self._created = False
+
+    def feed(self, received_data):
+        mode, payload = received_data["mode"], received_data["payload"]
+        if mode == WireProtocol.MODE_FILE_START:
+            self._close()
+            nonce, self.size, name = parse_file_start(payload)
+            self._open(name)
+            self.decryptor = StreamDecryptor(self.key, nonce)
+            self.bytes_received = 0
+            self._released = 0
+            return False
+        if self.decryptor is None:
+            raise ValueError("Quadro de arquivo recebido antes do início do arquivo")
+        try:
+            if mode == WireProtocol.MODE_STREAM_DATA:
+                end = self.bytes_received + len(payload)
+                if end > self.size:
+                    raise ValueError("O fluxo excede o tamanho anunciado do arquivo")
+                with memoryview(self._map) as view:
+                    self.decryptor.update(payload, output=view[self.bytes_received:end])
+                self.bytes_received = end
+                # Só páginas inteiras já escritas: o próximo bloco pode continuar a última
+                released = end - end % mmap.PAGESIZE
+                _release(self._map, self._released, released)
+                self._released = released
+                return False
+            if mode != WireProtocol.MODE_STREAM_END:
+                raise ValueError(f"Quadro inesperado no fluxo de arquivo: modo {mode}")
+            decryptor, self.decryptor = self.decryptor, None
+            decryptor.finalize(payload)
+            if self.bytes_received != self.size:
+                raise ValueError(f"Arquivo incompleto: {self.bytes_received} de {self.size} bytes")
+        except ValueError:
+            self.abort()
+            raise
+        self._close()
+        # Completo e verificado: o arquivo passa a ser do usuário
+        self._created = False
+        return True
+
+    @staticmethod
+    def _safe_name(name):
+        """Nome anunciado pelo remetente, reduzido ao último componente; ``ValueError`` se não servir"""
+        name = os.path.basename(name.replace('\\', '/'))
+        if name in ('', '.', '..') or '\0' in name:
+            raise ValueError(f"Nome de arquivo inválido: {name!r}")
+        return name
+
+    def _open(self, name):
+        """Cria o arquivo de saída com um nome ainda não usado no diretório"""
+        self.path = None
+        self._created = False
+        base, ext = os.path.splitext(self._safe_name(name))
+        for attempt in range(MAX_NAME_ATTEMPTS):
+            path = os.path.join(self.directory, f"{base} ({attempt}){ext}" if attempt else base + ext)
+            try:
+                self._file = open(path, 'x+b')
+            except FileExistsError:
+                continue
+            except OSError as e:
+                raise ValueError(f"Não foi possível criar {path}: {e}") from e
+            break
+        else:
+            raise ValueError(f"Nenhum nome livre para {base}{ext} em {self.directory}")
+        self.path = path
+        self._created = True
+        try:
+            self._file.truncate(self.size)
+            if self.size:
+                self._map = mmap.mmap(self._file.fileno(), self.size)
+        except OSError as e:
+            self.abort()
+            raise ValueError(f"Não foi possível alocar {path}: {e}") from e
+
+    def _close(self):
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def abort(self):
+        """Descarta o arquivo parcial (só se foi criado por este receptor)"""
+        self.decryptor = None
+        self._close()
+        if self._created:
+            self._created = False
+            os.remove(self.path)
@@ -0,0 +1,119 @@
+"""Contêiner compacto de símbolos de linha (ou bits)
+
+``ManchesterFrame`` guarda uma sequência de valores 0/1 empacotada, um bit
+por valor (MSB primeiro, como ``np.packbits``), no lugar das listas de
+``int`` (dezenas de bytes por símbolo) e das strings '0'/'1' (um byte por
+bit). Comporta-se como uma sequência imutável: ``len``, índice, iteração,
+igualdade e fatias contíguas sem cópia, que compartilham o mesmo buffer
+por ``memoryview`` com deslocamento em bits. ``np.asarray(frame)`` devolve
+os valores como ``uint8``, então o motor NumPy aceita o quadro diretamente.
+"""
+import numpy as np
+
+_ITER_CHUNK = 1 << 16
+
+
+class ManchesterFrame:
+    """Sequência de valores 0/1 empacotados em ``packed[start:start + count]`` (em bits)"""
+
+    __slots__ = ('_buffer', '_start', '_stop')
+
+    def __init__(self, packed=b'', count=None, start=0):
+        buffer = memoryview(packed).cast('B').toreadonly()
+        if count is None:
+            count = len(buffer) * 8 - start
+        if start < 0 or count < 0 or start + count > len(buffer) * 8:
+            raise ValueError("Intervalo de bits fora do buffer empacotado")
+        # Guarda só os bytes que contêm o intervalo
+        self._buffer = buffer[start >> 3:(start + count + 7) >> 3]
+        self._start = start & 7
+        self._stop = self._start + count
+
+    @classmethod
+    def from_symbols(cls, symbols):
+        """Empacota uma sequência de valores 0/1 (lista, array ou outro quadro)"""
+        if isinstance(symbols, ManchesterFrame):
+            return symbols
+        symbols = np.asarray(symbols, dtype=np.uint8)
+        return cls(np.packbits(symbols), symbols.size)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Bits de ``data`` (8 por byte), sem cópia"""
+        return cls(data, len(data) * 8)
+
+    @classmethod
+    def from_binary(cls, binary):
+        """Converte uma string '0'/'1'; outros caracteres são ignorados, como em ``binary_to_codes``"""
+        chars = np.frombuffer(binary.encode('ascii', 'ignore'), dtype=np.uint8)
+        bits = chars - np.uint8(ord('0'))
+        return cls.from_symbols(bits[bits <= 1])
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return ManchesterFrame.from_symbols(self.to_array()[index])
+            return ManchesterFrame(self._buffer, max(0, stop - start), self._start + start)
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("Índice de símbolo fora do quadro")
+        i = self._start + index
+        return (self._buffer[i >> 3] >> (7 - (i & 7))) & 1
+
+    def __iter__(self):
+        for offset in range(0, len(self), _ITER_CHUNK):
+            yield from self[offset:offset + _ITER_CHUNK].to_array().tolist()
+
+    def __eq__(self, other):
+        if isinstance(other, ManchesterFrame):
+            return len(self) == len(other) and self.packed == other.packed
+        if isinstance(other, (list, tuple, np.ndarray)):
+            return len(self) == len(other) and np.array_equal(self.to_array(), np.asarray(other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __array__(self, dtype=None, copy=None):
+        values = self.to_array()
+        return values if dtype is None else values.astype(dtype, copy=False)
+
+    def __reduce__(self):
+        return ManchesterFrame, (self.tobytes(), len(self))
+
+    def __repr__(self):
+        preview = self[:32].to_binary() + ('…' if len(self) > 32 else '')
+        return f"ManchesterFrame({len(self)} símbolos: {preview})"
+
+    @property
+    def packed(self):
+        """Valores empacotados, 8 por byte, com o último byte completado com zeros
+
+        Sem cópia quando o quadro começa e termina em fronteira de byte.
+        """
+        if not self._start and not self._stop & 7:
+            return self._buffer
+        return memoryview(np.packbits(self.to_array()))
+
+    @property
+    def nbytes(self):
+        return len(self._buffer)
+
+    def to_array(self):
+        """Valores como array ``uint8`` de 0/1 (um byte por símbolo)"""
+        return np.unpackbits(np.frombuffer(self._buffer, dtype=np.uint8))[self._start:self._stop]
+
+    def tolist(self):
+        return self.to_array().tolist()
+
+    def tobytes(self):
+        return bytes(self.packed)
+
+    def to_binary(self):
+        """String '0'/'1', um caractere por símbolo"""
+        return (self.to_array() + np.uint8(ord('0'))).tobytes().decode('ascii')
@@ -0,0 +1,461 @@
+"""Registro de códigos de linha: Manchester, Manchester Diferencial, NRZI e 4B/5B + NRZI
+
+Todos os códigos expõem a mesma interface vetorizada de
+``ManchesterEncoder`` (``encode_bits``, ``decode_symbols``,
+``validate_symbols``, ``encode_packed``, ``decode_packed`` e as variantes
+com string binária) e são identificados por um número de um byte gravado
+no cabeçalho do quadro, de modo que o receptor decodifica cada quadro com
+o código escolhido pelo remetente. ``code_id`` 0 é Manchester, o que
+mantém compatíveis os quadros anteriores ao registro (byte reservado 0).
+
+Os códigos com estado (Manchester Diferencial e NRZI) partem do nível
+baixo; os símbolos são níveis 0/1, como em Manchester::
+
+    código              símbolos por bit
+    Manchester          2
+    Manchester Dif.     2
+    NRZI                1
+    4B/5B + NRZI        1,25
+"""
+import numpy as np
+
+from .encoder import (BYTE_BITS_TABLE, BYTE_MANCHESTER_WORDS, MANCHESTER_WORD_BYTES, ManchesterEncoder,
+                      bytes_to_bits, bytes_to_manchester)
+from .frame import ManchesterFrame
+from .metrics import metrics
+
+# Grupos de código 4B/5B (FDDI / 100BASE-TX) para os nibbles 0-F
+NIBBLE_4B5B = np.array([0b11110, 0b01001, 0b10100, 0b10101, 0b01010, 0b01011, 0b01110, 0b01111,
+                        0b10010, 0b10011, 0b10110, 0b10111, 0b11010, 0b11011, 0b11100, 0b11101], dtype=np.uint8)
+# nibble → 5 bits de código (MSB primeiro)
+NIBBLE_4B5B_BITS = np.unpackbits(NIBBLE_4B5B[:, None], axis=1)[:, 3:]
+# grupo de 5 bits → nibble, ou -1 para grupos de controle/inválidos
+CODE_5B_NIBBLES = np.full(32, -1, dtype=np.int8)
+CODE_5B_NIBBLES[NIBBLE_4B5B] = np.arange(16, dtype=np.int8)
+# byte → palavra de 10 bits de código (dois grupos de 5, nibble alto primeiro)
+BYTE_4B5B_CODES = (NIBBLE_4B5B[np.arange(256) >> 4].astype(np.uint64) << np.uint64(5)) | NIBBLE_4B5B[np.arange(256) & 15]
+# palavra de 10 bits de código → byte, ou -1
+CODE_10B_BYTES = np.full(1 << 10, -1, dtype=np.int16)
+CODE_10B_BYTES[BYTE_4B5B_CODES] = np.arange(256, dtype=np.int16)
+# palavra de 10 bits de código → byte, com grupos inválidos lidos como o nibble 0 (``decode_hard``)
+_HARD_5B_NIBBLES = np.maximum(CODE_5B_NIBBLES, 0).astype(np.uint8)
+CODE_10B_BYTES_HARD = ((_HARD_5B_NIBBLES[np.arange(1 << 10) >> 5] << 4) | _HARD_5B_NIBBLES[np.arange(1 << 10) & 31])
+# byte de símbolos → nibble com o 1º (par) ou o 2º (ímpar) símbolo de cada um dos seus 4 pares
+BYTE_FIRST_SYMBOLS = np.packbits(BYTE_BITS_TABLE[:, 0::2], axis=1).ravel() >> 4
+BYTE_SECOND_SYMBOLS = np.packbits(BYTE_BITS_TABLE[:, 1::2], axis=1).ravel() >> 4
+# byte → XOR acumulado dos seus bits (MSB primeiro), empacotado; o último bit é a paridade do byte
+BYTE_PREFIX_XOR = np.packbits(np.cumsum(BYTE_BITS_TABLE, axis=1) & 1, axis=1).ravel()
+_WEIGHTS_5 = 1 << np.arange(4, -1, -1)
+# 4 palavras de 10 bits ↔ 5 bytes (40 bits) dentro de um uint64
+_SHIFTS_10 = np.arange(30, -1, -10, dtype=np.uint64)
+
+
+def _parity(bits):
+    """XOR acumulado (paridade prefixada) de um array 0/1"""
+    # cumsum em uint8 estoura módulo 256, o que preserva a paridade
+    return np.cumsum(bits, dtype=np.uint8) & np.uint8(1)
+
+
+def nrzi_encode(bits, initial=0):
+    """NRZI: 1 inverte o nível, 0 o mantém"""
+    levels = _parity(np.asarray(bits, dtype=np.uint8))
+    return levels ^ np.uint8(initial) if initial else levels
+
+
+def nrzi_decode(levels, initial=0):
+    levels = np.asarray(levels, dtype=np.uint8)
+    previous = np.empty_like(levels)
+    previous[:1] = initial
+    previous[1:] = levels[:-1]
+    return levels ^ previous
+
+
+def nrzi_encode_packed(packed, initial=0):
+    """``nrzi_encode`` sobre bits empacotados: tabela por byte e paridade acumulada por byte"""
+    prefix = BYTE_PREFIX_XOR[packed]
+    carry = np.empty_like(prefix)
+    carry[:1] = initial
+    carry[1:] = _parity(prefix[:-1] & np.uint8(1)) ^ np.uint8(initial)
+    return prefix ^ (carry * np.uint8(0xFF))
+
+
+def nrzi_decode_packed(packed, initial=0):
+    """``nrzi_decode`` sobre bits empacotados: cada bit XOR o anterior, inclusive entre bytes"""
+    previous = np.empty_like(packed)
+    previous[:1] = initial
+    previous[1:] = packed[:-1] & np.uint8(1)
+    return packed ^ ((packed >> np.uint8(1)) | (previous << np.uint8(7)))
+
+
+def _as_byte_array(data):
+    return np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data
+
+
+class LineCode:
+    """Base dos códigos de linha
+
+    Cada bloco de ``block_bits`` bits vira ``block_symbols`` símbolos. As
+    subclasses implementam ``encode_bits`` e ``decode_symbols`` (que
+    descarta blocos inválidos, como ``ManchesterEncoder.decode_symbols``);
+    o restante da interface é derivado delas.
+
+    ``differential`` indica que o sinal depende do histórico só pelo nível
+    inicial: codificar a partir do nível 1 é codificar a partir do 0 e
+    inverter todos os símbolos (vale para os códigos baseados em NRZI).
+    """
+
+    code_id = None
+    name = None
+    label = None
+    block_bits = 1
+    block_symbols = 1
+    differential = False
+    rules = ''
+
+    @property
+    def symbols_per_bit(self):
+        return self.block_symbols / self.block_bits
+
+    def symbol_count(self, nbytes):
+        """Número de símbolos para ``nbytes`` bytes"""
+        return nbytes * 8 * self.block_symbols // self.block_bits
+
+    def encode_bits(self, bits):
+        raise NotImplementedError
+
+    def decode_symbols(self, symbols):
+        raise NotImplementedError
+
+    def decode_hard(self, symbols):
+        """Como ``decode_symbols``, mas sem descartar blocos inválidos
+
+        Cada bloco vira sempre ``block_bits`` bits (o palpite mais provável
+        para os inválidos), mantendo a posição dos bits seguintes, como
+        precisa a correção de erros de ``manchester.fec``.
+        """
+        return self.decode_symbols(symbols)
+
+    def encode_bytes(self, data):
+        """Converte bytes em símbolos uint8"""
+        return self.encode_bits(bytes_to_bits(data))
+
+    def validate_symbols(self, codes, symbols):
+        """Valida em lote os símbolos contra os códigos de bit (mesmo formato de ``ManchesterEncoder``)"""
+        codes = np.asarray(codes, dtype=np.uint8)
+        bits = codes[codes != ManchesterEncoder.BIT_IGNORED]
+        symbols = np.asarray(symbols, dtype=np.uint8)
+        if bits.size % self.block_bits or symbols.size != bits.size * self.block_symbols // self.block_bits:
+            return {'valid': False, 'error': 'Comprimento incorreto'}
+        wrong = np.flatnonzero(self.encode_bits(bits) != symbols)
+        if not wrong.size:
+            return {'valid': True}
+        # Índice do primeiro bit de cada bloco com símbolo divergente
+        errors = np.unique(wrong // self.block_symbols) * self.block_bits
+        i = int(errors[0])
+        return {'valid': False, 'error': f"Erro no bit {i}: símbolos diferentes da codificação {self.label}",
+                'errors': errors}
+
+    def encode_packed(self, data):
+        """Codifica bytes em símbolos empacotados (8 por byte)"""
+        data = _as_byte_array(data)
+        with metrics.stage('encode', data.size):
+            return np.packbits(self.encode_bytes(data)).tobytes()
+
+    def encode_packed_into(self, data, out):
+        """Como ``encode_packed``, mas escreve os símbolos em ``out`` (buffer gravável); retorna o número de bytes"""
+        packed = self.encode_packed(data)
+        out[:len(packed)] = packed
+        return len(packed)
+
+    def decode_packed(self, packed, symbol_count=None):
+        """Decodifica símbolos empacotados de volta em bytes"""
+        packed = _as_byte_array(packed)
+        symbols = np.unpackbits(packed, count=symbol_count)
+        return np.packbits(self.decode_symbols(symbols)).tobytes()
+
+    def decode_packed_hard(self, packed, symbol_count=None):
+        """``decode_packed`` com a semântica de ``decode_hard``"""
+        packed = _as_byte_array(packed)
+        return np.packbits(self.decode_hard(np.unpackbits(packed, count=symbol_count))).tobytes()
+
+    def encode_frame(self, data):
+        """Codifica bytes em um ``ManchesterFrame`` (1 bit por símbolo)"""
+        return ManchesterFrame(self.encode_packed(data), self.symbol_count(len(data)))
+
+    def encode_binary(self, binary):
+        """Codifica uma string binária (ou ``ManchesterFrame`` de bits); retorna um ``ManchesterFrame``"""
+        with metrics.stage('encode', len(binary) // 8):
+            codes = ManchesterEncoder.binary_to_codes(binary)
+            return ManchesterFrame.from_symbols(self.encode_bits(codes[codes != ManchesterEncoder.BIT_IGNORED]))
+
+    def decode_binary(self, symbols):
+        """Decodifica símbolos em string binária"""
+        return ManchesterEncoder.bits_to_binary(self.decode_symbols(symbols))
+
+    def validate_encoding(self, binary, symbols):
+        return self.validate_symbols(ManchesterEncoder.binary_to_codes(binary), symbols)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name!r} id={self.code_id}>"
+
+
+class ManchesterCode(LineCode):
+    """Manchester (IEEE 802.3) sobre o motor de tabelas de ``ManchesterEncoder``"""
+
+    code_id = 0
+    name = 'manchester'
+    label = 'Manchester'
+    block_symbols = 2
+    rules = 'Regras Manchester:\n0 → 10 (Alto→Baixo) ↓\n1 → 01 (Baixo→Alto) ↑'
+
+    def encode_bits(self, bits):
+        return ManchesterEncoder.encode_bits(bits)
+
+    def decode_symbols(self, symbols):
+        return ManchesterEncoder.decode_symbols(symbols)
+
+    def decode_hard(self, symbols):
+        # 01 → 1 e 10 → 0: o bit é o 2º símbolo; em 00/11 é um palpite
+        symbols = np.asarray(symbols, dtype=np.uint8)
+        return symbols[1:symbols.size // 2 * 2:2].copy()
+
+    def encode_bytes(self, data):
+        return bytes_to_manchester(data)
+
+    def validate_symbols(self, codes, symbols):
+        return ManchesterEncoder.validate_symbols(codes, symbols)
+
+    def encode_packed(self, data):
+        return ManchesterEncoder.encode_packed(data)
+
+    def encode_packed_into(self, data, out):
+        return ManchesterEncoder.encode_packed_into(data, out)
+
+    def decode_packed(self, packed, symbol_count=None):
+        return ManchesterEncoder.decode_packed(packed, symbol_count)
+
+    def decode_packed_hard(self, packed, symbol_count=None):
+        packed = _as_byte_array(packed)
+        if (symbol_count is None or symbol_count == packed.size * 8) and packed.size % 2 == 0:
+            pairs = packed.reshape(-1, 2)
+            return ((BYTE_SECOND_SYMBOLS[pairs[:, 0]] << 4) | BYTE_SECOND_SYMBOLS[pairs[:, 1]]).tobytes()
+        return super().decode_packed_hard(packed, symbol_count)
+
+
+class DifferentialManchesterCode(LineCode):
+    """Manchester Diferencial (IEEE 802.5): transição no meio de todo bit; 0 também inverte no início"""
+
+    code_id = 1
+    name = 'diff-manchester'
+    label = 'Manchester Diferencial'
+    block_symbols = 2
+    differential = True
+    rules = 'Regras Manchester Diferencial:\nsempre inverte no meio do bit\n0 → inverte no início\n1 → mantém no início'
+
+    # A 1ª metade de cada bit é a 2ª metade anterior, invertida se o bit for 0.
+    # Com nível inicial 0 a 2ª metade é o XOR acumulado dos bits, ou seja, o
+    # sinal é Manchester aplicado à saída NRZI: as duas tabelas são reusadas.
+
+    def encode_bits(self, bits):
+        return ManchesterEncoder.encode_bits(nrzi_encode(bits))
+
+    def encode_packed(self, data):
+        data = _as_byte_array(data)
+        with metrics.stage('encode', data.size):
+            return BYTE_MANCHESTER_WORDS[nrzi_encode_packed(data)].tobytes()
+
+    @staticmethod
+    def _pair_bits(symbols):
+        """Bit de cada par (sem transição no início → 1) e a máscara dos pares válidos"""
+        symbols = np.asarray(symbols, dtype=np.uint8)
+        pairs = symbols[:symbols.size // 2 * 2].reshape(-1, 2)
+        first, second = pairs[:, 0], pairs[:, 1]
+        previous = np.empty_like(second)
+        previous[:1] = 0
+        previous[1:] = second[:-1]
+        return (first == previous).astype(np.uint8), first != second
+
+    def decode_symbols(self, symbols):
+        bits, valid = self._pair_bits(symbols)
+        return bits[valid]
+
+    def decode_hard(self, symbols):
+        return self._pair_bits(symbols)[0]
+
+    def decode_packed_hard(self, packed, symbol_count=None):
+        packed = _as_byte_array(packed)
+        if (symbol_count is None or symbol_count == packed.size * 8) and packed.size % 2 == 0:
+            pairs = packed.reshape(-1, 2)
+            first = (BYTE_FIRST_SYMBOLS[pairs[:, 0]] << 4) | BYTE_FIRST_SYMBOLS[pairs[:, 1]]
+            second = (BYTE_SECOND_SYMBOLS[pairs[:, 0]] << 4) | BYTE_SECOND_SYMBOLS[pairs[:, 1]]
+            # 2ª metade do par anterior, inclusive entre bytes
+            previous = second >> np.uint8(1)
+            previous[1:] |= (second[:-1] & np.uint8(1)) << np.uint8(7)
+            return (~(first ^ previous)).tobytes()
+        return super().decode_packed_hard(packed, symbol_count)
+
+    def decode_packed(self, packed, symbol_count=None):
+        packed = _as_byte_array(packed)
+        if (symbol_count is None or symbol_count == packed.size * 8) and packed.size % 2 == 0:
+            levels = MANCHESTER_WORD_BYTES[packed.view('>u2')]
+            if (levels >= 0).all():
+                return nrzi_decode_packed(levels.astype(np.uint8)).tobytes()
+        return super().decode_packed(packed, symbol_count)
+
+
+class NrziCode(LineCode):
+    """NRZI: um símbolo por bit, 1 é uma transição"""
+
+    code_id = 2
+    name = 'nrzi'
+    label = 'NRZI'
+    differential = True
+    rules = 'Regras NRZI:\n1 → inverte o nível\n0 → mantém o nível'
+
+    def encode_bits(self, bits):
+        return nrzi_encode(bits)
+
+    def decode_symbols(self, symbols):
+        return nrzi_decode(symbols)
+
+    def encode_packed(self, data):
+        data = _as_byte_array(data)
+        with metrics.stage('encode', data.size):
+            return nrzi_encode_packed(data).tobytes()
+
+    def decode_packed(self, packed, symbol_count=None):
+        packed = _as_byte_array(packed)
+        if symbol_count is None or symbol_count == packed.size * 8:
+            return nrzi_decode_packed(packed).tobytes()
+        return super().decode_packed(packed, symbol_count)
+
+    def decode_packed_hard(self, packed, symbol_count=None):
+        # NRZI não tem símbolos inválidos
+        return self.decode_packed(packed, symbol_count)
+
+
+class FourBFiveBCode(LineCode):
+    """4B/5B seguido de NRZI: cada nibble vira um grupo de 5 símbolos (sobrecarga de 1,25×)
+
+    Os grupos de código garantem no máximo três zeros seguidos, o que mantém
+    transições suficientes para a recuperação de relógio com NRZI.
+    """
+
+    code_id = 3
+    name = '4b5b-nrzi'
+    label = '4B/5B + NRZI'
+    block_bits = 4
+    block_symbols = 5
+    differential = True
+    rules = 'Regras 4B/5B + NRZI:\nnibble → grupo de 5 bits\n1 → inverte o nível\n0 → mantém o nível'
+
+    def encode_bits(self, bits):
+        bits = np.asarray(bits, dtype=np.uint8)
+        if bits.size % 4:
+            raise ValueError("4B/5B exige um número de bits múltiplo de 4")
+        nibbles = bits.reshape(-1, 4) @ np.array([8, 4, 2, 1], dtype=np.uint8)
+        return nrzi_encode(NIBBLE_4B5B_BITS[nibbles].ravel())
+
+    def decode_symbols(self, symbols):
+        code_bits = nrzi_decode(symbols)
+        groups = code_bits[:code_bits.size // 5 * 5].reshape(-1, 5) @ _WEIGHTS_5
+        nibbles = CODE_5B_NIBBLES[groups]
+        return BYTE_BITS_TABLE[nibbles[nibbles >= 0].astype(np.uint8), 4:].ravel()
+
+    def decode_hard(self, symbols):
+        code_bits = nrzi_decode(symbols)
+        groups = code_bits[:code_bits.size // 5 * 5].reshape(-1, 5) @ _WEIGHTS_5
+        # Grupo inválido vira o nibble 0
+        nibbles = np.maximum(CODE_5B_NIBBLES[groups], 0).astype(np.uint8)
+        return BYTE_BITS_TABLE[nibbles, 4:].ravel()
+
+    def encode_bytes(self, data):
+        packed = self._pack_codes(_as_byte_array(data))
+        return np.unpackbits(nrzi_encode_packed(packed), count=self.symbol_count(len(data)))
+
+    def encode_packed(self, data):
+        data = _as_byte_array(data)
+        with metrics.stage('encode', data.size):
+            return nrzi_encode_packed(self._pack_codes(data)).tobytes()
+
+    def decode_packed(self, packed, symbol_count=None):
+        packed = _as_byte_array(packed)
+        if self._whole_bytes(packed, symbol_count):
+            decoded = CODE_10B_BYTES[self._code_words(packed, symbol_count)]
+            if (decoded >= 0).all():
+                return decoded.astype(np.uint8).tobytes()
+        return super().decode_packed(packed, symbol_count)
+
+    def decode_packed_hard(self, packed, symbol_count=None):
+        packed = _as_byte_array(packed)
+        if self._whole_bytes(packed, symbol_count):
+            return CODE_10B_BYTES_HARD[self._code_words(packed, symbol_count)].tobytes()
+        return super().decode_packed_hard(packed, symbol_count)
+
+    @staticmethod
+    def _whole_bytes(packed, symbol_count):
+        return symbol_count is not None and symbol_count % 10 == 0 and packed.size == -(-symbol_count // 8)
+
+    @staticmethod
+    def _code_words(packed, symbol_count):
+        """Palavras de 10 bits de código (uma por byte) após desfazer o NRZI"""
+        # Caminho rápido: cada 5 bytes de código trazem 4 palavras de 10 bits
+        code = np.zeros(-(-packed.size // 5) * 5, dtype=np.uint8)
+        code[:packed.size] = nrzi_decode_packed(packed)
+        # Os 5 bytes ocupam os 5 bytes baixos de um uint64 big-endian
+        groups = np.zeros((code.size // 5, 8), dtype=np.uint8)
+        groups[:, 3:] = code.reshape(-1, 5)
+        words = groups.view('>u8').ravel()
+        fields = np.empty((words.size, 4), dtype=np.uint16)
+        for i, shift in enumerate(_SHIFTS_10):
+            fields[:, i] = (words >> shift) & np.uint64(1023)
+        return fields.ravel()[:symbol_count // 10]
+
+    @staticmethod
+    def _pack_codes(data):
+        """Palavras de 10 bits de cada byte, concatenadas e empacotadas (antes do NRZI)"""
+        codes = np.zeros((-(-data.size // 4), 4), dtype=np.uint64)
+        codes.reshape(-1)[:data.size] = BYTE_4B5B_CODES[data]
+        words = codes[:, 0] << _SHIFTS_10[0]
+        for i in range(1, 4):
+            words |= codes[:, i] << _SHIFTS_10[i]
+        # Os 5 bytes baixos de cada palavra big-endian são os 40 bits de código
+        packed = words.astype('>u8').view(np.uint8).reshape(-1, 8)[:, 3:].ravel()
+        return packed[:-(-data.size * 10 // 8)]
+
+
+MANCHESTER = ManchesterCode()
+LINE_CODES = {}
+
+
+def register_line_code(code):
+    """Registra um código de linha; ``code_id`` deve caber em um byte e ser único"""
+    if not 0 <= code.code_id <= 255:
+        raise ValueError(f"Identificador de código de linha fora de 0-255: {code.code_id}")
+    if LINE_CODES.get(code.code_id, code) is not code:
+        raise ValueError(f"Identificador de código de linha já registrado: {code.code_id}")
+    LINE_CODES[code.code_id] = code
+    return code
+
+
+def get_line_code(code):
+    """Código de linha por identificador, nome ou instância (``None`` é Manchester)"""
+    if code is None:
+        return MANCHESTER
+    if isinstance(code, LineCode):
+        return code
+    if isinstance(code, str):
+        for candidate in LINE_CODES.values():
+            if candidate.name == code:
+                return candidate
+    elif code in LINE_CODES:
+        return LINE_CODES[code]
+    raise ValueError(f"Código de linha desconhecido: {code}")
+
+
+def line_code_names():
+    return [code.name for code in sorted(LINE_CODES.values(), key=lambda code: code.code_id)]
+
+
+for _code in (MANCHESTER, DifferentialManchesterCode(), NrziCode(), FourBFiveBCode()):
+    register_line_code(_code)
@@ -0,0 +1,312 @@
+"""Gerador de carga sem interface gráfica
+
+Dispara ``senders`` remetentes simulados (uma thread e um ``FrameSender``
+cada) contra um receptor, com mensagens de ``size`` bytes e taxa total
+``rate`` (mensagens/s). O envio é em laço aberto: a mensagem ``k`` de cada
+remetente tem um horário agendado e a latência é medida a partir dele até
+o receptor decifrá-la, então atrasos do próprio remetente também contam
+(sem omissão coordenada). Com ``LoopbackTransport`` (o padrão) tudo roda
+no mesmo processo, sem rede; com ``--transport tcp`` o receptor escuta em
+um socket real. Uma varredura de taxas (``--rates``) aponta o ponto de
+saturação: a primeira taxa em que a vazão obtida fica abaixo de
+``threshold`` da oferecida ou em que há quadros descartados::
+
+    python -m manchester load --senders 8 --size 1K --rates 500,1000,2000,4000
+
+Com ``--transport multicast`` os remetentes enviam a um grupo UDP
+multicast (``--host``, padrão ``239.255.12.49``) e quadros perdidos
+aparecem em ``lost``. Com ``--transport shm`` remetentes e receptor trocam
+quadros por anéis em memória compartilhada (``manchester.shm``): os
+símbolos são codificados direto no anel e decodificados de lá, o que mede
+a vazão máxima local sem a pilha TCP. Com ``--reliable`` (só TCP) cada remetente é um ``ReliableSender``: o
+receptor decifra antes de confirmar, a mensagem só conta como entregue
+após o ACK e ``--window`` limita os quadros em trânsito por remetente.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+
+import numpy as np
+
+from .bench import parse_size
+from .crypto import decrypt_aes_256, encrypt_aes_256, generate_key
+from .loopback import LoopbackTransport
+from .multicast import DEFAULT_GROUP, MulticastTransport
+from .protocol import WireProtocol
+from .reliable import decrypt_verifier
+from .shm import ShmTransport
+from .transport import TcpTransport
+
+DEFAULT_PORT = 12350
+TRANSPORTS = {'loopback': LoopbackTransport, 'tcp': TcpTransport, 'multicast': MulticastTransport,
+              'shm': ShmTransport}
+MODES = {'symbols': WireProtocol.MODE_SYMBOLS, 'ciphertext': WireProtocol.MODE_CIPHERTEXT}
+
+
+def make_message(sender, seq, scheduled_ns, size):
+    """Cabeçalho ``remetente:seq:agendado:`` completado com ``x`` até ``size`` bytes"""
+    header = f"{sender}:{seq}:{scheduled_ns}:"
+    return header + 'x' * (size - len(header))
+
+
+class LoadReceiver:
+    """Consumidor que decifra cada mensagem e registra a latência desde o horário agendado"""
+
+    def __init__(self, key):
+        self.key = key
+        self.latencies = []
+        self.received = 0
+        self.bytes = 0
+        self.errors = 0
+        self.last_ns = None
+        self._lock = threading.Lock()
+
+    def __call__(self, received_data, peer):
+        now = time.perf_counter_ns()
+        try:
+            # Com --reliable o receptor já decifrou a mensagem antes do ACK
+            message = received_data.get("decrypted") or decrypt_aes_256(self.key, received_data["encrypted"])
+            scheduled_ns = int(message.split(':', 3)[2])
+        except (KeyError, ValueError, IndexError):
+            self.errors += 1
+            return
+        with self._lock:
+            self.latencies.append(now - scheduled_ns)
+            self.received += 1
+            self.bytes += len(message)
+            self.last_ns = now
+
+
+class _SimulatedSender(threading.Thread):
+    def __init__(self, index, sender, key, size, interval_ns, start_ns, stop_ns, mode):
+        super().__init__(daemon=True)
+        self.index = index
+        self.sender = sender
+        self.key = key
+        self.size = size
+        self.interval_ns = interval_ns
+        self.start_ns = start_ns
+        self.stop_ns = stop_ns
+        self.mode = mode
+        self.submitted = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def _done(self, future):
+        if future.exception() is not None:
+            with self._lock:
+                self.dropped += 1
+
+    def run(self):
+        seq = 0
+        while True:
+            scheduled = self.start_ns + seq * self.interval_ns
+            now = time.perf_counter_ns()
+            if scheduled >= self.stop_ns or now >= self.stop_ns:
+                break
+            if scheduled > now:
+                time.sleep((scheduled - now) / 1e9)
+            message = make_message(self.index, seq, scheduled if self.interval_ns else time.perf_counter_ns(),
+                                   self.size)
+            # O remetente monta o quadro (no transporte shm, direto no anel)
+            self.sender.submit_encrypted(encrypt_aes_256(self.key, message), self.mode).add_done_callback(self._done)
+            self.submitted += 1
+            seq += 1
+
+
+def _queue_depth(endpoint):
+    """Quadros na fila do receptor ou do remetente (``SenderPool``); 0 se não houver fila"""
+    queue = getattr(endpoint, 'queue', None)
+    return queue.qsize() if queue is not None else 0
+
+
+def run_load(transport=None, senders=4, size=1024, rate=1000.0, duration=5.0, mode='symbols',
+             host='127.0.0.1', port=DEFAULT_PORT, queue_size=1024, drain_timeout=5.0, sample_interval=0.01,
+             reliable=False, window=64):
+    """Executa uma rodada de carga; retorna um dicionário serializável com o resultado
+
+    ``rate`` é a taxa total oferecida (dividida igualmente entre os
+    remetentes); ``rate=0`` envia o mais rápido possível. Com ``reliable``
+    os remetentes esperam o ACK do receptor, com até ``window`` quadros em
+    trânsito cada.
+    """
+    transport = transport or LoopbackTransport()
+    if reliable and not isinstance(transport, TcpTransport):
+        raise ValueError("A entrega confirmada (--reliable) só existe no transporte TCP")
+    key = generate_key()
+    sink = LoadReceiver(key)
+    receiver_options = dict(verify=decrypt_verifier(key)) if reliable else {}
+    sender_options = dict(reliable=True, window=window) if reliable else {}
+    receiver = transport.receiver(sink, host, port, queue_size=queue_size, **receiver_options)
+    receiver.start_in_thread()
+    pool = []
+    try:
+        for _ in range(senders):
+            sender = transport.sender(host, port, **sender_options)
+            sender.start_in_thread()
+            if not sender.wait_connected(5.0):
+                raise ConnectionError(f"Receptor {host}:{port} inacessível")
+            pool.append(sender)
+
+        interval_ns = int(senders * 1e9 / rate) if rate else 0
+        start_ns = time.perf_counter_ns() + 10_000_000
+        stop_ns = start_ns + int(duration * 1e9)
+        threads = [_SimulatedSender(i, sender, key, size, interval_ns,
+                                    # Remetentes defasados para não chegarem todos no mesmo instante
+                                    start_ns + i * interval_ns // senders, stop_ns, MODES[mode])
+                   for i, sender in enumerate(pool)]
+        for thread in threads:
+            thread.start()
+
+        depths, backlog = [], []
+
+        def sample():
+            depths.append(_queue_depth(receiver))
+            backlog.append(sum(_queue_depth(sender) for sender in pool))
+
+        while any(thread.is_alive() for thread in threads):
+            sample()
+            time.sleep(sample_interval)
+        submitted = sum(thread.submitted for thread in threads)
+        sent_ns = time.perf_counter_ns()
+
+        deadline = time.monotonic() + drain_timeout
+        while time.monotonic() < deadline:
+            dropped = sum(thread.dropped for thread in threads)
+            if sink.received + sink.errors >= submitted - dropped:
+                break
+            sample()
+            time.sleep(sample_interval)
+    finally:
+        for sender in pool:
+            sender.stop_in_thread()
+        receiver.stop_in_thread()
+
+    dropped = sum(thread.dropped for thread in threads)
+    windows = [sender.send_window for sender in pool if hasattr(sender, 'send_window')]
+    latencies = np.asarray(sink.latencies, dtype=np.int64) / 1e6
+    elapsed = ((sink.last_ns or start_ns) - start_ns) / 1e9
+    offered = rate or None
+    achieved = sink.received / max(elapsed, duration)
+    return {
+        'transport': type(transport).__name__,
+        'senders': senders,
+        'size': size,
+        'mode': mode,
+        'offered_rate': offered,
+        'duration_s': duration,
+        'submitted': submitted,
+        'send_rate': submitted / ((sent_ns - start_ns) / 1e9),
+        'dropped': dropped,
+        'received': sink.received,
+        'errors': sink.errors,
+        'lost': submitted - dropped - sink.received - sink.errors,
+        'achieved_rate': achieved,
+        'mb_per_s': sink.bytes / max(elapsed, duration) / 1e6,
+        'latency_p50_ms': float(np.percentile(latencies, 50)) if latencies.size else None,
+        'latency_p99_ms': float(np.percentile(latencies, 99)) if latencies.size else None,
+        'latency_max_ms': float(latencies.max()) if latencies.size else None,
+        'queue_depth_mean': float(np.mean(depths)) if depths else 0.0,
+        'queue_depth_max': int(max(depths)) if depths else 0,
+        'sender_backlog_max': int(max(backlog)) if backlog else 0,
+        'reliable': reliable,
+        'acked': sum(window.frames_acked for window in windows),
+        'retransmissions': sum(window.retransmissions for window in windows),
+    }
+
+
+def is_saturated(result, threshold=0.95):
+    """Vazão obtida abaixo de ``threshold`` da oferecida, ou quadros descartados/perdidos"""
+    if result['dropped'] or result['lost']:
+        return True
+    return bool(result['offered_rate']) and result['achieved_rate'] < threshold * result['offered_rate']
+
+
+def sweep(rates, threshold=0.95, log=None, **options):
+    """Executa ``run_load`` para cada taxa; ``saturation_rate`` é a primeira taxa saturada"""
+    runs = []
+    saturation = None
+    for rate in rates:
+        result = run_load(rate=rate, **options)
+        result['saturated'] = is_saturated(result, threshold)
+        runs.append(result)
+        if log:
+            log(format_result(result))
+        if result['saturated'] and saturation is None:
+            saturation = rate
+    return {'runs': runs, 'saturation_rate': saturation}
+
+
+def format_result(result):
+    offered = f"{result['offered_rate']:.0f}" if result['offered_rate'] else "máx."
+    line = (f"{result['transport']} {result['senders']}×{result['size']} B @ {offered} msg/s: "
+            f"{result['achieved_rate']:.0f} msg/s ({result['mb_per_s']:.2f} MB/s), "
+            f"descartes {result['dropped']}, fila máx. {result['queue_depth_max']}")
+    if result['sender_backlog_max']:
+        line += f" (remetentes {result['sender_backlog_max']})"
+    if result.get('reliable'):
+        line += f", confirmadas {result['acked']}, retransmissões {result['retransmissions']}"
+    if result['latency_p50_ms'] is not None:
+        line += (f", latência p50 {result['latency_p50_ms']:.2f} ms p99 {result['latency_p99_ms']:.2f} ms "
+                 f"máx. {result['latency_max_ms']:.2f} ms")
+    if result.get('saturated'):
+        line += " [SATURADO]"
+    return line
+
+
+def add_arguments(parser):
+    parser.add_argument('--transport', choices=sorted(TRANSPORTS), default='loopback')
+    parser.add_argument('--host', help="Receptor (padrão: 127.0.0.1) ou grupo multicast (padrão: 239.255.12.49)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--senders', type=int, default=4, help="Remetentes simulados")
+    parser.add_argument('--size', type=parse_size, default=1024, help="Bytes por mensagem (ex.: 64, 1K)")
+    parser.add_argument('--rate', type=float, default=1000.0,
+                        help="Mensagens/s somadas de todos os remetentes (0 = o mais rápido possível)")
+    parser.add_argument('--rates', type=lambda s: [float(x) for x in s.split(',')],
+                        help="Varredura de taxas separadas por vírgula, para achar o ponto de saturação")
+    parser.add_argument('--duration', type=float, default=5.0, help="Segundos por rodada")
+    parser.add_argument('--mode', choices=sorted(MODES), default='symbols',
+                        help="Quadros com símbolos Manchester ou só o texto criptografado")
+    parser.add_argument('--queue-size', type=int, default=1024, help="Fila do receptor")
+    parser.add_argument('--reliable', action='store_true',
+                        help="Entrega confirmada por ACK, com janela deslizante e retransmissão (só TCP)")
+    parser.add_argument('--window', type=int, default=64, help="Quadros sem confirmação por remetente (--reliable)")
+    parser.add_argument('--threshold', type=float, default=0.95,
+                        help="Fração da taxa oferecida abaixo da qual a rodada conta como saturada")
+    parser.add_argument('-o', '--output', help="Arquivo JSON de resultados")
+
+
+def run(args):
+    if args.reliable and args.transport != 'tcp':
+        print("--reliable requer --transport tcp", file=sys.stderr)
+        return 2
+    options = dict(transport=TRANSPORTS[args.transport](), senders=args.senders, size=args.size,
+                   duration=args.duration, mode=args.mode, port=args.port,
+                   host=args.host or (DEFAULT_GROUP if args.transport == 'multicast' else '127.0.0.1'),
+                   queue_size=args.queue_size, reliable=args.reliable, window=args.window)
+    results = sweep(args.rates or [args.rate], args.threshold, log=lambda text: print(text, file=sys.stderr),
+                    **options)
+    if args.rates:
+        rate = results['saturation_rate']
+        print(f"Ponto de saturação: {rate:.0f} msg/s" if rate else "Nenhuma taxa saturou o receptor",
+              file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='manchester load', description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    return parser
+
+
+def main(argv=None):
+    sys.exit(run(build_parser().parse_args(argv)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+"""Transporte em memória, no mesmo processo e sem rede
+
+``LoopbackTransport`` implementa a interface ``Transport`` de
+``manchester.transport``: receptores se registram pela porta (o host é
+ignorado, como um servidor escutando em ``0.0.0.0``) e remetentes do mesmo
+processo entregam os quadros na fila limitada do receptor, onde uma thread
+os decodifica e chama o consumidor — o mesmo caminho do
+``AsyncReceiverServer``. ``fanout`` entrega cada quadro a vários
+receptores, como o ``FanOutSender`` do TCP. ``connect`` devolve uma ponta
+de um ``socket.socketpair``, para quem envia bytes com prefixo de
+comprimento (por exemplo ``send_file``).
+"""
+import concurrent.futures
+import itertools
+import logging
+import queue
+import socket
+import threading
+
+from .protocol import LengthPrefixFramer, WireProtocol
+from .transport import FrameReceiver, FrameSender, Transport
+
+logger = logging.getLogger(__name__)
+
+
+class LoopbackReceiver(FrameReceiver):
+    """Receptor em memória com fila limitada e uma thread de entrega"""
+
+    def __init__(self, transport, consumer, host='0.0.0.0', port=12349, queue_size=1024, on_connection=None,
+                 **options):
+        self.transport = transport
+        self.consumer = consumer
+        self.host = host
+        self.port = port
+        self.queue = queue.Queue(queue_size)
+        self.on_connection = on_connection
+
+        self.active_connections = 0
+        self.frames_received = 0
+
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start_in_thread(self):
+        self.transport._register(self)
+        self._thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._thread.start()
+
+    def stop_in_thread(self):
+        self.transport._unregister(self)
+        if self._thread:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def deliver(self, frame, peer, block=False, timeout=None):
+        """Coloca um quadro na fila; sem espaço lança ``queue.Full``"""
+        self.queue.put((frame, peer), block, timeout)
+
+    def connection_changed(self, peer, delta):
+        with self._lock:
+            self.active_connections += delta
+            active = self.active_connections
+        if self.on_connection:
+            self.on_connection(peer, active)
+
+    def _dispatch(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            frame, peer = item
+            try:
+                received_data = WireProtocol.decode_frame(frame)
+                if WireProtocol.is_ping(received_data):
+                    continue
+                self.frames_received += 1
+                self.consumer(received_data, peer)
+            except Exception:
+                logger.exception("Erro no consumidor de quadros (%s)", peer)
+
+
+class LoopbackSender(FrameSender):
+    """Remetente em memória: ``submit`` entrega direto na fila do receptor
+
+    Como no ``SenderPool``, ``submit`` não bloqueia: com a fila do receptor
+    cheia o future recebe ``queue.Full``; sem receptor na porta, recebe
+    ``ConnectionRefusedError``. A entrega é síncrona e sem perdas, então as
+    opções da entrega confirmada do TCP (``reliable``, ``window``, ``verify``)
+    são ignoradas.
+    """
+
+    def __init__(self, transport, host, port, **options):
+        self.transport = transport
+        self.host = host
+        self.port = port
+        self.peer = ('loopback', next(transport._peer_ids))
+        self.frames_sent = 0
+        self._receiver = None
+
+    def _attach(self):
+        if self._receiver is None:
+            receiver = self.transport._lookup(self.port)
+            if receiver is not None:
+                self._receiver = receiver
+                receiver.connection_changed(self.peer, +1)
+        return self._receiver
+
+    def start_in_thread(self):
+        self._attach()
+
+    def wait_connected(self, timeout=None):
+        return self._attach() is not None
+
+    def submit(self, frame):
+        future = concurrent.futures.Future()
+        receiver = self._attach()
+        try:
+            if receiver is None:
+                raise ConnectionRefusedError(f"Nenhum receptor em loopback:{self.port}")
+            receiver.deliver(frame, self.peer)
+        except (queue.Full, ConnectionError) as e:
+            future.set_exception(e)
+            return future
+        self.frames_sent += 1
+        future.set_result(len(frame))
+        return future
+
+    def stop_in_thread(self):
+        if self._receiver is not None:
+            self._receiver.connection_changed(self.peer, -1)
+            self._receiver = None
+
+
+class LoopbackFanOutSender(FrameSender):
+    """Entrega cada quadro aos receptores de todos os ``targets`` (lista de ``(host, porta)``)
+
+    Mesmos contadores do ``FanOutSender``: ``dropped[i]`` conta os quadros
+    descartados para ``targets[i]`` (fila cheia ou sem receptor),
+    ``frames_sent`` os aceitos por ao menos um receptor e ``frames_dropped``
+    os descartados para todos, caso em que o future recebe ``ConnectionError``.
+    """
+
+    def __init__(self, transport, targets, **options):
+        self.targets = list(targets)
+        self.pools = [LoopbackSender(transport, host, port) for host, port in self.targets]
+        self.dropped = [0] * len(self.pools)
+        self.frames_sent = 0
+        self.frames_dropped = 0
+
+    @property
+    def connected(self):
+        """Número de receptores registrados nas portas de destino"""
+        return sum(1 for pool in self.pools if pool._attach() is not None)
+
+    def start_in_thread(self):
+        for pool in self.pools:
+            pool.start_in_thread()
+
+    def wait_connected(self, timeout=None):
+        return self.connected > 0
+
+    def submit(self, frame):
+        future = concurrent.futures.Future()
+        accepted = 0
+        for index, pool in enumerate(self.pools):
+            receiver = pool._attach()
+            try:
+                if receiver is None:
+                    raise ConnectionRefusedError(f"Nenhum receptor em loopback:{pool.port}")
+                receiver.deliver(frame, pool.peer)
+            except (queue.Full, ConnectionError):
+                self.dropped[index] += 1
+                continue
+            pool.frames_sent += 1
+            accepted += 1
+        if accepted:
+            self.frames_sent += 1
+            future.set_result(len(frame))
+        else:
+            self.frames_dropped += 1
+            future.set_exception(ConnectionError("Quadro descartado para todos os receptores"))
+        return future
+
+    def stop_in_thread(self):
+        for pool in self.pools:
+            pool.stop_in_thread()
+
+
+class LoopbackTransport(Transport):
+    """Rede simulada dentro do processo; uma instância equivale a um segmento de rede"""
+
+    def __init__(self):
+        self._receivers = {}
+        self._lock = threading.Lock()
+        self._peer_ids = itertools.count(1)
+
+    def _register(self, receiver):
+        with self._lock:
+            if receiver.port in self._receivers:
+                raise OSError(f"Porta loopback {receiver.port} já está em uso")
+            self._receivers[receiver.port] = receiver
+
+    def _unregister(self, receiver):
+        with self._lock:
+            if self._receivers.get(receiver.port) is receiver:
+                del self._receivers[receiver.port]
+
+    def _lookup(self, port):
+        with self._lock:
+            return self._receivers.get(port)
+
+    def sender(self, host, port, **options):
+        return LoopbackSender(self, host, port, **options)
+
+    def receiver(self, consumer, host, port, **options):
+        return LoopbackReceiver(self, consumer, host, port, **options)
+
+    def fanout(self, targets, **options):
+        return LoopbackFanOutSender(self, targets, **options)
+
+    def connect(self, host, port, timeout=None):
+        """Par de sockets em memória; uma thread remonta os quadros para o receptor"""
+        receiver = self._lookup(port)
+        if receiver is None:
+            raise ConnectionRefusedError(f"Nenhum receptor em loopback:{port}")
+        local, remote = socket.socketpair()
+        local.settimeout(timeout)
+        peer = ('loopback', next(self._peer_ids))
+        threading.Thread(target=self._pump, args=(remote, receiver, peer), daemon=True).start()
+        return local
+
+    @staticmethod
+    def _pump(sock, receiver, peer):
+        receiver.connection_changed(peer, +1)
+        framer = LengthPrefixFramer()
+        try:
+            while framer.recv_into(sock):
+                for frame in framer.frames():
+                    # Bloquear aqui aplica contrapressão ao remetente pelo socket
+                    receiver.deliver(bytes(frame), peer, block=True)
+        except OSError as e:
+            logger.warning("Conexão loopback %s encerrada: %s", peer, e)
+        finally:
+            sock.close()
+            receiver.connection_changed(peer, -1)
@@ -0,0 +1,236 @@
+"""Instrumentação por etapa: latência, vazão e histogramas
+
+As etapas do pipeline (``encrypt``, ``binarize``, ``encode``, ``serialize``,
+``send``, ``recv``, ``reassemble``, ``decode``, ``decrypt``) são medidas com
+``time.perf_counter_ns`` (relógio monotônico) no registro global
+``metrics``::
+
+    with metrics.stage('encode', len(data)):
+        ...
+
+Desativado (o padrão, a menos que ``MANCHESTER_METRICS=1``), ``stage``
+retorna sempre o mesmo contexto vazio e não mede nada. Os valores ficam
+disponíveis em ``metrics.stats()``, numa linha de log periódica
+(``MetricsLogger``) e, opcionalmente, num endpoint HTTP local no formato
+texto do Prometheus (``MetricsServer``).
+"""
+import bisect
+import http.server
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('encrypt', 'protect', 'binarize', 'encode', 'serialize', 'send', 'recv', 'reassemble', 'decode', 'recover',
+          'decrypt')
+# Limites superiores (segundos) das faixas do histograma de latência: 1-2-5 de 1 µs a 10 s
+BUCKETS = tuple(m * 10.0 ** e for e in range(-6, 1) for m in (1, 2, 5)) + (10.0, float('inf'))
+
+
+class StageStats:
+    """Contadores e histograma de uma etapa"""
+
+    def __init__(self):
+        self.count = 0
+        self.bytes = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, elapsed_ns, nbytes):
+        self.count += 1
+        self.bytes += nbytes
+        self.total_ns += elapsed_ns
+        self.max_ns = max(self.max_ns, elapsed_ns)
+        self.buckets[bisect.bisect_left(BUCKETS, elapsed_ns / 1e9)] += 1
+
+    def quantile(self, q):
+        """Limite superior da faixa do histograma que contém o quantil ``q``"""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ns / 1e9)
+        return self.max_ns / 1e9
+
+    def as_dict(self):
+        seconds = self.total_ns / 1e9
+        return {
+            'count': self.count,
+            'bytes': self.bytes,
+            'total_s': seconds,
+            'mean_ms': seconds * 1e3 / self.count if self.count else None,
+            'p50_ms': self.quantile(0.5) * 1e3 if self.count else None,
+            'p99_ms': self.quantile(0.99) * 1e3 if self.count else None,
+            'max_ms': self.max_ns / 1e6,
+            'mb_per_s': self.bytes / seconds / 1e6 if seconds else None,
+        }
+
+
+class _StageTimer:
+    __slots__ = ('registry', 'name', 'nbytes', 'start')
+
+    def __init__(self, registry, name, nbytes):
+        self.registry = registry
+        self.name = name
+        self.nbytes = nbytes
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.record(self.name, time.perf_counter_ns() - self.start, self.nbytes)
+
+
+class _NullTimer:
+    """Contexto devolvido com a instrumentação desativada; ``nbytes`` é ignorado"""
+    __slots__ = ('nbytes',)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """Registro de métricas por etapa, seguro entre threads"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+
+    def stage(self, name, nbytes=0):
+        """Contexto que mede a etapa ``name``; ``nbytes`` pode ser ajustado dentro do bloco"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, name, nbytes)
+
+    def record(self, name, elapsed_ns, nbytes=0):
+        with self._lock:
+            stats = self._stages.get(name)
+            if stats is None:
+                stats = self._stages[name] = StageStats()
+            stats.add(elapsed_ns, nbytes)
+
+    def stats(self):
+        """Dicionário ``{etapa: {count, bytes, mean_ms, p50_ms, p99_ms, max_ms, mb_per_s, ...}}``"""
+        with self._lock:
+            return {name: self._stages[name].as_dict() for name in self._ordered()}
+
+    def _ordered(self):
+        return sorted(self._stages, key=lambda name: (STAGES.index(name) if name in STAGES else len(STAGES), name))
+
+    def format_line(self, separator=' | '):
+        parts = []
+        for name, stage in self.stats().items():
+            rate = f" {stage['mb_per_s']:.1f} MB/s" if stage['mb_per_s'] else ""
+            parts.append(f"{name} n={stage['count']} p50={stage['p50_ms']:.3f}ms p99={stage['p99_ms']:.3f}ms{rate}")
+        return separator.join(parts) or "sem medições"
+
+    def prometheus(self):
+        """Métricas no formato texto de exposição do Prometheus"""
+        lines = [
+            '# HELP manchester_stage_seconds Latência por etapa do pipeline',
+            '# TYPE manchester_stage_seconds histogram',
+        ]
+        with self._lock:
+            stages = [(name, self._stages[name]) for name in self._ordered()]
+            for name, stats in stages:
+                cumulative = 0
+                for bound, count in zip(BUCKETS, stats.buckets):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'manchester_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'manchester_stage_seconds_sum{{stage="{name}"}} {stats.total_ns / 1e9}')
+                lines.append(f'manchester_stage_seconds_count{{stage="{name}"}} {stats.count}')
+            lines.append('# HELP manchester_stage_bytes_total Bytes processados por etapa')
+            lines.append('# TYPE manchester_stage_bytes_total counter')
+            for name, stats in stages:
+                lines.append(f'manchester_stage_bytes_total{{stage="{name}"}} {stats.bytes}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics(enabled=os.environ.get('MANCHESTER_METRICS') == '1')
+
+
+class MetricsLogger:
+    """Registra ``format_line()`` no log a cada ``interval`` segundos, em uma thread"""
+
+    def __init__(self, registry=metrics, interval=10.0, log=None):
+        self.registry = registry
+        self.interval = interval
+        self.log = log or logger.info
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.log(self.registry.format_line())
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.registry.prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer:
+    """Endpoint HTTP local com ``GET /metrics`` no formato do Prometheus"""
+
+    def __init__(self, registry=metrics, host='127.0.0.1', port=9108):
+        self.registry = registry
+        self.httpd = http.server.ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.registry = registry
+        self._thread = None
+
+    @property
+    def address(self):
+        return self.httpd.server_address
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
@@ -0,0 +1,286 @@
+"""Difusão por UDP multicast: um envio, qualquer número de receptores
+
+``MulticastTransport`` implementa a interface ``Transport`` de
+``manchester.transport`` sobre um grupo multicast IPv4 (o ``host`` é o
+endereço do grupo, por exemplo ``239.255.12.49``). O remetente envia cada
+quadro uma única vez, em datagramas de até ``payload_size`` bytes com o
+cabeçalho ``DATAGRAM`` (sessão, sequência, fragmento, total de
+fragmentos), e a rede entrega uma cópia a cada receptor inscrito no grupo.
+
+Não há confirmação nem retransmissão. O receptor remonta os fragmentos e
+acompanha a sequência de cada remetente (sessão): saltos contam como
+quadros perdidos (``lost``) e são avisados a ``on_gap(peer, primeira,
+quantidade)``; quadros com fragmentos faltando são descartados
+(``incomplete``) quando passam de ``max_pending`` em remontagem. Um quadro
+de uma lacuna que chega depois (datagramas fora de ordem) ainda é
+entregue e passa de ``lost`` para ``reordered``; as últimas
+``max_missing`` sequências faltantes de cada remetente são lembradas.
+"""
+import collections
+import concurrent.futures
+import ipaddress
+import logging
+import os
+import socket
+import struct
+import threading
+
+from .metrics import metrics
+from .protocol import WireProtocol
+from .transport import FrameReceiver, FrameSender, Transport
+
+logger = logging.getLogger(__name__)
+
+DATAGRAM = struct.Struct('!QQHH')  # sessão, sequência, fragmento, total de fragmentos
+DEFAULT_GROUP = '239.255.12.49'
+# Cabe em um quadro Ethernet (MTU 1500) com os cabeçalhos IP, UDP e DATAGRAM
+DEFAULT_PAYLOAD_SIZE = 1400
+MAX_DATAGRAM_SIZE = 65535
+
+
+def is_multicast(host):
+    """``True`` se ``host`` é um endereço IPv4 de grupo multicast (224.0.0.0/4)"""
+    try:
+        return ipaddress.ip_address(host).is_multicast
+    except ValueError:
+        return False
+
+
+class MulticastSender(FrameSender):
+    """Remetente multicast: ``submit`` envia o quadro na hora e retorna um future já concluído"""
+
+    def __init__(self, group, port, ttl=1, interface=None, payload_size=DEFAULT_PAYLOAD_SIZE, **options):
+        self.group = group
+        self.port = port
+        self.ttl = ttl
+        self.interface = interface
+        self.payload_size = payload_size
+        self.session = int.from_bytes(os.urandom(8), 'big')
+        self.seq = 0
+
+        self.frames_sent = 0
+        self.datagrams_sent = 0
+
+        self.sock = None
+        self._lock = threading.Lock()
+
+    def start_in_thread(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, self.ttl)
+        # Receptores na mesma máquina também recebem o grupo
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        if self.interface:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(self.interface))
+        self.sock = sock
+
+    def wait_connected(self, timeout=None):
+        """UDP não tem conexão: pronto assim que o socket existe"""
+        return self.sock is not None
+
+    def submit(self, frame):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(self.send_frame(frame))
+        except (OSError, ValueError) as e:
+            future.set_exception(e)
+        return future
+
+    def send_frame(self, frame):
+        """Envia um quadro em datagramas (sem copiar o corpo); retorna quantos datagramas foram usados"""
+        view = memoryview(frame).cast('B')
+        size = self.payload_size
+        count = max(1, -(-len(view) // size))
+        if count > 0xFFFF:
+            raise ValueError(f"Quadro grande demais para multicast: {len(view)} bytes")
+        address = (self.group, self.port)
+        with self._lock:
+            seq = self.seq
+            self.seq += 1
+            with metrics.stage('send', len(view)):
+                for index in range(count):
+                    header = DATAGRAM.pack(self.session, seq, index, count)
+                    self.sock.sendmsg([header, view[index * size:(index + 1) * size]], [], 0, address)
+            self.frames_sent += 1
+            self.datagrams_sent += count
+        return count
+
+    def stop_in_thread(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+class _SenderState:
+    """Próxima sequência esperada de um remetente, sequências faltantes e quadros em remontagem"""
+
+    __slots__ = ('expected', 'missing', 'pending')
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.missing = collections.OrderedDict()  # seq → None, contadas em ``lost``
+        self.pending = collections.OrderedDict()  # seq → [fragmentos, quantos faltam]
+
+
+class MulticastReceiver(FrameReceiver):
+    """Receptor inscrito em um grupo multicast, com uma thread de leitura
+
+    Cada quadro remontado é decodificado e entregue a ``consumer(received_data,
+    peer)`` na própria thread. ``on_connection(peer, remetentes)`` é chamado
+    quando aparece um remetente (sessão) novo.
+    """
+
+    def __init__(self, consumer, group=DEFAULT_GROUP, port=12349, interface='0.0.0.0', on_gap=None,
+                 on_connection=None, max_pending=64, max_senders=256, max_missing=1024, receive_buffer=4 << 20,
+                 **options):
+        self.consumer = consumer
+        self.group = group
+        self.port = port
+        self.interface = interface
+        self.on_gap = on_gap
+        self.on_connection = on_connection
+        self.max_pending = max_pending
+        self.max_senders = max_senders
+        self.max_missing = max_missing
+        self.receive_buffer = receive_buffer
+
+        self.frames_received = 0
+        self.datagrams_received = 0
+        self.lost = 0
+        self.reordered = 0
+        self.incomplete = 0
+        self.late = 0
+
+        self.sock = None
+        self._senders = collections.OrderedDict()
+        self._running = False
+        self._thread = None
+
+    def start_in_thread(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # Buffer maior absorve rajadas sem perda (o kernel limita a net.core.rmem_max)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer)
+        sock.bind(('', self.port))
+        membership = socket.inet_aton(self.group) + socket.inet_aton(self.interface)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        # O tempo limite só serve para a thread notar ``stop_in_thread``
+        sock.settimeout(0.2)
+        self.sock = sock
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop_in_thread(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def _run(self):
+        buffer = bytearray(MAX_DATAGRAM_SIZE)
+        view = memoryview(buffer)
+        while self._running:
+            try:
+                size, peer = self.sock.recvfrom_into(buffer)
+            except socket.timeout:
+                continue
+            except OSError as e:
+                logger.warning("Socket multicast %s:%s encerrado: %s", self.group, self.port, e)
+                break
+            self.datagrams_received += 1
+            frame = self._reassemble(view[:size], peer)
+            if frame is None:
+                continue
+            try:
+                received_data = WireProtocol.decode_frame(frame)
+                if WireProtocol.is_ping(received_data):
+                    continue
+                self.frames_received += 1
+                self.consumer(received_data, peer)
+            except Exception:
+                logger.exception("Erro no consumidor de quadros (%s)", peer)
+
+    def _sender(self, session, seq, peer):
+        state = self._senders.get(session)
+        if state is not None:
+            self._senders.move_to_end(session)
+            return state
+        state = self._senders[session] = _SenderState(seq)
+        if len(self._senders) > self.max_senders:
+            self._senders.popitem(last=False)
+        if self.on_connection:
+            self.on_connection(peer, len(self._senders))
+        return state
+
+    def _reassemble(self, datagram, peer):
+        """Guarda o fragmento; retorna o quadro quando ele fica completo"""
+        if len(datagram) < DATAGRAM.size:
+            return None
+        session, seq, index, count = DATAGRAM.unpack_from(datagram)
+        payload = datagram[DATAGRAM.size:]
+        if index >= count:
+            return None
+        state = self._sender(session, seq, peer)
+        if seq >= state.expected:
+            if seq > state.expected:
+                self.lost += seq - state.expected
+                for missing in range(max(state.expected, seq - self.max_missing), seq):
+                    state.missing[missing] = None
+                while len(state.missing) > self.max_missing:
+                    state.missing.popitem(last=False)
+                if self.on_gap:
+                    self.on_gap(peer, state.expected, seq - state.expected)
+            state.expected = seq + 1
+        else:
+            entry = state.pending.get(seq)
+            if entry is None and seq not in state.missing:
+                # Duplicado, de um quadro já descartado ou de uma lacuna antiga demais
+                self.late += 1
+                return None
+        if seq not in state.pending:
+            if count == 1:
+                return self._complete(state, seq, bytes(payload))
+            state.pending[seq] = [[None] * count, count]
+            if len(state.pending) > self.max_pending:
+                evicted, _ = state.pending.popitem(last=False)
+                # Quadros de lacunas já estão contados em ``lost``
+                if evicted not in state.missing:
+                    self.incomplete += 1
+
+        entry = state.pending[seq]
+        fragments = entry[0]
+        if fragments[index] is None:
+            fragments[index] = bytes(payload)
+            entry[1] -= 1
+        if entry[1]:
+            return None
+        del state.pending[seq]
+        return self._complete(state, seq, b''.join(fragments))
+
+    def _complete(self, state, seq, frame):
+        """Quadro completo; se ele era de uma lacuna, deixa de contar como perdido"""
+        if seq in state.missing:
+            del state.missing[seq]
+            self.lost -= 1
+            self.reordered += 1
+        return frame
+
+
+class MulticastTransport(Transport):
+    """Grupo multicast UDP: ``host`` é o endereço do grupo; ``connect`` não existe (sem conexão)"""
+
+    def __init__(self, ttl=1, interface=None):
+        self.ttl = ttl
+        self.interface = interface
+
+    def connect(self, host, port, timeout=None):
+        raise NotImplementedError("Multicast UDP não tem conexão; use sender()")
+
+    def sender(self, host, port, **options):
+        return MulticastSender(host, port, self.ttl, self.interface, **options)
+
+    def receiver(self, consumer, host, port, **options):
+        return MulticastReceiver(consumer, host, port, self.interface or '0.0.0.0', **options)
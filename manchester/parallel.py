@@ -0,0 +1,132 @@
+"""Codificação/decodificação Manchester paralela para cargas grandes
+
+Divide o buffer em faixas de bytes e as processa em um
+``ProcessPoolExecutor``. Entrada e saída ficam em blocos de
+``multiprocessing.shared_memory``: os processos trabalhadores recebem apenas
+o nome dos blocos e os limites da faixa, de modo que nenhum dado é
+serializado com pickle. Abaixo de ``serial_threshold`` bytes o trabalho é
+feito no próprio processo.
+"""
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .encoder import BYTE_MANCHESTER_WORDS, MANCHESTER_WORD_BYTES, ManchesterEncoder
+
+DEFAULT_CHUNK_SIZE = 4 << 20
+DEFAULT_SERIAL_THRESHOLD = 8 << 20
+
+
+def _attach(name):
+    """Abre um bloco de memória compartilhada criado pelo processo principal
+
+    Os trabalhadores compartilham o ``resource_tracker`` do processo
+    principal, que é quem remove o bloco com ``unlink``.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _encode_range(source_name, target_name, start, stop):
+    source, target = _attach(source_name), _attach(target_name)
+    try:
+        data = np.ndarray(stop - start, dtype=np.uint8, buffer=source.buf, offset=start)
+        words = np.ndarray(stop - start, dtype='>u2', buffer=target.buf, offset=start * 2)
+        np.take(BYTE_MANCHESTER_WORDS, data, out=words)
+        del data, words
+    finally:
+        source.close()
+        target.close()
+
+
+def _decode_range(source_name, target_name, start, stop):
+    """Decodifica palavras [start, stop); retorna quantas eram inválidas"""
+    source, target = _attach(source_name), _attach(target_name)
+    try:
+        words = np.ndarray(stop - start, dtype='>u2', buffer=source.buf, offset=start * 2)
+        decoded = MANCHESTER_WORD_BYTES[words]
+        invalid = int(np.count_nonzero(decoded < 0))
+        out = np.ndarray(stop - start, dtype=np.uint8, buffer=target.buf, offset=start)
+        out[:] = decoded.astype(np.uint8)
+        del words, out
+        return invalid
+    finally:
+        source.close()
+        target.close()
+
+
+class ParallelManchesterEncoder:
+    """Modo paralelo em blocos sobre ``ManchesterEncoder``
+
+    ``workers`` e ``chunk_size`` (bytes de entrada por tarefa) são
+    configuráveis; o pool de processos é criado na primeira carga grande e
+    reutilizado até ``shutdown``.
+    """
+
+    def __init__(self, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, serial_threshold=DEFAULT_SERIAL_THRESHOLD):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.serial_threshold = serial_threshold
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _use_serial(self, size):
+        return self.workers <= 1 or size < self.serial_threshold
+
+    def _ranges(self, count):
+        return [(start, min(start + self.chunk_size, count)) for start in range(0, count, self.chunk_size)]
+
+    def _run(self, func, source, target_size, count):
+        """Copia ``source`` para a memória compartilhada e executa ``func`` por faixa"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers)
+        source_shm = shared_memory.SharedMemory(create=True, size=max(len(source), 1))
+        target_shm = shared_memory.SharedMemory(create=True, size=max(target_size, 1))
+        try:
+            source_shm.buf[:len(source)] = source
+            futures = [self._executor.submit(func, source_shm.name, target_shm.name, start, stop)
+                       for start, stop in self._ranges(count)]
+            results = [future.result() for future in futures]
+            return bytes(target_shm.buf[:target_size]), results
+        finally:
+            source_shm.close()
+            source_shm.unlink()
+            target_shm.close()
+            target_shm.unlink()
+
+    def encode_packed(self, data):
+        """Equivalente paralelo de ``ManchesterEncoder.encode_packed``"""
+        data = memoryview(data).cast('B')
+        if self._use_serial(len(data)):
+            return ManchesterEncoder.encode_packed(data)
+        encoded, _ = self._run(_encode_range, data, len(data) * 2, len(data))
+        return encoded
+
+    def decode_packed(self, packed, symbol_count=None):
+        """Equivalente paralelo de ``ManchesterEncoder.decode_packed``
+
+        Quadros parciais ou com pares inválidos são decodificados em série
+        para manter a semântica de descarte de pares do codificador.
+        """
+        packed = memoryview(packed).cast('B')
+        aligned = len(packed) % 2 == 0 and symbol_count in (None, len(packed) * 8)
+        if not aligned or self._use_serial(len(packed) // 2):
+            return ManchesterEncoder.decode_packed(packed, symbol_count)
+        decoded, invalid = self._run(_decode_range, packed, len(packed) // 2, len(packed) // 2)
+        if any(invalid):
+            return ManchesterEncoder.decode_packed(packed, symbol_count)
+        return decoded
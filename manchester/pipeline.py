@@ -0,0 +1,150 @@
+"""Pipeline de envio em segundo plano (criptografia → CRC/FEC → binário → código de linha → envio)
+
+Cada mensagem vira um ``SendJob`` executado em um pool de threads, de modo
+que várias mensagens avançam ao mesmo tempo. O progresso de cada etapa e o
+resultado final são entregues por callbacks através de ``dispatch``; a GUI
+passa uma função baseada em ``root.after`` para que os callbacks rodem na
+thread do Tk. O cancelamento é verificado entre as etapas.
+"""
+import concurrent.futures
+import itertools
+import threading
+
+from .crypto import encrypt_aes_256
+from .fec import PROTECTION_NAMES, PROTECTION_NONE, protect, protection_id
+from .frame import ManchesterFrame
+from .linecode import get_line_code
+from .protocol import WireProtocol
+
+STAGES = ('encrypt', 'protect', 'binarize', 'encode', 'serialize', 'send')
+
+
+class JobCancelled(Exception):
+    """O job foi cancelado antes de terminar"""
+
+
+class SendJob:
+    """Uma mensagem em processamento no ``SendPipeline``"""
+
+    def __init__(self, job_id, message, key, legacy_json=False, line_code=None, protection=None):
+        self.id = job_id
+        self.message = message
+        self.key = key
+        self.legacy_json = legacy_json
+        self.line_code = get_line_code(line_code)
+        # O JSON legado não tem onde indicar a proteção
+        self.protection = PROTECTION_NONE if legacy_json else protection_id(protection)
+        self.stage = None
+        self.future = None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Pede o cancelamento; o job para na próxima fronteira entre etapas"""
+        self._cancelled.set()
+        if self.future:
+            self.future.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+
+class SendPipeline:
+    """Pool de trabalho para processar e enviar mensagens fora da thread da GUI
+
+    ``sender`` é qualquer objeto com ``submit(frame)`` que retorne um
+    future (por exemplo ``SenderPool``); sem ele os jobs param antes do
+    envio. ``on_progress(job, stage, fraction)`` e ``on_done(job, result,
+    error)`` são chamados via ``dispatch(callback, *args)``.
+    """
+
+    def __init__(self, workers=2, dispatch=None, on_progress=None, on_done=None):
+        self.executor = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix='send-pipeline')
+        self.dispatch = dispatch or (lambda callback, *args: callback(*args))
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.sender = None
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, message, key, legacy_json=False, line_code=None, protection=None):
+        """Enfileira uma mensagem; retorna o ``SendJob``
+
+        ``line_code`` escolhe o código de linha (``manchester.linecode``;
+        padrão: Manchester) e ``protection`` a proteção de ``manchester.fec``
+        (padrão: nenhuma; ignorada no JSON legado).
+        """
+        job = SendJob(next(self._ids), message, key, legacy_json, line_code, protection)
+        with self._lock:
+            self.jobs[job.id] = job
+        job.future = self.executor.submit(self._run, job)
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job
+
+    def cancel_all(self):
+        with self._lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            job.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        self.executor.shutdown(wait=False)
+
+    def _progress(self, job, stage):
+        if job.cancelled:
+            raise JobCancelled()
+        job.stage = stage
+        if self.on_progress:
+            self.dispatch(self.on_progress, job, stage, STAGES.index(stage) / len(STAGES))
+
+    def _run(self, job):
+        self._progress(job, 'encrypt')
+        encrypted = encrypt_aes_256(job.key, job.message)
+
+        self._progress(job, 'protect')
+        payload = protect(encrypted.encode('ascii'), job.protection)
+
+        self._progress(job, 'binarize')
+        binary = ManchesterFrame.from_bytes(payload)
+
+        self._progress(job, 'encode')
+        manchester = job.line_code.encode_frame(payload)
+
+        self._progress(job, 'serialize')
+        if job.legacy_json:
+            frame = WireProtocol.encode_legacy_json(job.message, encrypted, binary, manchester, job.line_code)
+        else:
+            # Os símbolos já estão empacotados como no corpo do quadro
+            frame = WireProtocol.pack_frame(WireProtocol.MODE_SYMBOLS, manchester.packed, len(manchester),
+                                            job.line_code.code_id, job.protection)
+
+        result = {
+            "text": job.message,
+            "encrypted": encrypted,
+            "binary": binary,
+            "manchester": manchester,
+            "line_code": job.line_code.name,
+            "protection": PROTECTION_NAMES[job.protection],
+            "sent": False,
+        }
+        sender = self.sender
+        if sender is None:
+            return result
+
+        self._progress(job, 'send')
+        sender.submit(frame).result()
+        result["sent"] = True
+        return result
+
+    def _finish(self, job, future):
+        with self._lock:
+            self.jobs.pop(job.id, None)
+        if not self.on_done:
+            return
+        if future.cancelled():
+            self.dispatch(self.on_done, job, None, JobCancelled())
+        else:
+            error = future.exception()
+            self.dispatch(self.on_done, job, None if error else future.result(), error)
@@ -0,0 +1,310 @@
+"""Formato de quadro binário e enquadramento com prefixo de comprimento"""
+import json
+import struct
+
+import numpy as np
+
+from .fec import PROTECTION_NONE, protect, protection_id, recover
+from .frame import ManchesterFrame
+from .linecode import MANCHESTER, get_line_code
+from .metrics import metrics
+
+
+class WireProtocol:
+    """Formato binário versionado dos quadros enviados entre Host A e Host B
+
+    Cabeçalho (big-endian): magic ``MCS``, versão, modo, código de linha e
+    contagem de símbolos. O código de linha (``manchester.linecode``; 0 =
+    Manchester, o valor do antigo byte reservado) é escolhido pelo remetente
+    e usado pelo receptor para decodificar o quadro. No modo
+    ``MODE_SYMBOLS`` o corpo traz os símbolos empacotados 8 por byte; no
+    modo ``MODE_CIPHERTEXT`` traz apenas o texto criptografado e a
+    codificação de linha é aplicada no receptor. O texto
+    original nunca é transmitido. O formato JSON antigo continua disponível
+    como modo legado opcional.
+
+    O nibble alto do byte de modo indica a proteção do payload desses dois
+    modos (``manchester.fec``: 0 = nenhuma, 1 = CRC32, 2 = CRC32 +
+    Hamming(7,4)); quadros antigos têm 0 ali. O receptor devolve o
+    relatório em ``integrity``.
+
+    Os modos ``MODE_STREAM_*`` transportam um fluxo AES-GCM em vários
+    quadros (nonce, blocos de texto cifrado bruto em símbolos Manchester e
+    tag de autenticação); veja ``manchester.stream``. ``MODE_FILE_START``
+    inicia o mesmo fluxo para um arquivo, com nonce, tamanho e nome; veja
+    ``manchester.filetransfer``. ``MODE_PING`` é um quadro vazio usado pelo
+    pool de conexões do remetente.
+
+    ``MODE_RELIABLE_DATA`` envolve qualquer outro quadro com sessão e número
+    de sequência; o receptor responde com ``MODE_ACK`` (cumulativo e
+    seletivo, com crédito da fila) ou ``MODE_NACK``. Veja
+    ``manchester.reliable``.
+    """
+
+    MAGIC = b'MCS'
+    VERSION = 1
+    MODE_SYMBOLS = 1
+    MODE_CIPHERTEXT = 2
+    MODE_STREAM_START = 3
+    MODE_STREAM_DATA = 4
+    MODE_STREAM_END = 5
+    MODE_PING = 6
+    MODE_FILE_START = 7
+    MODE_RELIABLE_DATA = 8
+    MODE_ACK = 9
+    MODE_NACK = 10
+    STREAM_MODES = (MODE_STREAM_START, MODE_STREAM_DATA, MODE_STREAM_END, MODE_FILE_START)
+    HEADER = struct.Struct('!3sBBBQ')
+    PROTECTION_SHIFT = 4
+    MODE_MASK = 0x0F
+
+    @staticmethod
+    def pack_frame(mode, body, symbol_count=0, line_code=MANCHESTER.code_id, protection=PROTECTION_NONE):
+        """Prefixa ``body`` com o cabeçalho do modo indicado"""
+        with metrics.stage('serialize', len(body)):
+            mode |= protection << WireProtocol.PROTECTION_SHIFT
+            header = WireProtocol.HEADER.pack(WireProtocol.MAGIC, WireProtocol.VERSION, mode, line_code, symbol_count)
+            return header + body
+
+    @staticmethod
+    def ping_frame():
+        """Quadro vazio de verificação de saúde da conexão (ignorado pelo receptor)"""
+        return WireProtocol.pack_frame(WireProtocol.MODE_PING, b'')
+
+    @staticmethod
+    def is_ping(received_data):
+        return received_data.get("mode") == WireProtocol.MODE_PING
+
+    @staticmethod
+    def peek_mode(data):
+        """Modo de um quadro binário válido (sem o nibble de proteção), sem decodificá-lo; ``None`` se não for"""
+        if len(data) < WireProtocol.HEADER.size:
+            return None
+        magic, version, mode, _, _ = WireProtocol.HEADER.unpack_from(data)
+        if magic != WireProtocol.MAGIC or version != WireProtocol.VERSION:
+            return None
+        return mode & WireProtocol.MODE_MASK
+
+    @staticmethod
+    def encode_frame(encrypted, mode=MODE_SYMBOLS, line_code=None, protection=None):
+        """Monta um quadro binário a partir do texto criptografado (Base64)
+
+        ``line_code`` é um identificador, nome ou instância de
+        ``manchester.linecode`` (padrão: Manchester); ``protection``, o nome
+        ou identificador da proteção de ``manchester.fec`` (padrão: nenhuma).
+        """
+        code = get_line_code(line_code)
+        protection = protection_id(protection)
+        payload = protect(encrypted.encode('ascii'), protection)
+        symbol_count = code.symbol_count(len(payload))
+        if mode == WireProtocol.MODE_SYMBOLS:
+            body = code.encode_packed(payload)
+        elif mode == WireProtocol.MODE_CIPHERTEXT:
+            body = payload
+        else:
+            raise ValueError(f"Modo de quadro desconhecido: {mode}")
+        return WireProtocol.pack_frame(mode, body, symbol_count, code.code_id, protection)
+
+    @staticmethod
+    def frame_size(payload_size, mode=MODE_SYMBOLS, line_code=None):
+        """Tamanho do quadro binário para um payload (já protegido) de ``payload_size`` bytes"""
+        if mode == WireProtocol.MODE_SYMBOLS:
+            return WireProtocol.HEADER.size + (get_line_code(line_code).symbol_count(payload_size) + 7) // 8
+        if mode == WireProtocol.MODE_CIPHERTEXT:
+            return WireProtocol.HEADER.size + payload_size
+        raise ValueError(f"Modo de quadro desconhecido: {mode}")
+
+    @staticmethod
+    def encode_frame_into(buffer, payload, mode=MODE_SYMBOLS, line_code=None, protection=None):
+        """Escreve em ``buffer`` o quadro de ``encode_frame`` para ``payload`` já protegido (``manchester.fec``)
+
+        ``buffer`` é gravável e tem ``frame_size`` bytes; os símbolos são
+        codificados direto nele, sem quadro intermediário (é assim que o
+        remetente de ``manchester.shm`` escreve no anel compartilhado).
+        Retorna o tamanho do quadro.
+        """
+        code = get_line_code(line_code)
+        protection = protection_id(protection)
+        symbol_count = code.symbol_count(len(payload))
+        body = memoryview(buffer)[WireProtocol.HEADER.size:]
+        if mode == WireProtocol.MODE_SYMBOLS:
+            size = code.encode_packed_into(payload, body)
+        elif mode == WireProtocol.MODE_CIPHERTEXT:
+            size = len(payload)
+            body[:size] = payload
+        else:
+            raise ValueError(f"Modo de quadro desconhecido: {mode}")
+        mode |= protection << WireProtocol.PROTECTION_SHIFT
+        WireProtocol.HEADER.pack_into(buffer, 0, WireProtocol.MAGIC, WireProtocol.VERSION, mode, code.code_id,
+                                      symbol_count)
+        return WireProtocol.HEADER.size + size
+
+    @staticmethod
+    def encode_legacy_json(message, encrypted, binary, manchester, line_code=None):
+        """Monta a mensagem no formato JSON legado (binário como string '0'/'1', símbolos como lista)"""
+        if isinstance(binary, ManchesterFrame):
+            binary = binary.to_binary()
+        if isinstance(manchester, ManchesterFrame):
+            manchester = manchester.tolist()
+        data_to_send = {
+            "text": message,
+            "encrypted": encrypted,
+            "binary": binary,
+            "manchester": manchester
+        }
+        if line_code is not None:
+            data_to_send["line_code"] = get_line_code(line_code).name
+        with metrics.stage('serialize') as timer:
+            encoded = json.dumps(data_to_send).encode()
+            timer.nbytes = len(encoded)
+        return encoded
+
+    @staticmethod
+    def decode_frame(data):
+        """Decodifica um quadro binário ou JSON legado nos campos usados pelo receptor
+
+        Nos quadros binários ``binary`` e ``manchester`` são ``ManchesterFrame``;
+        no JSON legado, string '0'/'1' e lista de símbolos.
+        """
+        with metrics.stage('decode', len(data)):
+            return WireProtocol._decode_frame(data)
+
+    @staticmethod
+    def _decode_frame(data):
+        if data[:1] == b'{':
+            return json.loads(bytes(data).decode())
+
+        if len(data) < WireProtocol.HEADER.size:
+            raise ValueError("Quadro truncado: cabeçalho incompleto")
+        magic, version, mode, line_code, symbol_count = WireProtocol.HEADER.unpack_from(data)
+        if magic != WireProtocol.MAGIC:
+            raise ValueError("Quadro inválido: assinatura desconhecida")
+        if version != WireProtocol.VERSION:
+            raise ValueError(f"Versão de quadro não suportada: {version}")
+        protection = protection_id(mode >> WireProtocol.PROTECTION_SHIFT)
+        mode &= WireProtocol.MODE_MASK
+
+        if mode == WireProtocol.MODE_PING:
+            return {"mode": mode}
+        code = get_line_code(line_code)
+        body = np.frombuffer(memoryview(data)[WireProtocol.HEADER.size:], dtype=np.uint8)
+        if mode in WireProtocol.STREAM_MODES:
+            if mode == WireProtocol.MODE_STREAM_DATA:
+                if body.size * 8 < symbol_count:
+                    raise ValueError("Quadro truncado: símbolos incompletos")
+                payload = code.decode_packed(body[:(symbol_count + 7) // 8], symbol_count)
+            else:
+                payload = body.tobytes()
+            return {"mode": mode, "payload": payload}
+        if mode == WireProtocol.MODE_SYMBOLS:
+            if body.size * 8 < symbol_count:
+                raise ValueError("Quadro truncado: símbolos incompletos")
+            packed = body[:(symbol_count + 7) // 8]
+            if protection == PROTECTION_NONE:
+                received = code.decode_packed(packed, symbol_count)
+            else:
+                # A correção de erros precisa de cada bit na sua posição, mesmo com blocos inválidos
+                received = code.decode_packed_hard(packed, symbol_count)
+            # Cópia dos símbolos empacotados: ``data`` pode ser o buffer reutilizado do enquadrador
+            symbols = ManchesterFrame(packed.tobytes(), symbol_count)
+        elif mode == WireProtocol.MODE_CIPHERTEXT:
+            received = body.tobytes()
+            symbols = ManchesterFrame.from_symbols(code.encode_bytes(body))
+        else:
+            raise ValueError(f"Modo de quadro desconhecido: {mode}")
+
+        payload, integrity = recover(received, protection)
+        result = {
+            "encrypted": payload.decode('ascii', errors='strict' if integrity is None else 'replace'),
+            "binary": ManchesterFrame.from_bytes(received),
+            "manchester": symbols,
+            "line_code": code.name,
+        }
+        if integrity is not None:
+            result["integrity"] = integrity
+        return result
+
+
+class LengthPrefixFramer:
+    """Enquadramento com prefixo de comprimento e remontagem incremental de quadros
+
+    Cada quadro é precedido por 4 bytes (big-endian) com o tamanho do corpo.
+    A remontagem usa ``recv_into`` sobre um ``bytearray`` pré-alocado que
+    cresce sob demanda, evitando cópias repetidas em quadros grandes, e
+    entrega todos os quadros completos presentes no buffer.
+    """
+
+    PREFIX = struct.Struct('!I')
+    MAX_FRAME_SIZE = 1 << 30
+
+    def __init__(self, initial_size=65536, max_frame_size=MAX_FRAME_SIZE):
+        self.max_frame_size = max_frame_size
+        self.buffer = bytearray(initial_size)
+        self.view = memoryview(self.buffer)
+        self.start = 0
+        self.end = 0
+
+    @staticmethod
+    def pack(payload):
+        """Adiciona o prefixo de comprimento a um quadro"""
+        return LengthPrefixFramer.PREFIX.pack(len(payload)) + payload
+
+    def _pending_size(self):
+        """Tamanho total (prefixo + corpo) do próximo quadro, se o prefixo já chegou"""
+        if self.end - self.start < self.PREFIX.size:
+            return self.PREFIX.size
+        (length,) = self.PREFIX.unpack_from(self.buffer, self.start)
+        if length > self.max_frame_size:
+            raise ValueError(f"Quadro excede o tamanho máximo: {length} bytes")
+        return self.PREFIX.size + length
+
+    def _reserve(self):
+        """Garante espaço livre no fim do buffer para o próximo ``recv_into``"""
+        pending = self.end - self.start
+        needed = self._pending_size()
+        if self.start and (self.end == len(self.buffer) or needed > len(self.buffer) - self.start):
+            # Compactar: mover o quadro parcial para o início do buffer
+            self.view[:pending] = self.view[self.start:self.end]
+            self.start, self.end = 0, pending
+        if needed > len(self.buffer) or self.end == len(self.buffer):
+            new_buffer = bytearray(max(needed, len(self.buffer) * 2))
+            new_buffer[:pending] = self.view[self.start:self.end]
+            self.view.release()
+            self.buffer = new_buffer
+            self.view = memoryview(self.buffer)
+            self.start, self.end = 0, pending
+
+    def recv_into(self, sock):
+        """Lê do socket diretamente para o buffer; retorna o número de bytes lidos"""
+        self._reserve()
+        with metrics.stage('recv') as timer:
+            received = sock.recv_into(self.view[self.end:])
+            timer.nbytes = received
+        self.end += received
+        return received
+
+    def feed(self, data):
+        """Acrescenta bytes já lidos ao buffer (para transportes sem ``recv_into``)"""
+        data = memoryview(data)
+        while data:
+            self._reserve()
+            chunk = min(len(data), len(self.buffer) - self.end)
+            self.view[self.end:self.end + chunk] = data[:chunk]
+            self.end += chunk
+            data = data[chunk:]
+
+    def frames(self):
+        """Gera os corpos dos quadros completos como ``memoryview``
+
+        As fatias só são válidas até a próxima chamada de ``recv_into``/``feed``.
+        """
+        while True:
+            size = self._pending_size()
+            if self.end - self.start < size:
+                break
+            with metrics.stage('reassemble', size - self.PREFIX.size):
+                frame = self.view[self.start + self.PREFIX.size:self.start + size]
+                self.start += size
+            yield frame
+        if self.start == self.end:
+            self.start = self.end = 0
@@ -0,0 +1,276 @@
+"""Entrega confiável sobre o enlace TCP: janela deslizante, ACK/NACK e retransmissão
+
+O remetente envolve cada quadro em ``MODE_RELIABLE_DATA`` com uma sessão
+aleatória de 64 bits e um número de sequência, e mantém no máximo
+``window`` quadros sem confirmação. O receptor só confirma um quadro depois
+de decodificar os símbolos e passar na verificação (CRC32 do FEC e, com a
+chave, a decifração AES): responde ``MODE_ACK`` com o ack cumulativo (todas
+as sequências anteriores foram aceitas), um bitmap seletivo das sequências
+aceitas acima dele e o crédito (vagas na fila do receptor), ou ``MODE_NACK``
+com a sequência rejeitada, que o remetente retransmite. Depois de
+``max_retries`` rejeições o remetente desiste: o future recebe
+``DeliveryError`` e o quadro é substituído por um aviso de abandono, que o
+receptor confirma sem entregar, para a janela continuar andando.
+
+A memória é limitada nas duas pontas: o remetente guarda até ``window``
+quadros em trânsito mais a fila de envio, e o receptor um bitmap de até
+``MAX_WINDOW`` bits por sessão, para no máximo ``max_sessions`` sessões.
+Duplicatas (retransmissões após reconexão) são confirmadas e descartadas.
+A parte de E/S fica em ``manchester.transport`` (``ReliableSender`` e
+``AsyncReceiverServer``).
+"""
+import collections
+import os
+import struct
+
+from .protocol import LengthPrefixFramer, WireProtocol
+
+DATA = struct.Struct('!QQB')  # sessão, sequência, flags
+ACK = struct.Struct('!QQI')  # sessão, ack cumulativo, crédito; segue o bitmap seletivo
+NACK = struct.Struct('!QQ')  # sessão, sequência rejeitada
+FLAG_ABANDON = 1
+MAX_WINDOW = 4096
+# ACK atrasado: um ACK a cada ACK_EVERY quadros ou ACK_DELAY segundos após o primeiro pendente
+ACK_EVERY = 16
+ACK_DELAY = 0.001
+
+
+class DeliveryError(Exception):
+    """O receptor rejeitou o quadro em todas as tentativas"""
+
+
+def data_frame(session, seq, frame, flags=0):
+    return WireProtocol.pack_frame(WireProtocol.MODE_RELIABLE_DATA, DATA.pack(session, seq, flags) + frame)
+
+
+def ack_frame(session, cumulative, credit, selective=0):
+    """ACK com o bitmap seletivo ``selective`` (bit ``i`` = sequência ``cumulative + i``)"""
+    bitmap = selective.to_bytes((selective.bit_length() + 7) // 8, 'little')
+    return WireProtocol.pack_frame(WireProtocol.MODE_ACK, ACK.pack(session, cumulative, credit) + bitmap)
+
+
+def nack_frame(session, seq):
+    return WireProtocol.pack_frame(WireProtocol.MODE_NACK, NACK.pack(session, seq))
+
+
+def _unpack(layout, frame, name):
+    """Lê o cabeçalho ``layout`` após o cabeçalho do quadro, rejeitando quadros curtos"""
+    if len(frame) < WireProtocol.HEADER.size + layout.size:
+        raise ValueError(f"Quadro {name} truncado: {len(frame)} bytes")
+    return layout.unpack_from(frame, WireProtocol.HEADER.size)
+
+
+def parse_ack(frame):
+    """Retorna ``(sessão, ack cumulativo, crédito, sequências aceitas acima do cumulativo)``"""
+    session, cumulative, credit = _unpack(ACK, frame, 'ACK')
+    selective = int.from_bytes(frame[WireProtocol.HEADER.size + ACK.size:], 'little')
+    seqs = []
+    while selective:
+        low = selective & -selective
+        seqs.append(cumulative + low.bit_length() - 1)
+        selective ^= low
+    return session, cumulative, credit, seqs
+
+
+def parse_nack(frame):
+    return _unpack(NACK, frame, 'NACK')
+
+
+def default_verify(received_data):
+    """Aceita o quadro se o CRC32 do FEC confere (quadros sem proteção são aceitos)"""
+    integrity = received_data.get("integrity")
+    return integrity is None or integrity['crc_ok']
+
+
+def decrypt_verifier(key):
+    """Verificação que também decifra com ``key``; o texto fica em ``received_data["decrypted"]``
+
+    Quadros sem ``encrypted`` (fluxos AES-GCM) só passam pela verificação padrão.
+    """
+    from .crypto import decrypt_aes_256
+
+    def verify(received_data):
+        if not default_verify(received_data):
+            return False
+        if "encrypted" in received_data:
+            received_data["decrypted"] = decrypt_aes_256(key, received_data["encrypted"])
+        return True
+
+    return verify
+
+
+class ReceiveWindow:
+    """Sequências aceitas de uma sessão: base cumulativa e bitmap das posteriores"""
+
+    __slots__ = ('base', 'bits')
+
+    def __init__(self, base=0):
+        self.base = base
+        self.bits = 0  # bit i = sequência base + i (o bit 0 nunca fica ligado)
+
+    def __contains__(self, seq):
+        return seq < self.base or bool(self.bits >> (seq - self.base) & 1)
+
+    def mark(self, seq):
+        self.bits |= 1 << (seq - self.base)
+        # Avança a base sobre os bits ligados no início
+        advance = (~self.bits & (self.bits + 1)).bit_length() - 1
+        self.bits >>= advance
+        self.base += advance
+
+
+class ReliableReceiver:
+    """Lado receptor do protocolo, independente do socket
+
+    ``receive`` processa um quadro ``MODE_RELIABLE_DATA`` e retorna
+    ``(sessão, received_data, nack)``: ``received_data`` é ``None`` para
+    duplicatas, abandonos e quadros rejeitados; ``nack`` é o quadro a
+    responder imediatamente (ou ``None``). Os ACKs são montados com ``ack``
+    e podem ser agrupados por quem chama.
+    """
+
+    def __init__(self, verify=None, max_sessions=1024):
+        self.verify = verify or default_verify
+        self.max_sessions = max_sessions
+        self.sessions = collections.OrderedDict()
+
+        self.accepted = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.abandoned = 0
+
+    def _window(self, session, seq):
+        window = self.sessions.get(session)
+        if window is None:
+            # Sessão nova (ou esquecida): o remetente sempre reenvia a partir da menor sequência pendente
+            window = self.sessions[session] = ReceiveWindow(seq)
+            if len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        else:
+            self.sessions.move_to_end(session)
+        return window
+
+    def receive(self, frame):
+        session, seq, flags = _unpack(DATA, frame, 'DATA')
+        window = self._window(session, seq)
+        if seq in window:
+            self.duplicates += 1
+            return session, None, None
+        if seq - window.base >= MAX_WINDOW:
+            self.rejected += 1
+            return session, None, nack_frame(session, seq)
+        if flags & FLAG_ABANDON:
+            self.abandoned += 1
+            window.mark(seq)
+            return session, None, None
+        try:
+            received_data = WireProtocol.decode_frame(memoryview(frame)[WireProtocol.HEADER.size + DATA.size:])
+            valid = self.verify(received_data)
+        except (ValueError, KeyError):
+            valid = False
+        if not valid:
+            self.rejected += 1
+            return session, None, nack_frame(session, seq)
+        self.accepted += 1
+        window.mark(seq)
+        return session, received_data, None
+
+    def ack(self, session, credit):
+        window = self.sessions.get(session)
+        if window is None:
+            return None
+        return ack_frame(session, window.base, credit, window.bits)
+
+
+class SendWindow:
+    """Lado remetente do protocolo, independente do socket
+
+    Guarda os quadros sem confirmação (já com prefixo de comprimento) em
+    ordem de sequência, a fila de retransmissão e o crédito anunciado pelo
+    receptor. ``push`` só deve ser chamado quando ``can_send()``.
+    """
+
+    def __init__(self, window=64, max_retries=3):
+        if not 0 < window <= MAX_WINDOW:
+            raise ValueError(f"Janela deve estar entre 1 e {MAX_WINDOW}")
+        self.window = window
+        self.max_retries = max_retries
+        self.session = int.from_bytes(os.urandom(8), 'big')
+        self.next_seq = 0
+        self.credit = window
+        self.unacked = collections.OrderedDict()  # seq → [quadro, future, rejeições]
+        self.resend = collections.deque()
+
+        self.frames_acked = 0
+        self.retransmissions = 0
+        self.nacks = 0
+        self.failed = 0
+
+    def __len__(self):
+        return len(self.unacked)
+
+    def can_send(self):
+        if self.credit <= 0:
+            return False
+        return not self.unacked or self.next_seq - next(iter(self.unacked)) < self.window
+
+    def push(self, frame, future):
+        seq = self.next_seq
+        self.next_seq += 1
+        data = LengthPrefixFramer.pack(data_frame(self.session, seq, frame))
+        self.unacked[seq] = [data, future, 0]
+        self.credit -= 1
+        return data
+
+    def restart(self):
+        """Após reconectar, tudo que não foi confirmado é reenviado em ordem"""
+        self.resend.clear()
+        self.resend.extend(self.unacked)
+
+    def next_retransmission(self):
+        while self.resend:
+            entry = self.unacked.get(self.resend.popleft())
+            if entry is not None:
+                self.retransmissions += 1
+                return entry[0]
+        return None
+
+    def _confirm(self, seq):
+        data, future, _ = self.unacked.pop(seq)
+        if not future.done():
+            future.set_result(len(data))
+            self.frames_acked += 1
+
+    def on_ack(self, frame):
+        session, cumulative, credit, selective = parse_ack(frame)
+        if session != self.session:
+            return
+        while self.unacked:
+            seq = next(iter(self.unacked))
+            if seq >= cumulative:
+                break
+            self._confirm(seq)
+        for seq in selective:
+            if seq in self.unacked:
+                self._confirm(seq)
+        # Quadros ainda em trânsito vão ocupar parte das vagas anunciadas
+        self.credit = credit - len(self.unacked)
+
+    def on_nack(self, frame):
+        session, seq = parse_nack(frame)
+        entry = self.unacked.get(seq) if session == self.session else None
+        if entry is None:
+            return
+        self.nacks += 1
+        entry[2] += 1
+        if entry[2] > self.max_retries and not entry[1].done():
+            entry[1].set_exception(DeliveryError(f"Quadro {seq} rejeitado pelo receptor {entry[2]} vezes"))
+            self.failed += 1
+            entry[0] = LengthPrefixFramer.pack(data_frame(self.session, seq, b'', FLAG_ABANDON))
+        self.resend.append(seq)
+
+    def cancel(self):
+        for _, future, _ in self.unacked.values():
+            future.cancel()
+        self.unacked.clear()
+        self.resend.clear()
@@ -0,0 +1,426 @@
+"""Transporte por memória compartilhada entre processos da mesma máquina
+
+``ShmTransport`` implementa a interface ``Transport`` de
+``manchester.transport`` para Host A e Host B no mesmo computador, sem
+pilha TCP nem cópias intermediárias. Cada remetente cria um segmento
+``multiprocessing.shared_memory`` com um anel de produtor e consumidor
+únicos (SPSC) e o anuncia ao receptor por um socket UDP em
+``127.0.0.1:porta`` (o host é ignorado, como no ``LoopbackTransport``).
+O codificador escreve os símbolos direto no anel
+(``WireProtocol.encode_frame_into``) e o receptor decodifica cada quadro
+direto do anel, liberando o espaço antes de chamar o consumidor.
+
+Layout do segmento: informações fixas, a linha do produtor (``head``,
+fechado), a linha do consumidor (``tail``, esperando, conectado), cada uma
+em sua linha de cache, e os dados. ``head`` e ``tail`` são contadores de
+bytes que só crescem; cada registro é um comprimento de 4 bytes seguido do
+quadro, alinhado a 8 bytes, e um comprimento ``WRAP`` manda o consumidor
+voltar ao início do anel. Cada contador tem um único escritor, gravado
+depois dos dados com um acesso alinhado de 8 bytes.
+
+A sinalização é leve: enquanto há quadros o consumidor só lê a memória;
+sem quadros, ele marca que está esperando e dorme no socket UDP, e o
+produtor só envia o datagrama de 1 byte ("campainha") quando encontra a
+marca. ``wait_timeout`` limita a espera no caso raro de a marca e o novo
+``head`` se cruzarem. Com o anel cheio, ``submit`` falha com
+``queue.Full``, como no ``LoopbackTransport``.
+"""
+import concurrent.futures
+import logging
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+
+from .fec import protect, protection_id
+from .linecode import get_line_code
+from .metrics import metrics
+from .protocol import WireProtocol
+from .transport import FrameReceiver, FrameSender, Transport
+
+logger = logging.getLogger(__name__)
+
+SHM_HOST = 'shm'
+DEFAULT_CAPACITY = 8 << 20
+MAGIC = b'MCSRING1'
+
+_INFO = struct.Struct('8sQ')  # assinatura, capacidade
+_WORD = struct.Struct('Q')  # nativo: acesso alinhado de 8 bytes
+_LENGTH = struct.Struct('I')
+_HEAD, _CLOSED = 64, 72  # linha do produtor
+_TAIL, _WAITING, _ATTACHED = 128, 136, 144  # linha do consumidor
+_DATA = 192
+_WRAP = 0xFFFFFFFF
+
+_HELLO = b'H'
+_BELL = b'B'
+_BYE = b'C'
+
+# Segmentos criados por este processo (ver ``_attach``)
+_created = set()
+
+
+def is_shm(host):
+    """``True`` se ``host`` escolhe o transporte por memória compartilhada"""
+    return host.strip().lower() == SHM_HOST
+
+
+def _align(size):
+    return (size + 7) & ~7
+
+
+def _attach(name):
+    """Abre um segmento criado por outro processo sem assumir a sua remoção"""
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        # Python < 3.13: o rastreador de recursos apagaria o segmento do remetente quando o receptor saísse
+        shm = shared_memory.SharedMemory(name)
+        if os.name == 'posix' and shm.name not in _created:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+class ShmRing:
+    """Anel SPSC sobre um segmento de memória compartilhada"""
+
+    def __init__(self, shm):
+        self.shm = shm
+        magic, capacity = _INFO.unpack_from(shm.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Segmento {shm.name} não é um anel de quadros")
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.data = shm.buf[_DATA:_DATA + capacity]
+
+    @classmethod
+    def create(cls, capacity=DEFAULT_CAPACITY):
+        if capacity < 4096 or capacity & (capacity - 1):
+            raise ValueError("Capacidade do anel deve ser uma potência de 2 de pelo menos 4096 bytes")
+        shm = shared_memory.SharedMemory(create=True, size=_DATA + capacity)
+        _created.add(shm.name)
+        shm.buf[:_DATA] = bytes(_DATA)
+        _INFO.pack_into(shm.buf, 0, MAGIC, capacity)
+        return cls(shm)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(_attach(name))
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def _get(self, offset):
+        return _WORD.unpack_from(self.shm.buf, offset)[0]
+
+    def _set(self, offset, value):
+        _WORD.pack_into(self.shm.buf, offset, value)
+
+    head = property(lambda self: self._get(_HEAD), lambda self, value: self._set(_HEAD, value))
+    closed = property(lambda self: self._get(_CLOSED), lambda self, value: self._set(_CLOSED, value))
+    tail = property(lambda self: self._get(_TAIL), lambda self, value: self._set(_TAIL, value))
+    waiting = property(lambda self: self._get(_WAITING), lambda self, value: self._set(_WAITING, value))
+    attached = property(lambda self: self._get(_ATTACHED), lambda self, value: self._set(_ATTACHED, value))
+
+    def close(self, unlink=False):
+        self.data.release()
+        try:
+            self.shm.close()
+        except BufferError:
+            # Alguma fatia do anel ainda está viva; o mapeamento some com ela
+            logger.warning("Segmento %s ainda em uso ao fechar", self.name)
+        if unlink:
+            _created.discard(self.name)
+            self.shm.unlink()
+
+
+class ShmSender(FrameSender):
+    """Produtor do anel: ``submit`` copia o quadro para o anel, ``submit_encrypted`` o codifica lá dentro
+
+    Como no ``LoopbackSender``, o envio não espera o receptor: com o anel
+    cheio o future recebe ``queue.Full``; sem receptor (após reanunciar o
+    segmento por até 100 ms), ``ConnectionRefusedError``. As
+    chamadas de várias threads são serializadas (o anel tem um só produtor).
+    """
+
+    def __init__(self, host=SHM_HOST, port=12349, capacity=DEFAULT_CAPACITY, **options):
+        self.host = host
+        self.port = port
+        self.capacity = capacity
+
+        self.frames_sent = 0
+        self.bells = 0
+
+        self.ring = None
+        self.sock = None
+        self._head = 0
+        self._last_hello = 0.0
+        self._lock = threading.Lock()
+
+    def start_in_thread(self):
+        self.ring = ShmRing.create(self.capacity)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.connect(('127.0.0.1', self.port))
+        self._hello()
+
+    def _signal(self, message):
+        try:
+            self.sock.send(message)
+        except ConnectionRefusedError:
+            # Erro ICMP pendente de um envio anterior, sem receptor: este datagrama não saiu
+            try:
+                self.sock.send(message)
+            except OSError:
+                pass
+        except OSError:
+            pass
+
+    def _hello(self):
+        """Anuncia o segmento ao receptor (no máximo a cada 50 ms)"""
+        now = time.monotonic()
+        if now - self._last_hello >= 0.05:
+            self._last_hello = now
+            self._signal(_HELLO + self.ring.name.encode())
+
+    @property
+    def connected(self):
+        return bool(self.ring is not None and self.ring.attached)
+
+    def wait_connected(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.connected:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            self._hello()
+            time.sleep(0.005)
+        return True
+
+    def _reserve(self, size):
+        """Reserva um registro para um quadro de ``size`` bytes; retorna ``(posição, fatia gravável)``"""
+        ring = self.ring
+        # Receptor ausente ou reiniciado: reanunciar o segmento e esperar um pouco por ele
+        if not ring.attached and not self.wait_connected(0.1):
+            raise ConnectionRefusedError(f"Nenhum receptor em {SHM_HOST}:{self.port}")
+        record = _align(_LENGTH.size + size)
+        if record > ring.capacity // 2:
+            raise ValueError(f"Quadro grande demais para o anel: {size} bytes")
+        pos = self._head & ring.mask
+        # Um registro nunca dá a volta no anel: o resto do fim fica vazio
+        skip = ring.capacity - pos if record > ring.capacity - pos else 0
+        if ring.capacity - (self._head - ring.tail) < skip + record:
+            raise queue.Full(f"Anel de memória compartilhada cheio ({SHM_HOST}:{self.port})")
+        if skip:
+            _LENGTH.pack_into(ring.data, pos, _WRAP)
+            pos = 0
+        return pos, ring.data[pos + _LENGTH.size:pos + _LENGTH.size + size]
+
+    def _commit(self, pos, size):
+        ring = self.ring
+        _LENGTH.pack_into(ring.data, pos, size)
+        if pos != self._head & ring.mask:
+            self._head += ring.capacity - (self._head & ring.mask)
+        self._head += _align(_LENGTH.size + size)
+        # Publicado só depois dos dados
+        ring.head = self._head
+        self.frames_sent += 1
+        if ring.waiting:
+            self.bells += 1
+            self._signal(_BELL)
+
+    def _write(self, size, fill):
+        future = concurrent.futures.Future()
+        try:
+            with self._lock:
+                pos, view = self._reserve(size)
+                with metrics.stage('send', size):
+                    fill(view)
+                del view
+                self._commit(pos, size)
+        except (queue.Full, ValueError, ConnectionError) as e:
+            future.set_exception(e)
+            return future
+        future.set_result(size)
+        return future
+
+    def submit(self, frame):
+        def fill(view):
+            view[:] = frame
+
+        return self._write(len(frame), fill)
+
+    def submit_encrypted(self, encrypted, mode=WireProtocol.MODE_SYMBOLS, line_code=None, protection=None):
+        """Codifica ``encrypted`` direto no anel, sem montar o quadro antes"""
+        code = get_line_code(line_code)
+        protection = protection_id(protection)
+        payload = protect(encrypted.encode('ascii'), protection)
+        size = WireProtocol.frame_size(len(payload), mode, code)
+        return self._write(size, lambda view: WireProtocol.encode_frame_into(view, payload, mode, code, protection))
+
+    def stop_in_thread(self):
+        """Fecha o anel; o receptor ainda entrega o que já foi escrito antes de soltá-lo"""
+        if self.ring is None:
+            return
+        with self._lock:
+            self.ring.closed = 1
+            self._signal(_BYE)
+            self.sock.close()
+            self.ring.close(unlink=True)
+            self.ring = None
+
+
+class ShmReceiver(FrameReceiver):
+    """Consumidor dos anéis dos remetentes, com uma thread de leitura
+
+    Cada remetente é uma "conexão" (``peer`` = ``("shm", nome do
+    segmento)``). A thread percorre os anéis, decodifica os quadros direto
+    na memória compartilhada e os entrega a ``consumer(received_data,
+    peer)``; sem quadros, dorme no socket até a campainha de um produtor.
+    """
+
+    def __init__(self, consumer, host=SHM_HOST, port=12349, on_connection=None, wait_timeout=0.02, **options):
+        self.consumer = consumer
+        self.host = host
+        self.port = port
+        self.on_connection = on_connection
+        self.wait_timeout = wait_timeout
+
+        self.frames_received = 0
+        self.wakeups = 0
+
+        self.sock = None
+        self._rings = {}
+        self._running = False
+        self._thread = None
+
+    @property
+    def active_connections(self):
+        return len(self._rings)
+
+    def start_in_thread(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', self.port))
+        self.sock = sock
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop_in_thread(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        for name in list(self._rings):
+            self._detach(name)
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def _attach(self, name):
+        if name in self._rings:
+            return
+        try:
+            ring = ShmRing.attach(name)
+        except (OSError, ValueError) as e:
+            logger.warning("Segmento %s recusado: %s", name, e)
+            return
+        ring.attached = 1
+        self._rings[name] = ring
+        if self.on_connection:
+            self.on_connection((SHM_HOST, name), len(self._rings))
+
+    def _detach(self, name):
+        ring = self._rings.pop(name)
+        ring.attached = 0
+        ring.waiting = 0
+        ring.close()
+        if self.on_connection:
+            self.on_connection((SHM_HOST, name), len(self._rings))
+
+    def _poll(self, timeout):
+        """Trata os avisos dos remetentes; espera até ``timeout`` pelo primeiro (0 = não espera)"""
+        self.sock.settimeout(timeout)
+        while True:
+            try:
+                message = self.sock.recv(256)
+            except (BlockingIOError, socket.timeout):
+                return
+            except OSError as e:
+                logger.warning("Socket de sinalização %s:%s encerrado: %s", SHM_HOST, self.port, e)
+                self._running = False
+                return
+            if timeout:
+                self.wakeups += 1
+                timeout = 0
+                self.sock.settimeout(0)
+            if message[:1] == _HELLO:
+                self._attach(message[1:].decode())
+
+    def _drain(self, name, ring):
+        """Entrega os quadros disponíveis no anel; retorna quantos registros leu"""
+        peer = (SHM_HOST, name)
+        data = ring.data
+        tail = ring.tail
+        head = ring.head
+        count = 0
+        while tail != head:
+            pos = tail & ring.mask
+            (length,) = _LENGTH.unpack_from(data, pos)
+            if length == _WRAP:
+                tail += ring.capacity - pos
+                continue
+            received_data = None
+            try:
+                received_data = WireProtocol.decode_frame(data[pos + _LENGTH.size:pos + _LENGTH.size + length])
+            except Exception:
+                logger.exception("Quadro inválido no anel (%s)", peer)
+            tail += _align(_LENGTH.size + length)
+            # O quadro decodificado não aponta para o anel: o espaço já pode ser reutilizado
+            ring.tail = tail
+            count += 1
+            if received_data is None or WireProtocol.is_ping(received_data):
+                continue
+            self.frames_received += 1
+            try:
+                self.consumer(received_data, peer)
+            except Exception:
+                logger.exception("Erro no consumidor de quadros (%s)", peer)
+        if ring.closed and ring.head == tail:
+            self._detach(name)
+        return count
+
+    def _run(self):
+        while self._running:
+            self._poll(0)
+            if sum(self._drain(name, ring) for name, ring in list(self._rings.items())):
+                continue
+            # Sem quadros: marcar a espera e conferir de novo antes de dormir
+            rings = list(self._rings.values())
+            for ring in rings:
+                ring.waiting = 1
+            if all(ring.head == ring.tail for ring in rings):
+                self._poll(self.wait_timeout)
+            for ring in rings:
+                if ring.name in self._rings:
+                    ring.waiting = 0
+
+
+class ShmTransport(Transport):
+    """Anéis em memória compartilhada entre processos da mesma máquina; o host é ignorado"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+
+    def connect(self, host, port, timeout=None):
+        raise NotImplementedError("Memória compartilhada não tem socket de fluxo; use sender()")
+
+    def sender(self, host, port, **options):
+        options.setdefault('capacity', self.capacity)
+        return ShmSender(host, port, **options)
+
+    def receiver(self, consumer, host, port, **options):
+        return ShmReceiver(consumer, host, port, **options)
@@ -0,0 +1,81 @@
+"""Fluxo criptografado AES-GCM em vários quadros, sem Base64
+
+O remetente lê a mensagem em blocos de um iterador, cifra cada bloco com
+AES-256-GCM e envia o texto cifrado bruto já em símbolos Manchester
+empacotados. Um fluxo é a sequência de quadros::
+
+    MODE_STREAM_START (nonce) → MODE_STREAM_DATA (bloco)* → MODE_STREAM_END (tag)
+
+A memória usada em cada ponta depende só do tamanho do bloco, não do
+tamanho da mensagem. O receptor verifica a tag no último quadro.
+"""
+from .crypto import StreamDecryptor, StreamEncryptor
+from .encoder import ManchesterEncoder
+from .protocol import WireProtocol
+
+DEFAULT_CHUNK_SIZE = 64 << 10
+
+
+def iter_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Gera blocos de ``source``: bytes/memoryview, arquivo binário ou iterável de bytes"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source).cast('B')
+        for start in range(0, len(view), chunk_size):
+            yield view[start:start + chunk_size]
+    elif hasattr(source, 'read'):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    else:
+        yield from source
+
+
+def encode_stream(key, chunks):
+    """Gera os quadros de um fluxo cifrado a partir de um iterador de blocos"""
+    encryptor = StreamEncryptor(key)
+    yield WireProtocol.pack_frame(WireProtocol.MODE_STREAM_START, encryptor.nonce)
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        ciphertext = encryptor.update(chunk)
+        yield WireProtocol.pack_frame(WireProtocol.MODE_STREAM_DATA, ManchesterEncoder.encode_packed(ciphertext),
+                                      len(ciphertext) * 16)
+    yield WireProtocol.pack_frame(WireProtocol.MODE_STREAM_END, encryptor.finalize())
+
+
+class StreamReceiver:
+    """Máquina de estados do receptor para um fluxo por conexão
+
+    ``feed`` recebe os dicionários de ``WireProtocol.decode_frame`` na ordem
+    de chegada e entrega o texto claro de cada bloco a ``sink``. Retorna
+    ``True`` quando o fluxo termina com a tag verificada; se a verificação
+    falhar, lança ``ValueError`` e o que foi entregue deve ser descartado.
+    """
+
+    def __init__(self, key, sink):
+        self.key = key
+        self.sink = sink
+        self.decryptor = None
+        self.bytes_received = 0
+
+    @staticmethod
+    def is_stream_frame(received_data):
+        return received_data.get("mode") in WireProtocol.STREAM_MODES
+
+    def feed(self, received_data):
+        mode, payload = received_data["mode"], received_data["payload"]
+        if mode == WireProtocol.MODE_STREAM_START:
+            self.decryptor = StreamDecryptor(self.key, payload)
+            self.bytes_received = 0
+            return False
+        if self.decryptor is None:
+            raise ValueError("Quadro de fluxo recebido antes do início do fluxo")
+        if mode == WireProtocol.MODE_STREAM_DATA:
+            self.bytes_received += len(payload)
+            self.sink(self.decryptor.update(payload))
+            return False
+        decryptor, self.decryptor = self.decryptor, None
+        decryptor.finalize(payload)
+        return True
@@ -0,0 +1,579 @@
+"""Transporte TCP: envio de quadros, pool de conexões do remetente e servidor receptor assíncrono
+
+A GUI, a CLI e o gerador de carga falam com a rede pela interface
+``Transport`` (``connect``, ``sender``, ``receiver``). ``TcpTransport`` usa
+sockets reais (com ``reliable=True``, o remetente confirma cada quadro pelo
+protocolo de ``manchester.reliable``); ``manchester.loopback.LoopbackTransport`` implementa a mesma
+interface dentro do processo, sem rede, e ``manchester.shm.ShmTransport``
+entre processos da mesma máquina, por memória compartilhada.
+"""
+import asyncio
+import concurrent.futures
+import logging
+import socket
+import threading
+
+from .metrics import metrics
+from .protocol import LengthPrefixFramer, WireProtocol
+from .reliable import ACK_DELAY, ACK_EVERY, ReliableReceiver, SendWindow
+
+logger = logging.getLogger(__name__)
+
+
+def connect(host, port, timeout=None):
+    """Abre uma conexão TCP com o receptor"""
+    return socket.create_connection((host, port), timeout=timeout)
+
+
+def send_frame(sock, frame):
+    """Envia um quadro com prefixo de comprimento"""
+    data = LengthPrefixFramer.pack(frame)
+    with metrics.stage('send', len(data)):
+        sock.sendall(data)
+
+
+class FrameSender:
+    """Interface do lado remetente: quadros enfileirados, entregues de forma assíncrona"""
+
+    def start_in_thread(self):
+        raise NotImplementedError
+
+    def wait_connected(self, timeout=None):
+        """Espera até que o receptor esteja acessível; retorna ``True`` se estiver"""
+        raise NotImplementedError
+
+    def submit(self, frame):
+        """Enfileira ``frame`` sem bloquear; retorna um ``concurrent.futures.Future``"""
+        raise NotImplementedError
+
+    def submit_encrypted(self, encrypted, mode=WireProtocol.MODE_SYMBOLS, line_code=None, protection=None):
+        """Monta o quadro de ``encrypted`` (``WireProtocol.encode_frame``) e o enfileira com ``submit``
+
+        Remetentes que escrevem o quadro direto no meio de transporte (como o
+        de ``manchester.shm``) sobrescrevem este método para evitar a cópia.
+        """
+        return self.submit(WireProtocol.encode_frame(encrypted, mode, line_code, protection))
+
+    def stop_in_thread(self):
+        raise NotImplementedError
+
+
+class FrameReceiver:
+    """Interface do lado receptor
+
+    Entrega cada quadro decodificado (exceto pings) a ``consumer(received_data,
+    peer)`` e avisa ``on_connection(peer, active_connections)`` quando um
+    remetente conecta ou desconecta.
+    """
+
+    def start_in_thread(self):
+        raise NotImplementedError
+
+    def stop_in_thread(self):
+        raise NotImplementedError
+
+
+class Transport:
+    """Fábrica de conexões, remetentes e receptores para um meio de transporte"""
+
+    def connect(self, host, port, timeout=None):
+        """Abre um socket (ou objeto equivalente) para envio direto com ``send_frame``"""
+        raise NotImplementedError
+
+    def sender(self, host, port, **options):
+        """Cria um ``FrameSender`` para o receptor em ``host:port``"""
+        raise NotImplementedError
+
+    def receiver(self, consumer, host, port, **options):
+        """Cria um ``FrameReceiver`` escutando em ``host:port``"""
+        raise NotImplementedError
+
+    def fanout(self, targets, **options):
+        """Cria um ``FrameSender`` que entrega cada quadro a todos os ``(host, porta)`` de ``targets``"""
+        raise NotImplementedError
+
+
+class TcpTransport(Transport):
+    """Transporte TCP real: ``SenderPool``, ``AsyncReceiverServer`` e ``manchester.fanout.FanOutSender``"""
+
+    def connect(self, host, port, timeout=None):
+        return connect(host, port, timeout)
+
+    def sender(self, host, port, reliable=False, **options):
+        if reliable:
+            return ReliableSender(host, port, **options)
+        return SenderPool(host, port, **options)
+
+    def receiver(self, consumer, host, port, **options):
+        return AsyncReceiverServer(consumer, host, port, **options)
+
+    def fanout(self, targets, **options):
+        from .fanout import FanOutSender
+        return FanOutSender(targets, **options)
+
+
+class SenderPool(FrameSender):
+    """Pool persistente de conexões do remetente com um receptor
+
+    Mantém ``size`` conexões abertas em um laço asyncio próprio. Cada
+    conexão consome a fila de envio compartilhada e escreve vários quadros
+    seguidos sem esperar o anterior (pipelining); ``submit`` apenas enfileira
+    e retorna um ``concurrent.futures.Future`` concluído quando o quadro foi
+    escrito no socket. Conexões perdidas são reabertas com espera
+    exponencial e o quadro em trânsito volta para a fila. Conexões ociosas
+    enviam pings periódicos para detectar receptores que caíram.
+    """
+
+    def __init__(self, host, port, size=2, queue_size=1024, ping_interval=5.0,
+                 backoff_initial=0.5, backoff_max=30.0, connect_timeout=5.0):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.queue_size = queue_size
+        self.ping_interval = ping_interval
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.connect_timeout = connect_timeout
+
+        self.connected = 0
+        self.frames_sent = 0
+        self.reconnects = 0
+
+        self.loop = None
+        self.queue = None
+        self._workers = []
+        self._thread = None
+        self._connected_event = threading.Event()
+
+    def start_in_thread(self):
+        """Inicia o laço de eventos do pool em uma thread própria"""
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.start(), self.loop).result()
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(self.queue_size)
+        self._workers = [self.loop.create_task(self._connection_worker(i)) for i in range(self.size)]
+
+    def wait_connected(self, timeout=None):
+        """Espera até que ao menos uma conexão esteja aberta"""
+        return self._connected_event.wait(timeout)
+
+    def submit(self, frame):
+        """Enfileira um quadro para envio sem bloquear (seguro entre threads)"""
+        future = concurrent.futures.Future()
+
+        def enqueue():
+            try:
+                self.queue.put_nowait((LengthPrefixFramer.pack(frame), future))
+            except asyncio.QueueFull:
+                future.set_exception(asyncio.QueueFull("Fila de envio cheia"))
+
+        self.loop.call_soon_threadsafe(enqueue)
+        return future
+
+    def stop_in_thread(self):
+        """Encerra as conexões e o laço iniciado com ``start_in_thread``"""
+        if self.loop and self._thread:
+            asyncio.run_coroutine_threadsafe(self.stop(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+
+    async def stop(self):
+        # No Python 3.11, wait_for descarta o cancelamento se a conexão terminar
+        # no mesmo instante; por isso os workers são cancelados até encerrarem
+        pending = set(self._workers)
+        while pending:
+            for worker in pending:
+                worker.cancel()
+            _, pending = await asyncio.wait(pending, timeout=0.1)
+        while not self.queue.empty():
+            _, future = self.queue.get_nowait()
+            future.cancel()
+
+    async def _connection_worker(self, index):
+        backoff = self.backoff_initial
+        while True:
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port),
+                                                        self.connect_timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                logger.info("Conexão %d com %s:%s falhou: %s (nova tentativa em %.1fs)",
+                            index, self.host, self.port, e, backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.backoff_max)
+                continue
+
+            backoff = self.backoff_initial
+            self.connected += 1
+            self._connected_event.set()
+            try:
+                await self._pump(reader, writer)
+            except (OSError, ConnectionError) as e:
+                logger.info("Conexão %d com %s:%s perdida: %s", index, self.host, self.port, e)
+            finally:
+                self.connected -= 1
+                if not self.connected:
+                    self._connected_event.clear()
+                writer.close()
+            self.reconnects += 1
+
+    async def _pump(self, reader, writer):
+        """Escreve quadros da fila até a conexão cair"""
+        # O receptor não envia dados: EOF na leitura indica que ele fechou a conexão
+        closed = self.loop.create_task(reader.read(1))
+        ping = LengthPrefixFramer.pack(WireProtocol.ping_frame())
+        get = None
+        try:
+            while True:
+                get = self.loop.create_task(self.queue.get())
+                done, _ = await asyncio.wait({get, closed}, timeout=self.ping_interval,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if closed in done:
+                    if get in done:
+                        await self.queue.put(get.result())
+                    else:
+                        get.cancel()
+                    raise ConnectionError("Receptor encerrou a conexão")
+                if get not in done:
+                    get.cancel()
+                    writer.write(ping)
+                    await writer.drain()
+                    continue
+
+                data, future = get.result()
+                if future.cancelled():
+                    continue
+                try:
+                    with metrics.stage('send', len(data)):
+                        writer.write(data)
+                        await writer.drain()  # só espera quando o buffer de escrita passa do limite
+                except (OSError, ConnectionError):
+                    await self.queue.put((data, future))
+                    raise
+                self.frames_sent += 1
+                future.set_result(len(data))
+        finally:
+            closed.cancel()
+            if get:
+                get.cancel()
+
+
+class ReliableSender(SenderPool):
+    """Remetente com confirmação, janela deslizante e retransmissão
+
+    Usa uma única conexão (a ordem das sequências importa) e o estado de
+    ``manchester.reliable.SendWindow``: no máximo ``window`` quadros sem
+    confirmação e nunca mais do que o crédito anunciado pelo receptor. O
+    future de ``submit`` só é concluído quando o receptor confirma que
+    decodificou e verificou o quadro; quadros rejeitados (NACK) são
+    retransmitidos e, após ``max_retries`` rejeições, o future recebe
+    ``DeliveryError``. Ao reconectar, tudo que não foi confirmado é reenviado.
+    """
+
+    def __init__(self, host, port, window=64, queue_size=1024, max_retries=3, **options):
+        options.pop('size', None)
+        super().__init__(host, port, size=1, queue_size=queue_size, **options)
+        self.send_window = SendWindow(window, max_retries)
+        self._wakeup = None
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        await super().start()
+
+    def submit(self, frame):
+        """Enfileira um quadro sem bloquear; o future é concluído com o ACK do receptor"""
+        future = concurrent.futures.Future()
+
+        def enqueue():
+            try:
+                self.queue.put_nowait((frame, future))
+            except asyncio.QueueFull:
+                future.set_exception(asyncio.QueueFull("Fila de envio cheia"))
+                return
+            self._wakeup.set()
+
+        self.loop.call_soon_threadsafe(enqueue)
+        return future
+
+    async def stop(self):
+        await super().stop()
+        self.send_window.cancel()
+
+    async def _read_replies(self, reader):
+        """Processa ACKs e NACKs do receptor até a conexão cair"""
+        window = self.send_window
+        try:
+            while True:
+                prefix = await reader.readexactly(LengthPrefixFramer.PREFIX.size)
+                (length,) = LengthPrefixFramer.PREFIX.unpack(prefix)
+                frame = await reader.readexactly(length)
+                mode = WireProtocol.peek_mode(frame)
+                if mode == WireProtocol.MODE_ACK:
+                    window.on_ack(frame)
+                elif mode == WireProtocol.MODE_NACK:
+                    window.on_nack(frame)
+                self._wakeup.set()
+        except asyncio.IncompleteReadError:
+            raise ConnectionError("Receptor encerrou a conexão") from None
+        except ValueError as e:
+            raise ConnectionError(f"Resposta inválida do receptor: {e}") from None
+
+    async def _write_ready(self, writer):
+        """Escreve retransmissões e, enquanto a janela e o crédito permitirem, quadros novos"""
+        window = self.send_window
+        while True:
+            data = window.next_retransmission()
+            if data is None:
+                if self.queue.empty() or not window.can_send():
+                    return
+                frame, future = self.queue.get_nowait()
+                if future.cancelled():
+                    continue
+                data = window.push(frame, future)
+                self.frames_sent += 1
+            with metrics.stage('send', len(data)):
+                writer.write(data)
+                await writer.drain()
+
+    async def _pump(self, reader, writer):
+        replies = self.loop.create_task(self._read_replies(reader))
+        ping = LengthPrefixFramer.pack(WireProtocol.ping_frame())
+        self.send_window.restart()
+        self._wakeup.set()
+        wakeup = None
+        try:
+            while True:
+                wakeup = self.loop.create_task(self._wakeup.wait())
+                done, _ = await asyncio.wait({wakeup, replies}, timeout=self.ping_interval,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if replies in done:
+                    replies.result()
+                if wakeup not in done:
+                    writer.write(ping)
+                    await writer.drain()
+                    continue
+                self._wakeup.clear()
+                await self._write_ready(writer)
+        finally:
+            replies.cancel()
+            if wakeup:
+                wakeup.cancel()
+
+
+class AsyncReceiverServer(FrameReceiver):
+    """Servidor receptor assíncrono (asyncio) para múltiplos remetentes
+
+    Cada conexão é lida por um ``StreamReader`` próprio no mesmo laço de
+    eventos. Os quadros decodificados são colocados em uma fila limitada e
+    entregues, em ordem, ao ``consumer(received_data, peer)``; quando a fila
+    enche, a leitura das conexões pausa e o TCP aplica contrapressão.
+
+    Quadros de um ``ReliableSender`` passam por ``verify(received_data)``
+    (padrão: CRC32 do FEC; ``manchester.reliable.decrypt_verifier`` também
+    decifra) antes de entrar na fila e são respondidos com NACK ou, depois
+    de enfileirados, com ACKs agrupados (``ACK_EVERY`` quadros ou
+    ``ACK_DELAY`` segundos) que levam o crédito (vagas livres na fila).
+    Quando o crédito anunciado fica baixo, um novo ACK é enviado assim que
+    o consumidor libera a fila.
+    """
+
+    def __init__(self, consumer, host='0.0.0.0', port=12349, max_connections=512,
+                 idle_timeout=60.0, queue_size=1024, max_frame_size=LengthPrefixFramer.MAX_FRAME_SIZE,
+                 on_connection=None, verify=None, max_sessions=1024):
+        self.consumer = consumer
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.queue_size = queue_size
+        self.max_frame_size = max_frame_size
+        self.on_connection = on_connection
+        self.reliable = ReliableReceiver(verify, max_sessions)
+
+        self.active_connections = 0
+        self.rejected_connections = 0
+        self.idle_timeouts = 0
+        self.frames_received = 0
+
+        self.loop = None
+        self.server = None
+        self.queue = None
+        self._dispatcher = None
+        self._thread = None
+        self._writers = set()
+        self._handlers = set()
+        self._pending_acks = {}  # writer → sessões a confirmar
+        self._pending_count = 0
+        self._ack_timer = None
+        self._starved = {}
+
+    async def start(self):
+        """Abre o socket de escuta e inicia a entrega de quadros ao consumidor"""
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(self.queue_size)
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                 backlog=self.max_connections)
+        self._dispatcher = self.loop.create_task(self._dispatch())
+
+    async def serve_forever(self):
+        """Executa o servidor até ser cancelado (modo sem interface gráfica)"""
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        """Fecha o socket de escuta e interrompe a entrega de quadros"""
+        if self.server:
+            self.server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self.server.wait_closed()
+        # Com os writers fechados as conexões terminam por EOF; as que seguirem
+        # presas (fila cheia) são canceladas aqui, antes de o laço parar
+        if self._handlers:
+            await asyncio.wait(list(self._handlers), timeout=1.0)
+        tasks = list(self._handlers)
+        if self._dispatcher:
+            tasks.append(self._dispatcher)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def start_in_thread(self):
+        """Executa o laço de eventos em uma thread própria (para uso com Tk)"""
+        loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=loop.run_forever, daemon=True)
+        self._thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(self.start(), loop).result()
+        except Exception:
+            loop.call_soon_threadsafe(loop.stop)
+            raise
+
+    def stop_in_thread(self):
+        """Encerra o servidor iniciado com ``start_in_thread``"""
+        if self.loop and self._thread:
+            asyncio.run_coroutine_threadsafe(self.stop(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+
+    async def _dispatch(self):
+        while True:
+            received_data, peer = await self.queue.get()
+            if self._starved:
+                starved, self._starved = self._starved, {}
+                for writer, sessions in starved.items():
+                    self._schedule_acks(writer, sessions)
+            try:
+                self.consumer(received_data, peer)
+            except Exception:
+                logger.exception("Erro no consumidor de quadros (%s)", peer)
+
+    def _schedule_acks(self, writer, sessions):
+        self._pending_acks.setdefault(writer, set()).update(sessions)
+        self._pending_count += 1
+        if self._pending_count >= ACK_EVERY:
+            self._flush_acks()
+        elif self._ack_timer is None:
+            self._ack_timer = self.loop.call_later(ACK_DELAY, self._flush_acks)
+
+    def _flush_acks(self):
+        """Envia os ACKs acumulados, um por sessão"""
+        if self._ack_timer is not None:
+            self._ack_timer.cancel()
+            self._ack_timer = None
+        credit = self.queue.maxsize - self.queue.qsize()
+        pending, self._pending_acks = self._pending_acks, {}
+        self._pending_count = 0
+        for writer, sessions in pending.items():
+            if writer.is_closing():
+                continue
+            for session in sessions:
+                frame = self.reliable.ack(session, credit)
+                if frame is not None:
+                    writer.write(LengthPrefixFramer.pack(frame))
+            if credit < self.queue.maxsize // 4:
+                self._starved.setdefault(writer, set()).update(sessions)
+
+    async def _read_frame(self, reader):
+        prefix = await asyncio.wait_for(reader.readexactly(LengthPrefixFramer.PREFIX.size), self.idle_timeout)
+        (length,) = LengthPrefixFramer.PREFIX.unpack(prefix)
+        if length > self.max_frame_size:
+            raise ValueError(f"Quadro excede o tamanho máximo: {length} bytes")
+        # Só o corpo é medido: a espera pelo prefixo é ociosidade, não latência
+        with metrics.stage('recv', length):
+            return await asyncio.wait_for(reader.readexactly(length), self.idle_timeout)
+
+    async def _handle_connection(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        if self.active_connections >= self.max_connections:
+            self.rejected_connections += 1
+            writer.close()
+            return
+
+        self.active_connections += 1
+        self._writers.add(writer)
+        self._handlers.add(asyncio.current_task())
+        if self.on_connection:
+            self.on_connection(peer, self.active_connections)
+        try:
+            while True:
+                try:
+                    frame = await self._read_frame(reader)
+                except asyncio.IncompleteReadError as e:
+                    if e.partial:
+                        logger.warning("Conexão %s encerrada no meio de um quadro", peer)
+                    break
+                if WireProtocol.peek_mode(frame) == WireProtocol.MODE_RELIABLE_DATA:
+                    session, received_data, nack = self.reliable.receive(frame)
+                    if nack is not None:
+                        writer.write(LengthPrefixFramer.pack(nack))
+                        continue
+                    if received_data is not None:
+                        self.frames_received += 1
+                        await self.queue.put((received_data, peer))
+                    # Confirmado só depois de enfileirado
+                    self._schedule_acks(writer, (session,))
+                    continue
+                received_data = WireProtocol.decode_frame(frame)
+                if WireProtocol.is_ping(received_data):
+                    continue
+                self.frames_received += 1
+                await self.queue.put((received_data, peer))
+        except asyncio.TimeoutError:
+            self.idle_timeouts += 1
+        except (ConnectionError, ValueError) as e:
+            logger.warning("Conexão %s encerrada: %s", peer, e)
+        except asyncio.CancelledError:
+            # Cancelada por stop(): o callback do StreamReaderProtocol registraria o erro
+            pass
+        finally:
+            self.active_connections -= 1
+            self._writers.discard(writer)
+            self._starved.pop(writer, None)
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
+            if self.on_connection:
+                self.on_connection(peer, self.active_connections)
+
+
+class HeadlessSink:
+    """Consumidor de quadros sem interface gráfica (contadores e callback opcional)"""
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.frames = 0
+        self.symbols = 0
+        self.last_peer = None
+
+    def __call__(self, received_data, peer):
+        self.frames += 1
+        self.symbols += len(received_data.get("manchester", []))
+        self.last_peer = peer
+        if self.callback:
+            self.callback(received_data, peer)
@@ -0,0 +1,43 @@
+"""Preparação vetorizada de formas de onda para visualização
+
+Funções puramente NumPy usadas pelo renderizador da GUI: geram os pontos
+de uma forma de onda escalonada exata quando há poucos símbolos visíveis e
+reduzem por mín/máx à largura em pixels quando há muitos.
+"""
+import numpy as np
+
+
+def step_points(values, start, stop):
+    """Pontos (x, y) da forma de onda escalonada exata de ``values[start:stop]``
+
+    Para desenhar com ``drawstyle='steps-post'``: o último nível é repetido
+    para fechar o último símbolo.
+    """
+    segment = np.asarray(values[start:stop])
+    if not segment.size:
+        return np.empty(0), np.empty(0)
+    x = np.arange(start, stop + 1)
+    y = np.append(segment, segment[-1])
+    return x, y
+
+
+def minmax_decimate(values, start, stop, buckets):
+    """Reduz ``values[start:stop]`` a ``buckets`` pares (mín, máx)
+
+    Retorna pontos (x, y) que desenham, para cada grupo, um segmento vertical
+    do mínimo ao máximo — o envelope visível em um pixel — sem perder
+    transições isoladas como faria uma simples subamostragem.
+    """
+    segment = np.asarray(values[start:stop])
+    count = segment.size
+    if not count:
+        return np.empty(0), np.empty(0)
+    buckets = max(1, min(int(buckets), count))
+    edges = np.linspace(0, count, buckets + 1).astype(np.int64)[:-1]
+    mins = np.minimum.reduceat(segment, edges)
+    maxs = np.maximum.reduceat(segment, edges)
+    x = np.repeat(start + edges, 2)
+    y = np.empty(buckets * 2, dtype=segment.dtype)
+    y[0::2] = mins
+    y[1::2] = maxs
+    return x, y
@@ -1,120 +1,417 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
+from tkinter import ttk, scrolledtext, messagebox, filedialog, font as tkfont
 import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import threading
-import socket
-import json
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from matplotlib.collections import LineCollection
+import numpy as np
 import base64
 import os
-from Crypto.Cipher import AES
-from Crypto.Util.Padding import pad, unpad
+import time
 from Crypto.Random import get_random_bytes
-import numpy as np
 
-class ManchesterEncoder:
-    """Classe para codificação Manchester baseada no manchester_test_v2.py"""
-    
-    @staticmethod
-    def encode_binary_to_manchester(binary):
-        """Codifica binário em Manchester - Padrão IEEE 802.3"""
-        manchester = []
-        for bit in binary:
-            if bit == '0':
-                # 0 é codificado como transição alto-baixo (1,0)
-                manchester.extend([1, 0])
-            elif bit == '1':
-                # 1 é codificado como transição baixo-alto (0,1)
-                manchester.extend([0, 1])
-        return manchester
-    
-    @staticmethod
-    def decode_manchester_to_binary(manchester):
-        """Decodifica Manchester em binário"""
-        binary = ''
-        for i in range(0, len(manchester), 2):
-            if i + 1 < len(manchester):
-                if manchester[i] == 1 and manchester[i + 1] == 0:
-                    binary += '0'  # Alto-baixo representa 0
-                elif manchester[i] == 0 and manchester[i + 1] == 1:
-                    binary += '1'  # Baixo-alto representa 1
-        return binary
-    
-    @staticmethod
-    def validate_encoding(binary, manchester):
-        """Valida a codificação"""
-        if len(manchester) != len(binary) * 2:
-            return {'valid': False, 'error': 'Comprimento incorreto'}
-        
-        for i, bit in enumerate(binary):
-            manchester_pair = [manchester[i * 2], manchester[i * 2 + 1]]
-            
-            if bit == '0' and not (manchester_pair[0] == 1 and manchester_pair[1] == 0):
-                return {'valid': False, 'error': f"Erro no bit {i}: '0' deve ser codificado como '10'"}
-            if bit == '1' and not (manchester_pair[0] == 0 and manchester_pair[1] == 1):
-                return {'valid': False, 'error': f"Erro no bit {i}: '1' deve ser codificado como '01'"}
-        
-        return {'valid': True}
+from manchester import (
+    LoopbackTransport,
+    ManchesterEncoder,
+    ManchesterFrame,
+    TcpTransport,
+    WireProtocol,
+    binary_to_text,
+    bytes_to_binary,
+    decrypt_aes_256,
+    encrypt_aes_256,
+    text_to_binary,
+)
+from manchester.events import EventQueue
+from manchester.fec import PROTECTIONS
+from manchester.fanout import parse_targets
+from manchester.filetransfer import FileReceiver, send_file
+from manchester.linecode import MANCHESTER, get_line_code, line_code_names
+from manchester.metrics import metrics
+from manchester.multicast import MulticastTransport, is_multicast
+from manchester.pipeline import JobCancelled, SendPipeline
+from manchester.preview import IncrementalEncoder
+from manchester.reliable import default_verify
+from manchester.shm import ShmTransport, is_shm
+from manchester.stream import StreamReceiver
+from manchester.waveform import minmax_decimate, step_points
+
+class WaveformRenderer:
+    """Renderizador da forma de onda Manchester com nível de detalhe
+
+    Os artistas do Matplotlib são criados uma única vez e atualizados com
+    ``set_data``. A cada mudança de zoom/rolagem só o trecho visível é
+    desenhado: exatamente quando há poucos símbolos por pixel, e reduzido
+    por mín/máx à largura do eixo caso contrário. Rótulos e separadores de
+    bit aparecem apenas quando o zoom mostra até ``LABEL_BIT_LIMIT`` bits;
+    em códigos de bloco (4B/5B) cada rótulo cobre um bloco inteiro.
+    """
+
+    LABEL_BIT_LIMIT = 64
+    EXACT_SYMBOLS_PER_PIXEL = 2
+    PREVIEW_CHARS = 64
+
+    def __init__(self, figure, ax, canvas):
+        self.figure = figure
+        self.ax = ax
+        self.canvas = canvas
+        self.bits = np.empty(0, dtype=np.uint8)
+        self.symbols = np.empty(0, dtype=np.uint8)
+        self.line_code = MANCHESTER
+
+        self.line, = ax.plot([], [], 'b-', linewidth=3, label='Sinal Manchester')
+        self.reference_lines = [
+            ax.axhline(y=0, color='red', linestyle='--', alpha=0.7, label='Nível Baixo (0V)'),
+            ax.axhline(y=1, color='green', linestyle='--', alpha=0.7, label='Nível Alto (1V)'),
+        ]
+        self.separators = LineCollection([], colors='gray', linestyles=':', alpha=0.8, linewidths=1)
+        ax.add_collection(self.separators)
+        self.bit_labels = []
+        self.pair_labels = []
+
+        self.info_text = ax.text(0.02, 0.98, '', transform=ax.transAxes,
+                                 verticalalignment='top', fontsize=10,
+                                 bbox=dict(boxstyle='round,pad=0.5', facecolor='white', alpha=0.9))
+        self.rules_text = ax.text(0.98, 0.98, MANCHESTER.rules,
+                                  transform=ax.transAxes, verticalalignment='top', horizontalalignment='right',
+                                  fontsize=10, bbox=dict(boxstyle='round,pad=0.5', facecolor='yellow', alpha=0.9))
+        self.placeholder = ax.text(0.5, 0.5, '', ha='center', va='center', transform=ax.transAxes,
+                                   fontsize=12, color='gray')
+
+        ax.set_ylim(-0.5, 1.5)
+        ax.set_ylabel('Amplitude (V)', fontsize=12)
+        ax.set_xlabel('Tempo (unidades de amostra)', fontsize=12)
+        self.legend = ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.05), ncol=3)
+        ax.grid(True, alpha=0.3)
+        figure.tight_layout()
+
+        ax.callbacks.connect('xlim_changed', lambda ax: self.refresh())
+        canvas.mpl_connect('scroll_event', self.on_scroll)
+
+    def _set_signal_visible(self, visible):
+        for artist in [self.line, self.separators, self.info_text, self.rules_text, self.legend] + self.reference_lines:
+            artist.set_visible(visible)
+        self.placeholder.set_visible(not visible)
+
+    def clear(self, message, title):
+        """Mostra apenas uma mensagem de instrução"""
+        self.bits = np.empty(0, dtype=np.uint8)
+        self.symbols = np.empty(0, dtype=np.uint8)
+        self.line.set_data([], [])
+        self._hide_labels(0)
+        self.separators.set_segments([])
+        self._set_signal_visible(False)
+        self.placeholder.set_text(message)
+        self.ax.set_title(title)
+        self.canvas.draw_idle()
+
+    def set_data(self, bits, symbols, title, line_code=MANCHESTER):
+        """Define os bits e símbolos completos e mostra o quadro inteiro"""
+        self.bits = np.asarray(bits, dtype=np.uint8)
+        self.symbols = np.asarray(symbols, dtype=np.uint8)
+        self.line_code = line_code
+        self._set_signal_visible(True)
+        self.ax.set_title(title, fontsize=14, fontweight='bold')
+        self.line.set_label(f'Sinal {line_code.label}')
+        self.legend.get_texts()[0].set_text(self.line.get_label())
+        self.rules_text.set_text(line_code.rules)
+        self.info_text.set_text(f'Dados binários: {self._preview(self.bits)}\n'
+                                f'{line_code.label}: {self._preview(self.symbols)}\n'
+                                f'Comprimento: {self.bits.size} bits → {self.symbols.size} símbolos')
+        self.ax.set_xlim(0, max(self.symbols.size, 1))  # dispara refresh()
+        self.canvas.draw_idle()
+
+    def update_data(self, bits, symbols, changed_start, changed_stop):
+        """Troca os dados após uma edição e redesenha só se o trecho alterado estiver visível
+
+        Se todo o sinal anterior estava visível, a janela acompanha o novo
+        comprimento (como ao digitar no fim da mensagem).
+        """
+        old_count = self.symbols.size
+        self.bits = np.asarray(bits, dtype=np.uint8)
+        self.symbols = np.asarray(symbols, dtype=np.uint8)
+        self.info_text.set_text(f'Dados binários: {self._preview(self.bits)}\n'
+                                f'{self.line_code.label}: {self._preview(self.symbols)}\n'
+                                f'Comprimento: {self.bits.size} bits → {self.symbols.size} símbolos')
+        x0, x1 = self.ax.get_xlim()
+        if x0 <= 0 and x1 >= old_count:
+            self.ax.set_xlim(0, max(self.symbols.size, 1))  # dispara refresh()
+        elif changed_start < x1 and changed_stop > x0:
+            self.refresh()
+        self.canvas.draw_idle()
+
+    def _preview(self, values):
+        text = ManchesterEncoder.bits_to_binary(values[:self.PREVIEW_CHARS])
+        return text + ('…' if values.size > self.PREVIEW_CHARS else '')
+
+    def refresh(self):
+        """Redesenha somente o trecho visível com o nível de detalhe adequado"""
+        count = self.symbols.size
+        if not count:
+            return
+        x0, x1 = self.ax.get_xlim()
+        start = min(count, max(0, int(np.floor(x0))))
+        stop = min(count, max(0, int(np.ceil(x1))))
+        pixels = max(1, int(self.ax.bbox.width))
+
+        if stop - start <= pixels * self.EXACT_SYMBOLS_PER_PIXEL:
+            x, y = step_points(self.symbols, start, stop)
+            self.line.set_drawstyle('steps-post')
+        else:
+            x, y = minmax_decimate(self.symbols, start, stop, pixels)
+            self.line.set_drawstyle('default')
+        self.line.set_data(x, y)
+
+        code = self.line_code
+        first_block = start // code.block_symbols
+        last_block = min(-(-self.bits.size // code.block_bits), -(-stop // code.block_symbols))
+        if (last_block - first_block) * code.block_bits <= self.LABEL_BIT_LIMIT:
+            self._draw_labels(first_block, last_block)
+        else:
+            self._hide_labels(0)
+            self.separators.set_segments([])
+
+    def _draw_labels(self, first_block, last_block):
+        bits, width = self.line_code.block_bits, self.line_code.block_symbols
+        indices = range(first_block, last_block)
+        self.separators.set_segments([[(i * width, -0.5), (i * width, 1.5)] for i in indices if i > 0])
+        while len(self.bit_labels) < len(indices):
+            self.bit_labels.append(self.ax.text(0, -0.3, '', ha='center', va='top', fontsize=10, clip_on=True,
+                                                bbox=dict(boxstyle='round,pad=0.3', facecolor='lightblue', alpha=0.8)))
+            self.pair_labels.append(self.ax.text(0, 1.3, '', ha='center', va='bottom', fontsize=9, color='blue',
+                                                 clip_on=True,
+                                                 bbox=dict(boxstyle='round,pad=0.2', facecolor='lightyellow', alpha=0.8)))
+        for label, pair_label, i in zip(self.bit_labels, self.pair_labels, indices):
+            x_pos = i * width + width / 2
+            label.set_position((x_pos, -0.3))
+            if bits == 1:
+                label.set_text(f'Bit {i}\n{self.bits[i]}')
+            else:
+                label.set_text(f'Bits {i * bits}-{i * bits + bits - 1}\n'
+                               f'{ManchesterEncoder.bits_to_binary(self.bits[i * bits:(i + 1) * bits])}')
+            label.set_visible(True)
+            pair = ManchesterEncoder.bits_to_binary(self.symbols[i * width:(i + 1) * width])
+            pair_label.set_position((x_pos, 1.3))
+            pair_label.set_text(f'→ {pair}')
+            pair_label.set_visible(True)
+        self._hide_labels(len(indices))
+
+    def _hide_labels(self, keep):
+        for label, pair_label in zip(self.bit_labels[keep:], self.pair_labels[keep:]):
+            label.set_visible(False)
+            pair_label.set_visible(False)
+
+    def on_scroll(self, event):
+        """Zoom com a roda do mouse em torno do cursor"""
+        if event.inaxes is not self.ax or not self.symbols.size:
+            return
+        x0, x1 = self.ax.get_xlim()
+        scale = 0.8 if event.button == 'up' else 1.25
+        center = event.xdata
+        width = min(max((x1 - x0) * scale, 2), self.symbols.size)
+        left = center - (center - x0) * width / (x1 - x0)
+        left = min(max(left, 0), self.symbols.size - width)
+        self.ax.set_xlim(left, left + width)
+        self.canvas.draw_idle()
+
+class PagedTextView(ttk.Frame):
+    """Visualização virtualizada de textos longos (binário, Manchester, Base64)
+
+    O texto é dividido em linhas de ``line_width`` caracteres e apenas as
+    linhas visíveis são inseridas no widget ``Text``; a barra de rolagem é
+    controlada pela própria classe. Trocar o conteúdo custa o mesmo para
+    alguns bytes ou vários megabytes. O conteúdo pode ser uma string ou um
+    ``ManchesterFrame``, convertido em '0'/'1' só na janela visível.
+    """
+
+    def __init__(self, master, line_width=128, **text_options):
+        super().__init__(master)
+        self.line_width = line_width
+        self.content = ""
+        self.first_line = 0
+
+        self.text = tk.Text(self, wrap=tk.NONE, state=tk.DISABLED, **text_options)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.font = tkfont.Font(font=self.text.cget('font'))
+
+        self.text.bind('<Configure>', lambda event: self.render())
+        self.text.bind('<MouseWheel>', lambda event: self.scroll_to(self.first_line - event.delta // 40))
+        self.text.bind('<Button-4>', lambda event: self.scroll_to(self.first_line - 3))
+        self.text.bind('<Button-5>', lambda event: self.scroll_to(self.first_line + 3))
+
+    @property
+    def line_count(self):
+        return -(-len(self.content) // self.line_width)
+
+    def visible_lines(self):
+        return max(1, self.text.winfo_height() // self.font.metrics('linespace'))
+
+    def set_text(self, content):
+        self.content = content
+        self.first_line = 0
+        self.render()
+
+    def patch(self, start, stop, replacement):
+        """Substitui ``content[start:stop]`` mantendo a rolagem; só redesenha se o trecho estiver visível"""
+        self.content = self.content[:start] + replacement + self.content[stop:]
+        visible_end = (self.first_line + self.visible_lines()) * self.line_width
+        if start < visible_end:
+            self.render()
+        else:
+            total = max(self.line_count, 1)
+            self.scrollbar.set(self.first_line / total, min(1.0, (self.first_line + self.visible_lines()) / total))
+
+    def scroll_to(self, line):
+        self.first_line = max(0, min(int(line), self.line_count - self.visible_lines()))
+        self.render()
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == tk.MOVETO:
+            self.scroll_to(float(amount) * self.line_count)
+        else:
+            step = self.visible_lines() if unit == tk.PAGES else 1
+            self.scroll_to(self.first_line + int(amount) * step)
+
+    def render(self):
+        """Reinsere no widget somente a janela visível do texto"""
+        visible = self.visible_lines()
+        start = self.first_line * self.line_width
+        stop = min(start + visible * self.line_width, len(self.content))
+        window = self.content[start:stop]
+        if isinstance(window, ManchesterFrame):
+            # Quadros empacotados só viram texto na janela visível
+            window = window.to_binary()
+        lines = [window[i:i + self.line_width] for i in range(0, len(window), self.line_width)]
+
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, '\n'.join(lines))
+        self.text.config(state=tk.DISABLED)
+
+        total = max(self.line_count, 1)
+        self.scrollbar.set(self.first_line / total, min(1.0, (self.first_line + visible) / total))
+
 
 class ManchesterCodingApp:
-    def __init__(self, root, is_sender=True):
+    SEND_STAGE_LABELS = {
+        'encrypt': "criptografando",
+        'protect': "calculando CRC32/FEC",
+        'binarize': "convertendo para binário",
+        'encode': "aplicando codificação Manchester",
+        'serialize': "montando quadro",
+        'send': "enviando",
+    }
+    
+    # Fila receptor → interface: drenada em lotes a cada EVENT_POLL_MS
+    EVENT_POLL_MS = 50
+    EVENT_QUEUE_SIZE = 256
+    EVENT_BATCH_SIZE = 512
+    # Prévia ao vivo: espera curta para juntar teclas seguidas, abaixo de um quadro (16 ms)
+    PREVIEW_DEBOUNCE_MS = 8
+
+    def __init__(self, root, is_sender=True, transport=None):
         self.root = root
         self.is_sender = is_sender
-        
+        # TCP por padrão; LoopbackTransport liga duas janelas no mesmo processo
+        self.transport = transport or TcpTransport()
+
         if is_sender:
             self.root.title("Manchester Coding - Host A (Envio)")
         else:
             self.root.title("Manchester Coding - Host B (Recepção)")
-        
+
         self.root.geometry("1400x1000")
-        
+
         # Socket configurations
-        self.socket = None
-        self.client_socket = None
+        self.sender_pool = None
+        self.sender_reliable = False
+        self.server = None
         self.host = '192.168.100.1'
         self.port = 12349
-        
+
         # For AES encryption
         self.key = get_random_bytes(32)  # 256 bits
-        
+
         # Para armazenar dados de transmissão
-        self.binary_data = ""
-        self.manchester_data = []
+        self.binary_data = ManchesterFrame()
+        self.manchester_data = ManchesterFrame()
         self.received_data = {}
-        
+        self.streams = {}
+        self.download_dir = os.path.abspath("recebidos")
+        self.events = EventQueue(self.EVENT_QUEUE_SIZE, policy=EventQueue.DROP_OLDEST)
+        self.frames_received = 0
+        self.frames_displayed = 0
+
         # Instância do encoder Manchester
         self.manchester_encoder = ManchesterEncoder()
-        
+        # Código de linha do último quadro enviado/recebido
+        self.line_code = MANCHESTER
+
+        # Prévia ao vivo do texto claro, recodificada por trecho a cada edição
+        self.preview = IncrementalEncoder()
+        self.preview_active = False
+        self.preview_after = None
+        self.preview_since = None
+
+        # Pipeline de envio em segundo plano; callbacks voltam para a thread do Tk
+        self.send_pipeline = SendPipeline(dispatch=lambda callback, *args: self.root.after(0, callback, *args),
+                                          on_progress=self.on_send_progress, on_done=self.on_send_done)
+
         # Criar widgets após inicializar as variáveis
         self.create_widgets()
-        
+
         if not is_sender:
             # Iniciar servidor se for o host de recepção
             self.start_server()
+            self.root.after(self.EVENT_POLL_MS, self.drain_events)
 
     def create_widgets(self):
         main_frame = ttk.Frame(self.root, padding=10)
         main_frame.pack(fill=tk.BOTH, expand=True)
-        
+
         # Frame de configuração de rede
         net_frame = ttk.LabelFrame(main_frame, text="Configuração de Rede", padding=10)
         net_frame.pack(fill=tk.X, pady=5)
-        
+
         ttk.Label(net_frame, text="IP:").grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
         self.ip_entry = ttk.Entry(net_frame, width=15)
         self.ip_entry.grid(row=0, column=1, padx=5, pady=5, sticky=tk.W)
         self.ip_entry.insert(0, "192.168.100.1")
-        
+
         ttk.Label(net_frame, text="Porta:").grid(row=0, column=2, padx=5, pady=5, sticky=tk.W)
         self.port_entry = ttk.Entry(net_frame, width=6)
         self.port_entry.grid(row=0, column=3, padx=5, pady=5, sticky=tk.W)
         self.port_entry.insert(0, "12349")
-        
+
         if self.is_sender:
             # Host A (Envio)
             self.connect_btn = ttk.Button(net_frame, text="Conectar", command=self.connect_to_receiver)
             self.connect_btn.grid(row=0, column=4, padx=5, pady=5)
             
+            # Formato JSON legado (opcional)
+            self.legacy_json_var = tk.BooleanVar(value=False)
+            ttk.Checkbutton(net_frame, text="JSON legado", variable=self.legacy_json_var).grid(row=0, column=5, padx=5, pady=5)
+            
+            # Código de linha, informado ao receptor no cabeçalho do quadro
+            ttk.Label(net_frame, text="Código de linha:").grid(row=0, column=6, padx=5, pady=5, sticky=tk.W)
+            self.line_code_var = tk.StringVar(value=MANCHESTER.name)
+            line_code_box = ttk.Combobox(net_frame, textvariable=self.line_code_var, values=line_code_names(),
+                                         state='readonly', width=16)
+            line_code_box.grid(row=0, column=7, padx=5, pady=5)
+            line_code_box.bind('<<ComboboxSelected>>', self.on_line_code_selected)
+
+            # CRC32 e correção de erros opcionais (manchester.fec)
+            ttk.Label(net_frame, text="Proteção:").grid(row=0, column=8, padx=5, pady=5, sticky=tk.W)
+            self.protection_var = tk.StringVar(value='none')
+            ttk.Combobox(net_frame, textvariable=self.protection_var, values=list(PROTECTIONS), state='readonly',
+                         width=8).grid(row=0, column=9, padx=5, pady=5)
+
+            # Entrega confirmada pelo receptor, com janela e retransmissão (manchester.reliable)
+            self.reliable_var = tk.BooleanVar(value=False)
+            ttk.Checkbutton(net_frame, text="Confirmação (ACK)", variable=self.reliable_var).grid(row=0, column=10,
+                                                                                               padx=5, pady=5)
+            
             # Frame de mensagem
             msg_frame = ttk.LabelFrame(main_frame, text="Mensagem", padding=10)
             msg_frame.pack(fill=tk.X, pady=5)
@@ -122,10 +419,20 @@ class ManchesterCodingApp:
             ttk.Label(msg_frame, text="Digite sua mensagem:").pack(anchor=tk.W)
             self.message_text = scrolledtext.ScrolledText(msg_frame, width=80, height=3)
             self.message_text.pack(fill=tk.X, pady=5)
+            self.message_text.bind('<<Modified>>', self.on_message_modified)
             
-            # Botão de envio
-            self.send_btn = ttk.Button(msg_frame, text="Enviar Mensagem", command=self.process_and_send)
-            self.send_btn.pack(pady=5)
+            # Botões de envio/cancelamento e progresso do pipeline
+            send_controls = ttk.Frame(msg_frame)
+            send_controls.pack(fill=tk.X, pady=5)
+            self.send_btn = ttk.Button(send_controls, text="Enviar Mensagem", command=self.process_and_send)
+            self.send_btn.pack(side=tk.LEFT, padx=5)
+            ttk.Button(send_controls, text="Cancelar", command=self.cancel_sends).pack(side=tk.LEFT, padx=5)
+            ttk.Button(send_controls, text="Enviar Arquivo...", command=self.send_file_dialog).pack(side=tk.LEFT, padx=5)
+            self.preview_var = tk.BooleanVar(value=False)
+            ttk.Checkbutton(send_controls, text="Prévia ao vivo", variable=self.preview_var,
+                            command=self.toggle_preview).pack(side=tk.LEFT, padx=5)
+            self.send_progress = ttk.Progressbar(send_controls, mode='determinate', maximum=100)
+            self.send_progress.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
             
             # Chave de criptografia
             key_frame = ttk.LabelFrame(main_frame, text="Chave AES-256", padding=10)
@@ -154,14 +461,14 @@ class ManchesterCodingApp:
             self.key_entry.pack(side=tk.LEFT, padx=5)
             
             ttk.Button(key_frame, text="Definir Chave", command=self.set_key).pack(side=tk.LEFT)
-        
+
         # Notebook para mostrar diferentes dados
         self.notebook = ttk.Notebook(main_frame)
         self.notebook.pack(fill=tk.BOTH, expand=True, pady=10)
-        
+
         # Abas
         self.create_tabs()
-        
+
         # Status bar
         self.status_bar = ttk.Label(self.root, text="Pronto", relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
@@ -170,157 +477,96 @@ class ManchesterCodingApp:
         # Aba de texto original
         self.text_tab = ttk.Frame(self.notebook)
         self.notebook.add(self.text_tab, text="Texto Original")
-        
+
         self.text_display = scrolledtext.ScrolledText(self.text_tab, width=80, height=10)
         self.text_display.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
+
         # Aba de texto criptografado
         self.encrypted_tab = ttk.Frame(self.notebook)
         self.notebook.add(self.encrypted_tab, text="Texto Criptografado")
-        
-        self.encrypted_display = scrolledtext.ScrolledText(self.encrypted_tab, width=80, height=10)
+
+        self.encrypted_display = PagedTextView(self.encrypted_tab, width=80, height=10)
         self.encrypted_display.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
+
         # Aba de binário
         self.binary_tab = ttk.Frame(self.notebook)
         self.notebook.add(self.binary_tab, text="Binário")
-        
-        self.binary_display = scrolledtext.ScrolledText(self.binary_tab, width=80, height=10)
+
+        self.binary_display = PagedTextView(self.binary_tab, width=80, height=10)
         self.binary_display.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
+
         # Aba de código Manchester
         self.manchester_tab = ttk.Frame(self.notebook)
         self.notebook.add(self.manchester_tab, text="Código Manchester")
-        
-        self.manchester_display = scrolledtext.ScrolledText(self.manchester_tab, width=80, height=10)
+
+        self.manchester_display = PagedTextView(self.manchester_tab, width=80, height=10)
         self.manchester_display.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
+
         # Aba de gráfico - MELHORADA
         self.graph_tab = ttk.Frame(self.notebook)
         self.notebook.add(self.graph_tab, text="Forma de Onda")
-        
+
         # Frame para controles do gráfico
         controls_frame = ttk.Frame(self.graph_tab)
         controls_frame.pack(fill=tk.X, padx=5, pady=5)
-        
+
         ttk.Button(controls_frame, text="Testar Decodificação", command=self.test_decode).pack(side=tk.LEFT, padx=5)
         ttk.Button(controls_frame, text="Validar Codificação", command=self.validate_manchester).pack(side=tk.LEFT, padx=5)
-        
+        ttk.Button(controls_frame, text="Estatísticas", command=self.show_stats).pack(side=tk.LEFT, padx=5)
+
         # Criar figura matplotlib com tamanho maior
         self.figure, self.ax = plt.subplots(figsize=(12, 8))
         self.canvas = FigureCanvasTkAgg(self.figure, master=self.graph_tab)
         self.canvas.draw()
+        # Barra de navegação para rolagem/zoom (a roda do mouse também aplica zoom)
+        toolbar = NavigationToolbar2Tk(self.canvas, self.graph_tab, pack_toolbar=False)
+        toolbar.update()
+        toolbar.pack(side=tk.BOTTOM, fill=tk.X)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
+        self.waveform = WaveformRenderer(self.figure, self.ax, self.canvas)
+
         # Inicializar gráfico vazio
         self.draw_empty_graph()
 
     def draw_empty_graph(self):
         """Desenha um gráfico vazio com instruções"""
-        self.ax.clear()
-        self.ax.text(0.5, 0.5, 'Digite uma mensagem e clique em "Enviar Mensagem"\npara visualizar a forma de onda Manchester', 
-                    ha='center', va='center', transform=self.ax.transAxes, fontsize=12, color='gray')
-        self.ax.set_title('Forma de Onda Manchester - Aguardando dados')
-        self.canvas.draw()
+        self.waveform.clear('Digite uma mensagem e clique em "Enviar Mensagem"\npara visualizar a forma de onda Manchester',
+                            'Forma de Onda Manchester - Aguardando dados')
 
     def draw_manchester_waveform(self, binary_data, manchester_data, title="Codificação Manchester"):
-        """Desenha a forma de onda Manchester corretamente - baseado no manchester_test_v2.py"""
-        if not manchester_data:
+        """Desenha a forma de onda Manchester completa; o zoom controla o nível de detalhe"""
+        if not len(manchester_data):
             self.draw_empty_graph()
             return
-        
-        # Limpar gráfico anterior
-        self.ax.clear()
-        
-        # Criar eixo de tempo para forma de onda contínua
-        time_points = []
-        signal_values = []
-        
-        # Criar pontos para forma de onda escalonada
-        for i, value in enumerate(manchester_data):
-            time_points.extend([i, i + 1])
-            signal_values.extend([value, value])
-        
-        # Plotar sinal Manchester
-        self.ax.plot(time_points, signal_values, 'b-', linewidth=3, label='Sinal Manchester')
-        
-        # Configurar eixos
-        self.ax.set_ylim(-0.5, 1.5)
-        self.ax.set_xlim(0, len(manchester_data))
-        self.ax.set_ylabel('Amplitude (V)', fontsize=12)
-        self.ax.set_xlabel('Tempo (unidades de amostra)', fontsize=12)
-        self.ax.set_title(f'{title} – Sinal Bifásico', fontsize=14, fontweight='bold')
-        
-        # Adicionar linhas de referência
-        self.ax.axhline(y=0, color='red', linestyle='--', alpha=0.7, label='Nível Baixo (0V)')
-        self.ax.axhline(y=1, color='green', linestyle='--', alpha=0.7, label='Nível Alto (1V)')
-        
-        # Adicionar separadores de bits originais
-        for i in range(1, len(binary_data)):
-            x_pos = i * 2
-            self.ax.axvline(x=x_pos, color='gray', linestyle=':', alpha=0.8, linewidth=1)
-        
-        # Adicionar rótulos dos bits originais
-        for i, bit in enumerate(binary_data):
-            x_pos = i * 2 + 1
-            # Rótulo do bit
-            self.ax.text(x_pos, -0.3, f'Bit {i}\n{bit}', 
-                        ha='center', va='top', fontsize=10, 
-                        bbox=dict(boxstyle='round,pad=0.3', facecolor='lightblue', alpha=0.8))
-            
-            # Mostrar a codificação Manchester correspondente
-            manchester_pair = manchester_data[i*2:i*2+2]
-            manchester_str = ''.join(map(str, manchester_pair))
-            self.ax.text(x_pos, 1.3, f'→ {manchester_str}', 
-                        ha='center', va='bottom', fontsize=9, color='blue',
-                        bbox=dict(boxstyle='round,pad=0.2', facecolor='lightyellow', alpha=0.8))
-        
-        # Adicionar informações dos dados
-        info_text = f'Dados binários: {binary_data}\nManchester: {"".join(map(str, manchester_data))}\nComprimento: {len(binary_data)} bits → {len(manchester_data)} símbolos'
-        self.ax.text(0.02, 0.98, info_text, transform=self.ax.transAxes, 
-                    verticalalignment='top', fontsize=10,
-                    bbox=dict(boxstyle='round,pad=0.5', facecolor='white', alpha=0.9))
-        
-        # Legenda das regras de codificação
-        legend_text = 'Regras Manchester:\n0 → 10 (Alto→Baixo) ↓\n1 → 01 (Baixo→Alto) ↑'
-        self.ax.text(0.98, 0.98, legend_text, transform=self.ax.transAxes, 
-                    verticalalignment='top', horizontalalignment='right', fontsize=10,
-                    bbox=dict(boxstyle='round,pad=0.5', facecolor='yellow', alpha=0.9))
-        
-        # Configurar legenda
-        self.ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.05), ncol=3)
-        
-        # Adicionar grade
-        self.ax.grid(True, alpha=0.3)
-        
-        # Ajustar layout
-        self.figure.tight_layout()
-        
-        # Atualizar canvas
-        self.canvas.draw()
+
+        bits = ManchesterEncoder.binary_to_codes(binary_data)
+        code = self.line_code
+        kind = 'Sinal Bifásico' if code.block_symbols == 2 * code.block_bits else code.label
+        self.waveform.set_data(bits[bits != ManchesterEncoder.BIT_IGNORED], manchester_data, f'{title} – {kind}', code)
 
     def test_decode(self):
         """Testa a decodificação Manchester"""
         if not self.manchester_data or not self.binary_data:
             messagebox.showwarning("Aviso", "Primeiro envie uma mensagem para ter dados Manchester")
             return
-        
-        # Decodificar
-        decoded_binary = self.manchester_encoder.decode_manchester_to_binary(self.manchester_data)
+
+        # Decodificar com o código de linha usado no quadro
+        code = self.line_code
+        decoded_binary = ManchesterFrame.from_symbols(code.decode_symbols(self.manchester_data))
         is_correct = decoded_binary == self.binary_data
-        
-        result_text = f"""Teste de Decodificação Manchester:
 
-Original (binário): {self.binary_data[:50]}{'...' if len(self.binary_data) > 50 else ''}
-Decodificado:      {decoded_binary[:50]}{'...' if len(decoded_binary) > 50 else ''}
+        result_text = f"""Teste de Decodificação {code.label}:
+
+Original (binário): {self.binary_data[:50].to_binary()}{'...' if len(self.binary_data) > 50 else ''}
+Decodificado:      {decoded_binary[:50].to_binary()}{'...' if len(decoded_binary) > 50 else ''}
 
 Resultado: {'✅ Decodificação CORRETA' if is_correct else '❌ ERRO na decodificação'}
 
 Comprimentos:
 - Binário original: {len(self.binary_data)} bits
-- Manchester: {len(self.manchester_data)} símbolos ({len(self.manchester_data)//2} bits esperados)
+- {code.label}: {len(self.manchester_data)} símbolos ({int(len(self.manchester_data) / code.symbols_per_bit)} bits esperados)
 - Decodificado: {len(decoded_binary)} bits"""
-        
+
         messagebox.showinfo("Teste de Decodificação", result_text)
 
     def validate_manchester(self):
@@ -329,21 +575,32 @@ Comprimentos:
             messagebox.showwarning("Aviso", "Primeiro envie uma mensagem para ter dados Manchester")
             return
             
-        validation = self.manchester_encoder.validate_encoding(self.binary_data, self.manchester_data)
-        
+        label = self.line_code.label
+        validation = self.line_code.validate_encoding(self.binary_data, self.manchester_data)
+
         if validation['valid']:
-            messagebox.showinfo("Validação", "✅ Codificação Manchester VÁLIDA!\n\nTodos os bits estão codificados corretamente.")
+            messagebox.showinfo("Validação", f"✅ Codificação {label} VÁLIDA!\n\nTodos os bits estão codificados corretamente.")
         else:
-            messagebox.showerror("Validação", f"❌ Codificação Manchester INVÁLIDA!\n\n{validation['error']}")
+            errors = validation.get('errors', ())
+            messagebox.showerror("Validação", f"❌ Codificação {label} INVÁLIDA!\n\n{validation['error']}"
+                                              f"\n\nTotal de bits inválidos: {len(errors)}")
+
+    def show_stats(self):
+        """Mostra latência e vazão medidas em cada etapa do pipeline"""
+        if not metrics.enabled:
+            messagebox.showinfo("Estatísticas por Etapa", "Instrumentação desativada.\n\nInicie com "
+                                "MANCHESTER_METRICS=1, --stats-interval ou --metrics-port para medir as etapas.")
+            return
+        messagebox.showinfo("Estatísticas por Etapa", metrics.format_line(separator='\n'))
 
     def generate_new_key(self):
         self.key = get_random_bytes(32)
         key_b64 = base64.b64encode(self.key).decode()
         self.key_var.set(key_b64)
-        
+
         self.root.clipboard_clear()
         self.root.clipboard_append(key_b64)
-        
+
         messagebox.showinfo("Nova Chave", "Nova chave AES-256 gerada com sucesso e copiada para a área de transferência!")
 
     def set_key(self):
@@ -373,13 +630,41 @@ Comprimentos:
         try:
             host = self.ip_entry.get()
             port = int(self.port_entry.get())
+            # Vários receptores separados por vírgula (fan-out) ou um grupo multicast
+            targets = parse_targets(host, port)
             
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.connect((host, port))
+            # Substituir o pool anterior, se houver (permite trocar de receptor)
+            if self.sender_pool:
+                self.sender_pool.stop_in_thread()
+            self.sender_reliable = False
+            if is_multicast(targets[0][0]):
+                self.sender_pool = MulticastTransport().sender(*targets[0])
+            elif is_shm(host):
+                # Receptor na mesma máquina: quadros pelo anel de memória compartilhada
+                self.sender_pool = ShmTransport().sender(host, port)
+            elif len(targets) > 1:
+                self.sender_pool = self.transport.fanout(targets)
+            else:
+                self.sender_reliable = self.reliable_var.get()
+                self.sender_pool = self.transport.sender(host, port, reliable=self.sender_reliable)
+            self.sender_pool.start_in_thread()
+            self.send_pipeline.sender = self.sender_pool
             
-            messagebox.showinfo("Conexão", f"Conectado com sucesso ao receptor em {host}:{port}")
-            self.status_bar.config(text=f"Conectado a {host}:{port}")
-            self.connect_btn.config(state=tk.DISABLED)
+            if is_multicast(targets[0][0]):
+                messagebox.showinfo("Conexão", f"Mensagens serão enviadas ao grupo multicast {targets[0][0]}:{targets[0][1]}")
+                self.status_bar.config(text=f"Multicast {targets[0][0]}:{targets[0][1]}")
+            elif len(targets) > 1:
+                self.sender_pool.wait_connected(3)
+                connected = self.sender_pool.connected
+                messagebox.showinfo("Conexão", f"Conectado a {connected} de {len(targets)} receptores.\n\n"
+                                               "Os demais serão tentados novamente em segundo plano.")
+                self.status_bar.config(text=f"Fan-out: {connected} de {len(targets)} receptores conectados")
+            elif self.sender_pool.wait_connected(3):
+                messagebox.showinfo("Conexão", f"Conectado com sucesso ao receptor em {host}:{port}")
+                self.status_bar.config(text=f"Conectado a {host}:{port}")
+            else:
+                messagebox.showwarning("Conexão", f"Receptor {host}:{port} indisponível no momento.\n\nA conexão será tentada novamente em segundo plano.")
+                self.status_bar.config(text=f"Reconectando a {host}:{port}...")
         except Exception as e:
             messagebox.showerror("Erro de Conexão", f"Não foi possível conectar: {str(e)}")
 
@@ -389,64 +674,137 @@ Comprimentos:
             host = '0.0.0.0'
             port = int(self.port_entry.get())
             
-            server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            server_socket.bind((host, port))
-            server_socket.listen(1)
-            
-            self.status_var.set(f"Aguardando conexão na porta {port}...")
+            group = self.ip_entry.get().strip()
+            if is_multicast(group):
+                # Assinar o grupo multicast informado no campo IP
+                self.server = MulticastTransport().receiver(self.on_frame_received, group, port,
+                                                            on_connection=self.on_connection_changed,
+                                                            on_gap=self.on_multicast_gap)
+            elif is_shm(group):
+                # Remetentes da mesma máquina pelos anéis de memória compartilhada
+                self.server = ShmTransport().receiver(self.on_frame_received, group, port,
+                                                      on_connection=self.on_connection_changed)
+            else:
+                self.server = self.transport.receiver(self.on_frame_received, host=host, port=port,
+                                                      on_connection=self.on_connection_changed, verify=self.verify_frame)
+            self.server.start_in_thread()
             
-            threading.Thread(target=self.accept_connections, args=(server_socket,), daemon=True).start()
+            if is_multicast(group):
+                self.status_var.set(f"Aguardando quadros do grupo {group}:{port}...")
+            elif is_shm(group):
+                self.status_var.set(f"Aguardando remetentes em memória compartilhada (porta {port})...")
+            else:
+                self.status_var.set(f"Aguardando conexão na porta {port}...")
         except Exception as e:
             messagebox.showerror("Erro no Servidor", f"Não foi possível iniciar o servidor: {str(e)}")
 
-    def accept_connections(self, server_socket):
+    def on_connection_changed(self, peer, active_connections):
+        """Chamado pelo servidor assíncrono quando uma conexão abre ou fecha"""
+        self.events.put('connection', f"{active_connections} conexão(ões) ativa(s) - último: {peer[0]}:{peer[1]}", coalesce=True)
+
+    def on_multicast_gap(self, peer, first, count):
+        """Chamado pela thread do receptor multicast quando a sequência de um remetente salta"""
+        self.events.put('connection', f"Multicast: {self.server.lost} quadro(s) perdido(s) - "
+                                      f"último salto de {count} em {peer[0]}:{peer[1]} (seq. {first})", coalesce=True)
+
+    def verify_frame(self, received_data):
+        """Verificação antes do ACK (thread do servidor): CRC32 e, com a chave definida, a decifração"""
+        if not default_verify(received_data):
+            return False
+        if self.key and "encrypted" in received_data:
+            received_data["decrypted"] = decrypt_aes_256(self.key, received_data["encrypted"])
+        return True
+
+    def on_frame_received(self, received_data, peer):
+        """Consumidor Tk: agenda a exibição do quadro na thread da interface"""
+        if StreamReceiver.is_stream_frame(received_data):
+            self.receive_stream_frame(received_data, peer)
+            return
+        self.events.put('frame', (received_data, peer))
+
+    def drain_events(self):
+        """Drena a fila de eventos do receptor em lote (temporizador do Tk)
+
+        Numa rajada de quadros só o mais recente é exibido; os demais são
+        apenas contados, e a fila descarta os mais antigos quando enche.
+        """
         try:
-            while True:
-                client_socket, addr = server_socket.accept()
-                self.client_socket = client_socket
-                
-                self.root.after(0, lambda: self.status_var.set(f"Conectado com {addr[0]}:{addr[1]}"))
-                self.root.after(0, lambda: self.status_bar.config(text=f"Cliente conectado de {addr[0]}:{addr[1]}"))
-                
-                threading.Thread(target=self.receive_data, args=(client_socket,), daemon=True).start()
-        except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("Erro de Conexão", f"Erro ao aceitar conexão: {str(e)}"))
+            batch = self.events.drain(self.EVENT_BATCH_SIZE)
+            last_frame = None
+            for kind, payload in batch:
+                if kind == 'frame':
+                    last_frame = payload
+                    self.frames_received += 1
+                elif kind == 'connection':
+                    self.status_var.set(payload)
+                elif kind == 'stream':
+                    self.process_received_stream(*payload)
+                elif kind == 'file':
+                    path, size = payload
+                    self.status_bar.config(text=f"Arquivo recebido e autenticado: {path} ({size} bytes)")
+                elif kind == 'error':
+                    messagebox.showerror(*payload)
+            
+            if last_frame:
+                received_data, peer = last_frame
+                self.process_received_data(received_data)
+                self.frames_displayed += 1
+                stats = self.events.stats()
+                self.status_bar.config(text=f"Quadro recebido de {peer[0]}:{peer[1]} - "
+                                            f"{self.frames_received} recebidos, {self.frames_displayed} exibidos, "
+                                            f"{stats['dropped']} descartados, {stats['pending']} pendentes")
+        finally:
+            self.root.after(self.EVENT_POLL_MS, self.drain_events)
+
+    def receive_stream_frame(self, received_data, peer):
+        """Acumula um fluxo AES-GCM por conexão e exibe o texto (ou salva o arquivo) após verificar a tag"""
+        if received_data["mode"] == WireProtocol.MODE_STREAM_START:
+            chunks = []
+            self.streams[peer] = (StreamReceiver(self.key, chunks.append),
+                                  lambda receiver: self.events.put('stream', (b''.join(chunks).decode('utf-8', errors='replace'),
+                                                                              receiver.bytes_received)))
+        elif received_data["mode"] == WireProtocol.MODE_FILE_START:
+            # Arquivos são decifrados direto em um mmap do arquivo de saída
+            os.makedirs(self.download_dir, exist_ok=True)
+            self.streams[peer] = (FileReceiver(self.key, self.download_dir),
+                                  lambda receiver: self.events.put('file', (receiver.path, receiver.size)))
+        if peer not in self.streams:
+            return
+        receiver, on_complete = self.streams[peer]
+        try:
+            complete = receiver.feed(received_data)
+        except ValueError as e:
+            del self.streams[peer]
+            self.events.put('error', ("Erro de Autenticação", f"Fluxo AES-GCM rejeitado: {e}"))
+            return
+        if complete:
+            del self.streams[peer]
+            on_complete(receiver)
+
+    def process_received_stream(self, text, size):
+        self.text_display.delete("1.0", tk.END)
+        self.text_display.insert(tk.END, text)
+        self.status_bar.config(text=f"Fluxo AES-GCM recebido e autenticado ({size} bytes)")
 
     def encrypt_aes_256(self, data):
         try:
-            iv = get_random_bytes(16)
-            cipher = AES.new(self.key, AES.MODE_CBC, iv)
-            encrypted_data = cipher.encrypt(pad(data.encode('utf-8'), AES.block_size))
-            return base64.b64encode(iv + encrypted_data).decode('utf-8')
+            return encrypt_aes_256(self.key, data)
         except Exception as e:
             messagebox.showerror("Erro de Criptografia", f"Erro ao criptografar: {str(e)}")
             return ""
 
     def decrypt_aes_256(self, encrypted_data):
         try:
-            raw_data = base64.b64decode(encrypted_data)
-            iv = raw_data[:16]
-            encrypted_data = raw_data[16:]
-            cipher = AES.new(self.key, AES.MODE_CBC, iv)
-            decrypted_data = unpad(cipher.decrypt(encrypted_data), AES.block_size)
-            return decrypted_data.decode('utf-8')
+            return decrypt_aes_256(self.key, encrypted_data)
         except Exception as e:
             messagebox.showerror("Erro de Descriptografia", f"Erro ao descriptografar: {str(e)}")
             return ""
 
     def text_to_binary(self, text):
-        binary = ""
-        for char in text:
-            binary += format(ord(char), '08b')
-        return binary
+        return text_to_binary(text)
 
     def binary_to_text(self, binary):
-        text = ""
-        for i in range(0, len(binary), 8):
-            byte = binary[i:i+8]
-            if len(byte) == 8:
-                text += chr(int(byte, 2))
-        return text
+        return binary_to_text(binary)
 
     def process_and_send(self):
         try:
@@ -459,100 +817,209 @@ Comprimentos:
             self.text_display.delete("1.0", tk.END)
             self.text_display.insert(tk.END, message)
             
-            # Criptografar
-            encrypted = self.encrypt_aes_256(message)
-            self.encrypted_display.delete("1.0", tk.END)
-            self.encrypted_display.insert(tk.END, encrypted)
-            
-            # Converter para binário
-            binary = self.text_to_binary(encrypted)
-            self.binary_data = binary
-            self.binary_display.delete("1.0", tk.END)
-            self.binary_display.insert(tk.END, binary)
-            
-            # Aplicar codificação Manchester CORRETA
-            manchester = self.manchester_encoder.encode_binary_to_manchester(binary)
-            self.manchester_data = manchester
-            
-            # Mostrar codificação Manchester
-            manchester_text = ''.join(map(str, manchester))
-            self.manchester_display.delete("1.0", tk.END)
-            self.manchester_display.insert(tk.END, manchester_text)
-            
-            # Desenhar a forma de onda CORRETA
-            self.draw_manchester_waveform(binary[:32], manchester[:64], "Codificação Manchester - Enviado")  # Limitar para visualização
-            
-            # Preparar dados para envio
-            data_to_send = {
-                "text": message,
-                "encrypted": encrypted,
-                "binary": binary,
-                "manchester": manchester
-            }
-            
-            # Enviar para o receptor
-            if self.socket:
-                self.socket.sendall(json.dumps(data_to_send).encode())
-                self.status_bar.config(text="Mensagem enviada com sucesso")
-            else:
-                messagebox.showwarning("Aviso", "Conecte-se a um receptor primeiro.")
+            # Criptografia, codificação e envio rodam no pipeline em segundo plano
+            job = self.send_pipeline.submit(message, self.key, legacy_json=self.legacy_json_var.get(),
+                                            line_code=self.line_code_var.get(),
+                                            protection=self.protection_var.get())
+            self.status_bar.config(text=f"Mensagem #{job.id} na fila ({len(self.send_pipeline.jobs)} em processamento)")
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao processar e enviar: {str(e)}")
 
-    def receive_data(self, client_socket):
+    def send_file_dialog(self):
+        """Escolhe um arquivo e o envia mapeado em memória, fora da thread da interface"""
+        path = filedialog.askopenfilename(title="Arquivo para enviar")
+        if not path:
+            return
         try:
-            while True:
-                data = client_socket.recv(65536)
-                if not data:
-                    break
-                
-                received_data = json.loads(data.decode())
-                self.received_data = received_data
-                
-                self.root.after(0, self.process_received_data)
+            host = self.ip_entry.get()
+            port = int(self.port_entry.get())
+        except ValueError as e:
+            messagebox.showerror("Erro", f"Porta inválida: {str(e)}")
+            return
+        self.send_pipeline.executor.submit(self.send_file_worker, path, host, port, self.key)
+        self.status_bar.config(text=f"Enviando arquivo {os.path.basename(path)}...")
+
+    def send_file_worker(self, path, host, port, key):
+        name = os.path.basename(path)
+        last_percent = [-1]
+
+        def progress(sent, total):
+            # Uma atualização por ponto percentual, não por janela
+            percent = sent * 100 // total
+            if percent != last_percent[0]:
+                last_percent[0] = percent
+                self.root.after(0, self.on_send_progress_value, percent, f"Enviando {name}: {percent}%")
+
+        try:
+            with self.transport.connect(host, port, timeout=10) as sock:
+                size = send_file(sock, key, path, progress=progress)
+            self.root.after(0, self.on_send_progress_value, 100, f"Arquivo {name} ({size} bytes) enviado")
         except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("Erro de Recepção", f"Erro ao receber dados: {str(e)}"))
-        finally:
-            client_socket.close()
+            error = str(e)
+            self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro ao enviar arquivo: {error}"))
+
+    def toggle_preview(self):
+        """Liga/desliga a prévia ao vivo do texto claro"""
+        self.preview_active = False
+        if self.preview_var.get():
+            self.schedule_preview()
+
+    def on_line_code_selected(self, event=None):
+        self.preview.set_line_code(self.line_code_var.get())
+        self.preview_active = False
+        if self.preview_var.get():
+            self.schedule_preview()
+
+    def on_message_modified(self, event=None):
+        """``<<Modified>>`` do campo de mensagem: agenda a prévia, juntando teclas seguidas"""
+        # Limpar o indicador gera outro <<Modified>>, que é ignorado aqui
+        if not self.message_text.edit_modified():
+            return
+        self.message_text.edit_modified(False)
+        if self.preview_var.get():
+            self.schedule_preview()
+
+    def schedule_preview(self):
+        if self.preview_since is None:
+            self.preview_since = time.perf_counter_ns()
+        if self.preview_after is not None:
+            self.root.after_cancel(self.preview_after)
+        self.preview_after = self.root.after(self.PREVIEW_DEBOUNCE_MS, self.update_preview)
 
-    def process_received_data(self):
+    def update_preview(self):
+        """Recodifica só o trecho editado e aplica o mesmo trecho às visualizações e ao gráfico"""
+        self.preview_after = None
+        data = self.message_text.get("1.0", "end-1c").encode('utf-8')
+        preview = self.preview
+        if not self.preview_active:
+            # Primeira prévia (ou após um envio): as visualizações mostram outro conteúdo
+            preview.update(data)
+            self.line_code = preview.line_code
+            self.binary_display.set_text(ManchesterEncoder.bits_to_binary(preview.bits))
+            self.manchester_display.set_text(ManchesterEncoder.bits_to_binary(preview.symbols))
+            self.waveform.set_data(preview.bits, preview.symbols, 'Prévia ao Vivo – Texto Claro', preview.line_code)
+            self.preview_active = True
+        else:
+            change = preview.update(data)
+            self.binary_display.patch(change['start'] * 8, change['old_stop'] * 8,
+                                      bytes_to_binary(data[change['start']:change['stop']]))
+            self.manchester_display.patch(change['symbol_start'], change['old_symbol_stop'], ManchesterEncoder.bits_to_binary(
+                preview.symbols[change['symbol_start']:change['symbol_stop']]))
+            self.waveform.update_data(preview.bits, preview.symbols, change['symbol_start'],
+                                      max(change['symbol_stop'], change['old_symbol_stop']))
+
+        # Latência da primeira tecla pendente até a prévia atualizada (o desenho do gráfico fica para o ocioso)
+        elapsed = time.perf_counter_ns() - self.preview_since
+        self.preview_since = None
+        if metrics.enabled:
+            metrics.record('preview', elapsed, len(data))
+        self.status_bar.config(text=f"Prévia: {len(data)} bytes, {preview.symbols.size} símbolos "
+                                    f"({preview.line_code.label}) em {elapsed / 1e6:.1f} ms")
+
+    def on_send_progress_value(self, percent, text):
+        self.send_progress['value'] = percent
+        self.status_bar.config(text=text)
+
+    def cancel_sends(self):
+        """Cancela as mensagens ainda em processamento"""
+        self.send_pipeline.cancel_all()
+
+    def on_send_progress(self, job, stage, fraction):
+        """Chamado na thread da interface a cada etapa do pipeline de envio"""
+        self.send_progress['value'] = fraction * 100
+        self.status_bar.config(text=f"Mensagem #{job.id}: {self.SEND_STAGE_LABELS[stage]}...")
+
+    def on_send_done(self, job, result, error):
+        """Chamado na thread da interface quando um job do pipeline termina"""
+        if isinstance(error, JobCancelled):
+            self.status_bar.config(text=f"Mensagem #{job.id} cancelada")
+            return
+        if error:
+            messagebox.showerror("Erro", f"Erro ao processar e enviar: {str(error)}")
+            return
+
+        self.send_progress['value'] = 100
+        # As visualizações passam a mostrar o quadro enviado; a próxima prévia é completa
+        self.preview_active = False
+        self.binary_data = result["binary"]
+        self.manchester_data = result["manchester"]
+        self.line_code = get_line_code(result["line_code"])
+
+        self.encrypted_display.set_text(result["encrypted"])
+        self.binary_display.set_text(result["binary"])
+        self.manchester_display.set_text(result["manchester"])
+
+        self.draw_manchester_waveform(result["binary"], result["manchester"], "Codificação Manchester - Enviado")
+
+        if result["sent"] and self.sender_reliable:
+            self.status_bar.config(text=f"Mensagem #{job.id} enviada e confirmada pelo receptor")
+        elif result["sent"]:
+            self.status_bar.config(text=f"Mensagem #{job.id} enviada com sucesso")
+        else:
+            messagebox.showwarning("Aviso", "Conecte-se a um receptor primeiro.")
+
+    def process_received_data(self, received_data=None):
         try:
+            if received_data is not None:
+                self.received_data = received_data
+            
             manchester = self.received_data.get("manchester", [])
             binary = self.received_data.get("binary", "")
             encrypted = self.received_data.get("encrypted", "")
+            if not isinstance(manchester, ManchesterFrame):
+                # JSON legado: lista de símbolos e string '0'/'1'
+                manchester = ManchesterFrame.from_symbols(manchester)
+                binary = ManchesterFrame.from_binary(binary)
             
-            # Armazenar dados recebidos
+            # Armazenar dados recebidos (quadros JSON legados sem o campo são Manchester)
             self.manchester_data = manchester
             self.binary_data = binary
+            self.line_code = get_line_code(self.received_data.get("line_code"))
             
             # Mostrar dados recebidos
-            self.manchester_display.delete("1.0", tk.END)
-            self.manchester_display.insert(tk.END, ''.join(map(str, manchester)))
-            
-            self.binary_display.delete("1.0", tk.END)
-            self.binary_display.insert(tk.END, binary)
-            
-            self.encrypted_display.delete("1.0", tk.END)
-            self.encrypted_display.insert(tk.END, encrypted)
+            self.manchester_display.set_text(manchester)
+            self.binary_display.set_text(binary)
+            self.encrypted_display.set_text(encrypted)
             
             # Desenhar a forma de onda dos dados recebidos
-            self.draw_manchester_waveform(binary[:32], manchester[:64], "Decodificação Manchester - Recebido")
+            self.draw_manchester_waveform(binary, manchester, "Decodificação Manchester - Recebido")
+            
+            integrity = self.received_data.get("integrity")
+            if integrity and not integrity['crc_ok']:
+                self.status_bar.config(text="Quadro corrompido: CRC32 não confere")
+                messagebox.showerror("Quadro Corrompido",
+                                     f"CRC32 não confere ({integrity['corrected']} palavras corrigidas pelo FEC): "
+                                     "há erros além da capacidade de correção. A mensagem não foi descriptografada.")
+                return
             
             # Decodificar e descriptografar
             if self.key:
-                decrypted = self.decrypt_aes_256(encrypted)
+                # Quadros confirmados (ACK) já foram decifrados na verificação
+                decrypted = self.received_data.get("decrypted") or self.decrypt_aes_256(encrypted)
                 
                 self.text_display.delete("1.0", tk.END)
                 self.text_display.insert(tk.END, decrypted)
                 
-                self.status_bar.config(text="Mensagem recebida e decodificada com sucesso")
+                status = "Mensagem recebida e decodificada com sucesso"
+                if integrity:
+                    status += f" (CRC32 ok, {integrity['corrected']} palavras corrigidas)"
+                self.status_bar.config(text=status)
             else:
                 messagebox.showwarning("Aviso", "Configure uma chave AES-256 para descriptografar.")
         except Exception as e:
             messagebox.showerror("Erro de Processamento", f"Erro ao processar dados recebidos: {str(e)}")
 
-def main():
+def main(loopback=False):
     root = tk.Tk()
+    if loopback:
+        # Host A e Host B no mesmo processo, sem rede, compartilhando a chave
+        transport = LoopbackTransport()
+        receiver = ManchesterCodingApp(root, is_sender=False, transport=transport)
+        sender = ManchesterCodingApp(tk.Toplevel(root), is_sender=True, transport=transport)
+        receiver.key = sender.key
+        receiver.key_entry.insert(0, sender.key_var.get())
+        root.mainloop()
+        return
     app_type = messagebox.askyesno("Tipo de Aplicação", "Executar como Host A (Envio)?\n\nSim - Host A (Envio)\nNão - Host B (Recepção)")
     app = ManchesterCodingApp(root, is_sender=app_type)
     root.mainloop()